@@ -0,0 +1,34 @@
+"""add comments (post_id, is_deleted) index and reconcile posts.comment_count
+
+Revision ID: add_comments_post_deleted_index
+Revises: add_posts_search_vector
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+
+revision = "add_comments_post_deleted_index"
+down_revision = "add_posts_search_vector"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_comments_post_id_is_deleted ON comments (post_id, is_deleted)"
+    )
+    # posts.comment_count 此后作为权威值使用，先按评论表修正一次
+    op.execute("""
+        UPDATE posts SET comment_count = c.cnt
+        FROM (
+            SELECT p.id AS post_id, count(cm.id) AS cnt
+            FROM posts p
+            LEFT JOIN comments cm ON cm.post_id = p.id AND cm.is_deleted = false
+            GROUP BY p.id
+        ) c
+        WHERE posts.id = c.post_id AND posts.comment_count <> c.cnt
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_comments_post_id_is_deleted")
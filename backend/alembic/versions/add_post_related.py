@@ -0,0 +1,44 @@
+"""add post_related / post_term_vectors tables for precomputed related posts
+
+Revision ID: add_post_related
+Revises: add_posts_rendered_content
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+
+revision = "add_post_related"
+down_revision = "add_posts_rendered_content"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 内容由应用层生成；已有文章在首次批量计算（服务启动时表为空）后填充
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS post_related (
+            post_id integer NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+            related_post_id integer NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+            score double precision NOT NULL,
+            rank integer NOT NULL,
+            PRIMARY KEY (post_id, related_post_id)
+        )
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_post_related_post_id_rank ON post_related (post_id, rank)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_post_related_related_post_id ON post_related (related_post_id)")
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS post_term_vectors (
+            post_id integer PRIMARY KEY REFERENCES posts(id) ON DELETE CASCADE,
+            terms jsonb NOT NULL,
+            updated_at timestamp without time zone NOT NULL DEFAULT now()
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS post_term_vectors")
+    op.execute("DROP TABLE IF EXISTS post_related")
@@ -0,0 +1,40 @@
+"""add post_revisions table for delta-compressed post history
+
+Revision ID: add_post_revisions
+Revises: add_post_related
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+
+revision = "add_post_revisions"
+down_revision = "add_post_related"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 已有文章没有历史，首次保存修改时把修改前的内容记为版本 1
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS post_revisions (
+            id serial PRIMARY KEY,
+            post_id integer NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+            version integer NOT NULL,
+            title character varying NOT NULL,
+            is_snapshot boolean NOT NULL DEFAULT false,
+            content text,
+            delta jsonb,
+            content_hash character varying(64) NOT NULL,
+            content_length integer NOT NULL,
+            stored_size integer NOT NULL,
+            author_id integer REFERENCES users(id) ON DELETE SET NULL,
+            created_at timestamp without time zone NOT NULL DEFAULT now(),
+            CONSTRAINT uq_post_revisions_post_id_version UNIQUE (post_id, version)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS post_revisions")
@@ -0,0 +1,25 @@
+"""add posts keyset pagination index
+
+Revision ID: add_posts_keyset_index
+Revises: add_book_annotations
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+
+revision = "add_posts_keyset_index"
+down_revision = "add_book_annotations"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 与文章列表排序一致的复合索引，用于游标分页
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_posts_status_published_at_keyset
+        ON posts (status, published_at DESC, created_at DESC, id DESC)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_posts_status_published_at_keyset")
@@ -0,0 +1,30 @@
+"""add posts rendered content columns (content_html / content_toc / word_count / reading_time / content_hash)
+
+Revision ID: add_posts_rendered_content
+Revises: add_comments_post_deleted_index
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+
+revision = "add_posts_rendered_content"
+down_revision = "add_comments_post_deleted_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 渲染结果由应用层生成；已有文章在服务启动时由 render_missing_posts 补充
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS content_html text")
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS content_toc jsonb")
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS word_count integer NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS reading_time integer NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS content_hash varchar(64)")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS content_hash")
+    op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS reading_time")
+    op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS word_count")
+    op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS content_toc")
+    op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS content_html")
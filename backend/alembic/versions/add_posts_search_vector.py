@@ -0,0 +1,24 @@
+"""add posts search_vector (full-text search)
+
+Revision ID: add_posts_search_vector
+Revises: add_posts_keyset_index
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+
+revision = "add_posts_search_vector"
+down_revision = "add_posts_keyset_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 检索向量由应用层分词后写入；已有文章在服务启动时由 reindex_missing_posts 补建
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_posts_search_vector")
+    op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS search_vector")
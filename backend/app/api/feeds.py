@@ -0,0 +1,84 @@
+"""
+订阅源与站点地图（挂载在站点根路径，供爬虫与阅读器直接访问）。
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cached_response
+from app.core.database import get_db
+from app.services.feed_service import (
+    RSS_CACHE_KEY,
+    ATOM_CACHE_KEY,
+    SITEMAP_INDEX_CACHE_KEY,
+    sitemap_shard_cache_key,
+    build_rss,
+    build_atom,
+    build_sitemap_index,
+    build_sitemap_shard,
+)
+
+router = APIRouter()
+
+# 文章变化时按需删除；TTL 兜底站点地址等配置的变化（未配置站点地址时返回 503，不写缓存）
+FEED_CACHE_TTL = 3600
+FEED_CACHE_CONTROL = "public, max-age=300"
+
+RSS_MEDIA_TYPE = "application/rss+xml; charset=utf-8"
+ATOM_MEDIA_TYPE = "application/atom+xml; charset=utf-8"
+XML_MEDIA_TYPE = "application/xml; charset=utf-8"
+
+
+@router.get("/feed.xml")
+async def rss_feed(db: AsyncSession = Depends(get_db)):
+    """RSS 2.0 订阅源"""
+    return await cached_response(
+        RSS_CACHE_KEY,
+        lambda: build_rss(db),
+        media_type=RSS_MEDIA_TYPE,
+        ttl=FEED_CACHE_TTL,
+        cache_control=FEED_CACHE_CONTROL,
+    )
+
+
+@router.get("/atom.xml")
+async def atom_feed(db: AsyncSession = Depends(get_db)):
+    """Atom 1.0 订阅源"""
+    return await cached_response(
+        ATOM_CACHE_KEY,
+        lambda: build_atom(db),
+        media_type=ATOM_MEDIA_TYPE,
+        ttl=FEED_CACHE_TTL,
+        cache_control=FEED_CACHE_CONTROL,
+    )
+
+
+@router.get("/sitemap.xml")
+async def sitemap_index(db: AsyncSession = Depends(get_db)):
+    """站点地图索引"""
+    return await cached_response(
+        SITEMAP_INDEX_CACHE_KEY,
+        lambda: build_sitemap_index(db),
+        media_type=XML_MEDIA_TYPE,
+        ttl=FEED_CACHE_TTL,
+        cache_control=FEED_CACHE_CONTROL,
+    )
+
+
+@router.get("/sitemap-posts-{shard}.xml")
+async def sitemap_shard(shard: int, db: AsyncSession = Depends(get_db)):
+    """站点地图分片（按文章 ID 每 1000 篇一个分片）"""
+    async def load() -> bytes:
+        body = await build_sitemap_shard(db, shard)
+        if body is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="站点地图分片不存在")
+        return body
+
+    if shard < 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="站点地图分片不存在")
+    return await cached_response(
+        sitemap_shard_cache_key(shard),
+        load,
+        media_type=XML_MEDIA_TYPE,
+        ttl=FEED_CACHE_TTL,
+        cache_control=FEED_CACHE_CONTROL,
+    )
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1 import auth, posts, categories, tags, comments, config, upload, ai, init, stats, media, users, book_categories, books
+from app.api.v1 import auth, posts, categories, tags, comments, config, upload, ai, init, stats, media, users, book_categories, books, search
 
 api_router = APIRouter()
 
@@ -9,6 +9,7 @@ api_router.include_router(auth.router, prefix="/auth", tags=["认证"])
 api_router.include_router(posts.router, prefix="/posts", tags=["文章"])
 api_router.include_router(categories.router, prefix="/categories", tags=["分类"])
 api_router.include_router(tags.router, prefix="/tags", tags=["标签"])
+api_router.include_router(search.router, prefix="/search", tags=["搜索"])
 api_router.include_router(comments.router, prefix="/comments", tags=["评论"])
 api_router.include_router(config.router, prefix="/config", tags=["配置"])
 api_router.include_router(upload.router, prefix="/upload", tags=["上传"])
@@ -2,13 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import List, Optional
-import json
 import math
 
-from app.core.database import get_db
-from app.core.redis_client import get_cache, set_cache, delete_cache_pattern
+from app.core.database import get_db, get_read_db
+from app.core.redis_client import (
+    bump_namespace,
+    CATEGORY_LIST_NAMESPACE, POST_LIST_NAMESPACE,
+)
+from app.core.cache import cached_endpoint
+from app.services.snapshot_service import schedule_snapshot_section
+from app.services.taxonomy_count_service import category_post_changes, category_post_counts, refresh_term_posts
+from app.services.category_tree_service import build_category_tree, is_descendant
 from app.api.dependencies import get_current_admin
-from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
+from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse, CategoryTreeNode
 from app.schemas.pagination import PaginatedResponse
 from app.models.category import Category
 from app.models.user import User
@@ -16,24 +22,25 @@ from app.models.user import User
 router = APIRouter()
 
 
+async def _with_post_count(db: AsyncSession, category: Category) -> dict:
+    counts = await category_post_counts(db, [category.id])
+    return CategoryResponse.model_validate(category).model_dump() | {"post_count": counts.get(category.id, 0)}
+
+
 @router.get("/", response_model=PaginatedResponse[CategoryResponse])
+@cached_endpoint(
+    ttl=600,
+    namespace=CATEGORY_LIST_NAMESPACE,
+    stale_ttl=120,
+    cache_control="public, max-age=60",
+    key_fn=lambda page, size, **_: f"page:{page}:size:{size}",
+)
 async def get_categories(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取分类列表（分页）"""
-    # 尝试从缓存获取
-    cache_key = f"category:list:page:{page}:size:{size}"
-    cached = await get_cache(cache_key)
-    if cached:
-        cached_data = json.loads(cached)
-        # 如果缓存的数据为空，清除缓存并重新查询
-        if cached_data.get("total", 0) == 0 and cached_data.get("items", []) == []:
-            await delete_cache_pattern("category:list")
-        else:
-            return cached_data
-    
     # 计算总数
     count_query = select(func.count(Category.id))
     total_result = await db.execute(count_query)
@@ -44,8 +51,13 @@ async def get_categories(
     result = await db.execute(query)
     categories = result.scalars().all()
     
+    # 当前页分类的已发布文章数（一次聚合查询）
+    counts = await category_post_counts(db, [c.id for c in categories])
+    
     # 构建分页响应
-    categories_data = [CategoryResponse.model_validate(c).model_dump() for c in categories]
+    categories_data = [
+        CategoryResponse.model_validate(c).model_dump() | {"post_count": counts.get(c.id, 0)} for c in categories
+    ]
     pages = math.ceil(total / size) if total > 0 else 1
     
     response_data = {
@@ -55,16 +67,24 @@ async def get_categories(
         "size": size,
         "pages": pages
     }
-    
-    # 缓存结果（只缓存有数据的结果）
-    if total > 0:
-        await set_cache(cache_key, json.dumps(response_data, default=str), ttl=600)
-    
     return response_data
 
 
+@router.get("/tree", response_model=List[CategoryTreeNode])
+@cached_endpoint(
+    ttl=600,
+    namespace=CATEGORY_LIST_NAMESPACE,
+    stale_ttl=120,
+    cache_control="public, max-age=60",
+    key_fn=lambda **_: "tree",
+)
+async def get_category_tree(db: AsyncSession = Depends(get_read_db)):
+    """分类树（按名称排序，含每个分类及其子树的已发布文章数）"""
+    return await build_category_tree(db)
+
+
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
+async def get_category(category_id: int, db: AsyncSession = Depends(get_read_db)):
     """获取分类详情"""
     result = await db.execute(select(Category).where(Category.id == category_id))
     category = result.scalar_one_or_none()
@@ -75,7 +95,7 @@ async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
             detail="分类不存在"
         )
     
-    return category
+    return await _with_post_count(db, category)
 
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -108,8 +128,8 @@ async def create_category(
     await db.refresh(new_category)
     
     # 清除缓存（必须在返回前完成）
-    await delete_cache_pattern("category:list*")
-    await delete_cache_pattern("post:list:*")
+    await bump_namespace(CATEGORY_LIST_NAMESPACE, POST_LIST_NAMESPACE)
+    schedule_snapshot_section("categories")
     
     return new_category
 
@@ -149,7 +169,14 @@ async def update_category(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="父分类不存在"
             )
+        # 父分类不能是自身或自身的后代，否则分类树会形成环
+        if await is_descendant(db, update_data["parent_id"], category_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="父分类不能是该分类自身或其子分类"
+            )
     
+    renamed = any(key in update_data and update_data[key] != getattr(category, key) for key in ("name", "slug"))
     for key, value in update_data.items():
         setattr(category, key, value)
     
@@ -157,10 +184,13 @@ async def update_category(
     await db.refresh(category)
     
     # 清除缓存（必须在返回前完成）
-    await delete_cache_pattern("category:list*")
-    await delete_cache_pattern("post:list:*")
+    await bump_namespace(CATEGORY_LIST_NAMESPACE, POST_LIST_NAMESPACE)
+    schedule_snapshot_section("categories")
+    if renamed:
+        # 文章详情与列表项中包含分类名称与 slug
+        await refresh_term_posts(await category_post_changes(db, category_id))
     
-    return category
+    return await _with_post_count(db, category)
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -187,9 +217,12 @@ async def delete_category(
             detail="该分类下存在子分类，无法删除"
         )
     
+    # 关联行随分类级联删除，先记下其下的已发布文章
+    post_changes = await category_post_changes(db, category_id)
     await db.delete(category)
     await db.commit()
     
     # 清除缓存（必须在返回前完成）
-    await delete_cache_pattern("category:list*")
-    await delete_cache_pattern("post:list:*")
+    await bump_namespace(CATEGORY_LIST_NAMESPACE, POST_LIST_NAMESPACE)
+    schedule_snapshot_section("categories")
+    await refresh_term_posts(post_changes)
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, update
 from typing import List, Optional
 from sqlalchemy.orm import selectinload
 import math
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.config_loader import get_email_config
+from app.core.redis_client import bump_namespace, delete_cache, post_detail_cache_keys, POST_LIST_NAMESPACE
 from app.api.dependencies import get_current_user, get_current_admin
 from app.schemas.comment import CommentCreate, CommentResponse, CommentListResponse, UserInfo
 from app.schemas.pagination import PaginatedResponse
@@ -18,6 +19,21 @@ from app.services.email_service import email_service
 router = APIRouter()
 
 
+async def _adjust_comment_count(db: AsyncSession, post_id: int, delta: int) -> Optional[str]:
+    """原子更新 posts.comment_count（不低于 0），返回文章 slug 用于清理详情缓存"""
+    result = await db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(
+            comment_count=func.greatest(Post.comment_count + delta, 0),
+            updated_at=Post.updated_at,
+        )
+        .returning(Post.slug)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
+
+
 def build_comment_tree(comments: List[Comment]) -> List[CommentResponse]:
     """构建评论树结构。从 ORM 手动构造 CommentResponse，避免访问 c.replies 触发异步下的懒加载（MissingGreenlet）。"""
     comment_dict: dict[int, CommentResponse] = {}
@@ -45,7 +61,7 @@ def build_comment_tree(comments: List[Comment]) -> List[CommentResponse]:
 @router.get("/post/{post_id}", response_model=List[CommentResponse])
 async def get_comments_by_post(
     post_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取文章的所有评论"""
     # 检查文章是否存在
@@ -93,12 +109,6 @@ async def create_comment(
                 detail="父评论不存在"
             )
     
-    # 先统计当前评论数（必须在 add 之前，否则同一 session 的 count 会包含未提交的新评论导致多算）
-    current_count = await db.scalar(
-        select(func.count(Comment.id))
-        .where(Comment.post_id == post.id, Comment.is_deleted == False)
-    ) or 0
-
     # 创建评论
     new_comment = Comment(
         content=comment_data.content,
@@ -108,11 +118,14 @@ async def create_comment(
     )
     db.add(new_comment)
 
-    # 更新文章评论数
-    post.comment_count = current_count + 1
+    # 原子递增文章评论数（posts.comment_count 为权威值，列表与详情直接读取）
+    await _adjust_comment_count(db, post.id, 1)
     
     await db.commit()
     await db.refresh(new_comment)
+    # 列表项同样包含 comment_count
+    await bump_namespace(POST_LIST_NAMESPACE)
+    await delete_cache(*post_detail_cache_keys(post.slug))
 
     # 手动构建响应，避免触发 ORM 的 replies 懒加载（异步下会报 MissingGreenlet）
     response = CommentResponse(
@@ -212,25 +225,29 @@ async def delete_comment(
     db: AsyncSession = Depends(get_db)
 ):
     """删除评论（仅管理员）"""
-    result = await db.execute(select(Comment).where(Comment.id == comment_id))
-    comment = result.scalar_one_or_none()
+    # 条件更新实现软删除：并发删除同一条评论时只有一个请求能命中，评论数只扣减一次
+    result = await db.execute(
+        update(Comment)
+        .where(Comment.id == comment_id, Comment.is_deleted == False)
+        .values(is_deleted=True)
+        .returning(Comment.post_id)
+        .execution_options(synchronize_session=False)
+    )
+    post_id = result.scalar_one_or_none()
     
-    if not comment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="评论不存在"
-        )
+    if post_id is None:
+        exists = await db.scalar(select(Comment.id).where(Comment.id == comment_id))
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="评论不存在"
+            )
+        # 已删除的评论不重复扣减评论数
+        return
     
-    # 软删除
-    comment.is_deleted = True
+    # 在同一事务内原子递减文章评论数
+    slug = await _adjust_comment_count(db, post_id, -1)
     await db.commit()
-
-    # 更新文章评论数（软删后重查 post，再统计并提交）
-    result = await db.execute(select(Post).where(Post.id == comment.post_id))
-    post = result.scalar_one_or_none()
-    if post:
-        post.comment_count = await db.scalar(
-            select(func.count(Comment.id))
-            .where(Comment.post_id == post.id, Comment.is_deleted == False)
-        )
-        await db.commit()
+    await bump_namespace(POST_LIST_NAMESPACE)
+    if slug:
+        await delete_cache(*post_detail_cache_keys(slug))
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import date
 import json
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.redis_client import bump_namespace, CONFIG_NAMESPACE
+from app.core.cache import cached_endpoint
+from app.services.snapshot_service import (
+    SnapshotError, export_snapshot, read_snapshot_manifest, schedule_snapshot_section,
+)
 from app.services.github_trending_service import run_crawl_and_save, run_daily_summary_and_post
 from app.api.dependencies import get_current_admin
 from app.schemas.config import (
@@ -22,7 +27,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=Dict[str, Any])
-async def get_configs(db: AsyncSession = Depends(get_db)):
+async def get_configs(db: AsyncSession = Depends(get_read_db)):
     """获取所有配置（以字典形式返回）"""
     result = await db.execute(select(Config))
     configs = result.scalars().all()
@@ -31,7 +36,7 @@ async def get_configs(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/{key}", response_model=ConfigResponse)
-async def get_config(key: str, db: AsyncSession = Depends(get_db)):
+async def get_config(key: str, db: AsyncSession = Depends(get_read_db)):
     """获取指定配置"""
     result = await db.execute(select(Config).where(Config.key == key))
     config = result.scalar_one_or_none()
@@ -63,6 +68,8 @@ async def create_config(
     new_config = Config(**config_data.model_dump())
     db.add(new_config)
     await db.commit()
+    await bump_namespace(CONFIG_NAMESPACE)
+    schedule_snapshot_section("config")
     await db.refresh(new_config)
     
     return new_config
@@ -90,6 +97,8 @@ async def update_config(
         setattr(config, key_attr, value)
     
     await db.commit()
+    await bump_namespace(CONFIG_NAMESPACE)
+    schedule_snapshot_section("config")
     await db.refresh(config)
     
     return config
@@ -113,6 +122,8 @@ async def delete_config(
     
     await db.delete(config)
     await db.commit()
+    await bump_namespace(CONFIG_NAMESPACE)
+    schedule_snapshot_section("config")
 
 
 @router.put("/batch", response_model=Dict[str, Any])
@@ -139,6 +150,8 @@ async def batch_update_configs(
             updated_configs[key] = value
     
     await db.commit()
+    await bump_namespace(CONFIG_NAMESPACE)
+    schedule_snapshot_section("config")
     
     # 返回所有配置
     result = await db.execute(select(Config))
@@ -302,7 +315,15 @@ def _build_public_configs(configs: Dict[str, Any]) -> PublicConfigs:
 
 
 @router.get("/structured/all", response_model=PublicConfigs)
-async def get_structured_configs(db: AsyncSession = Depends(get_db)):
+# 每个页面都会请求公开配置，配置写操作通过命名空间整体失效
+@cached_endpoint(
+    ttl=600,
+    namespace=CONFIG_NAMESPACE,
+    stale_ttl=120,
+    cache_control="public, max-age=300",
+    key_fn=lambda **_: "structured:public",
+)
+async def get_structured_configs(db: AsyncSession = Depends(get_read_db)):
     """获取结构化配置（对外公开的部分）"""
     result = await db.execute(select(Config))
     configs = {config.key: config.value for config in result.scalars().all()}
@@ -408,6 +429,8 @@ async def update_structured_configs(
             db.add(new_config)
     
     await db.commit()
+    await bump_namespace(CONFIG_NAMESPACE)
+    schedule_snapshot_section("config")
     
     # 返回更新后的结构化配置
     result = await db.execute(select(Config))
@@ -442,3 +465,29 @@ async def run_github_trending_manual(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e),
         )
+
+
+@router.post("/snapshot/export")
+async def export_static_snapshot(
+    target: Optional[str] = Query(None, description="local / oss，默认使用 SNAPSHOT_TARGET"),
+    prune: bool = Query(True, description="是否清理旧版本中不再引用的文件"),
+    current_user: User = Depends(get_current_admin),
+):
+    """全量导出公开接口的静态 JSON 快照（仅管理员），内容未变化的文件不会重写"""
+    try:
+        summary = await export_snapshot(target=target, prune=prune)
+    except SnapshotError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"success": True, **summary}
+
+
+@router.get("/snapshot/manifest")
+async def get_static_snapshot_manifest(
+    target: Optional[str] = Query(None, description="local / oss，默认使用 SNAPSHOT_TARGET"),
+    current_user: User = Depends(get_current_admin),
+):
+    """查看当前静态快照的版本与文件数（仅管理员）"""
+    try:
+        return await read_snapshot_manifest(target)
+    except SnapshotError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
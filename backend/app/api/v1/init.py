@@ -4,6 +4,8 @@ from sqlalchemy import select, func
 from pydantic import BaseModel, EmailStr
 
 from app.core.database import get_db
+from app.core.redis_client import bump_namespace, CONFIG_NAMESPACE
+from app.services.snapshot_service import schedule_snapshot_section
 from app.models.user import User, UserRole
 from app.models.config import Config
 from app.schemas.config import AllConfigs
@@ -123,6 +125,8 @@ async def setup_system(
             db.add(new_config)
     
     await db.commit()
+    await bump_namespace(CONFIG_NAMESPACE)
+    schedule_snapshot_section("config")
     await db.refresh(new_admin)
     
     return {
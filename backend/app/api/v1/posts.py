@@ -1,218 +1,336 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import select, func, and_, or_, tuple_, false, true, case, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload, undefer
+from typing import Dict, List, Optional, Set, Tuple, Union
 from datetime import datetime
 import asyncio
+import base64
+import re
 
-from app.core.database import get_db
-from app.core.redis_client import get_cache, set_cache, delete_cache_pattern, delete_cache
-from app.core.config_loader import get_email_config, get_site_basic_config
+from app.core.database import get_db, get_read_db
+from app.core.redis_client import (
+    delete_cache, bump_namespace, post_detail_cache_key, post_detail_cache_keys, RELATED_NAMESPACE,
+    POST_LIST_NAMESPACE,
+)
+from app.core.cache import cached_endpoint, dump_json, make_etag
 from app.api.dependencies import get_current_user, get_current_admin, get_optional_admin
-from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostListResponse
-from app.schemas.pagination import PaginatedResponse
+from app.schemas.post import (
+    PostCreate, PostUpdate, PostResponse, PostRenderedResponse, PostListResponse, PostBulkRequest, PostBulkResponse,
+    PostRevisionResponse, PostRevisionDetailResponse, PostRevisionDiffResponse, HotPostResponse,
+)
+from app.schemas.pagination import PaginatedResponse, CursorPaginatedResponse
 from app.models.post import Post, PostStatus
+from app.models.post_related import PostRelated
 from app.models.user import User
-from app.models.category import Category
-from app.models.tag import Tag
+from app.models.category import Category, post_categories
+from app.models.tag import Tag, post_tags
 from app.models.comment import Comment
-from app.services.email_service import email_service
-from app.core.security import create_unsubscribe_token
+from app.services.post_notification_service import queue_new_post_notifications
+from app.services.taxonomy_count_service import invalidate_post_counts
+from app.services.category_tree_service import category_subtree_ids
+from app.services.scheduled_publish_service import schedule_post, unschedule_posts, to_utc_naive
+from app.services.view_count_service import record_view
+from app.services.hot_posts_service import HOT_POSTS_SIZE, get_hot_posts_json, invalidate_hot_posts
+from app.services.search_service import build_tsquery, tsquery_expression, rank_expression, build_snippet, index_post
+from app.services.markdown_service import render_post
+from app.services.post_query_service import post_list_query
+from app.services.post_neighbor_service import load_post_neighbors, invalidate_post_neighbors
+from app.services.suggest_service import index_post_suggestions, remove_post_suggestions
+from app.services.feed_service import invalidate_post_feeds
+from app.services.related_service import refresh_related_posts, related_sources
+from app.services.snapshot_service import PostSnapshotChange, schedule_post_snapshot, schedule_posts_snapshot
+from app.services.revision_service import record_revision, list_revisions, get_revision, diff_revisions
+from app.services.post_import_service import detect_import_format, import_posts as run_post_import
 import json
 import math
 
 
-async def _send_new_post_notification_emails(
-    subscribers: List[tuple],
-    post_title: str,
-    post_excerpt: Optional[str],
-    post_url: str,
-    site_title: str,
-    site_url: str,
-    smtp_config: dict,
-) -> None:
-    """后台任务：向已订阅用户发送新文章发布通知，每封邮件带取消订阅链接。subscribers: [(email, user_id), ...]"""
-    for to_email, user_id in subscribers:
-        if to_email and user_id:
-            token = create_unsubscribe_token(user_id)
-            unsubscribe_url = f"{site_url.rstrip('/')}/unsubscribe?token={token}"
-            await email_service.send_new_post_notification(
-                to_email,
-                post_title,
-                post_excerpt,
-                post_url,
-                site_title,
-                smtp_config=smtp_config,
-                unsubscribe_url=unsubscribe_url,
+router = APIRouter()
+
+
+def _encode_cursor(post: Post, direction: str) -> str:
+    """将 (published_at, created_at, id) 编码为不透明游标"""
+    payload = {
+        "p": post.published_at.isoformat() if post.published_at else None,
+        "c": post.created_at.isoformat(),
+        "i": post.id,
+        "d": direction,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[datetime], datetime, int, str]:
+    """解析游标，返回 (published_at, created_at, id, direction)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        published_at = datetime.fromisoformat(payload["p"]) if payload["p"] else None
+        created_at = datetime.fromisoformat(payload["c"])
+        post_id = int(payload["i"])
+        direction = payload["d"]
+    except (ValueError, KeyError, TypeError):
+        direction = None
+    if direction not in ("next", "prev"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的分页游标"
+        )
+    return published_at, created_at, post_id, direction
+
+
+def _keyset_condition(published_at: Optional[datetime], created_at: datetime, post_id: int, direction: str):
+    """
+    列表排序为 published_at DESC NULLS FIRST, created_at DESC, id DESC（草稿 published_at 为空，排在最前）。
+    next 取游标之后的行，prev 取游标之前的行。
+    """
+    if direction == "next":
+        if published_at is None:
+            return or_(
+                Post.published_at.is_not(None),
+                tuple_(Post.created_at, Post.id) < tuple_(created_at, post_id),
             )
+        return and_(
+            Post.published_at.is_not(None),
+            tuple_(Post.published_at, Post.created_at, Post.id) < tuple_(published_at, created_at, post_id),
+        )
+    if published_at is None:
+        return and_(
+            Post.published_at.is_(None),
+            tuple_(Post.created_at, Post.id) > tuple_(created_at, post_id),
+        )
+    return or_(
+        Post.published_at.is_(None),
+        tuple_(Post.published_at, Post.created_at, Post.id) > tuple_(published_at, created_at, post_id),
+    )
 
-router = APIRouter()
 
+_LIST_ORDER = (Post.published_at.desc().nulls_first(), Post.created_at.desc(), Post.id.desc())
+_LIST_ORDER_REVERSED = (Post.published_at.asc().nulls_last(), Post.created_at.asc(), Post.id.asc())
 
-@router.get("/published", response_model=PaginatedResponse[PostListResponse])
-async def get_published_posts(
-    page: int = Query(1, ge=1),
-    size: int = Query(10, ge=1, le=100),
-    category_id: Optional[int] = None,
-    tag_id: Optional[int] = None,
-    search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+
+async def _category_filter_ids(db: AsyncSession, category_id: Optional[int], include_descendants: bool) -> Optional[List[int]]:
+    """include_descendants 时把分类过滤展开为整棵子树的分类 ID，否则返回 None（按单个分类过滤）"""
+    if not category_id or not include_descendants:
+        return None
+    return await category_subtree_ids(db, category_id)
+
+
+def _apply_list_filters(
+    query,
+    category_id: Optional[int],
+    tag_id: Optional[int],
+    search: Optional[str],
+    category_ids: Optional[List[int]] = None,
 ):
-    """获取已发布文章列表（不包含草稿）"""
-    cache_key = f"post:list:published:page:{page}:size:{size}:category:{category_id}:tag:{tag_id}:search:{search}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return json.loads(cached)
-
-    query = select(Post).options(
-        selectinload(Post.author),
-        selectinload(Post.categories),
-        selectinload(Post.tags)
-    ).where(Post.status == PostStatus.PUBLISHED)
-
-    if category_id:
+    """
+    应用分类 / 标签 / 全文检索过滤，返回 (query, rank)，rank 仅在检索时非空。
+    category_ids 非空时按子树过滤：对 post_categories 做一次 IN（文章属于子树中多个分类时不会重复）。
+    """
+    if category_ids is not None:
+        query = query.where(
+            Post.id.in_(select(post_categories.c.post_id).where(post_categories.c.category_id.in_(category_ids)))
+        )
+    elif category_id:
         query = query.join(Post.categories).where(Category.id == category_id)
     if tag_id:
         query = query.join(Post.tags).where(Tag.id == tag_id)
+    rank = None
     if search:
-        query = query.where(
-            (Post.title.ilike(f"%{search}%")) | (Post.content.ilike(f"%{search}%"))
-        )
+        tsquery = build_tsquery(search)
+        if tsquery is None:
+            query = query.where(false())
+        else:
+            query = query.where(Post.search_vector.op("@@")(tsquery_expression(tsquery)))
+            rank = rank_expression(tsquery)
+    return query, rank
 
-    count_query = select(func.count()).select_from(query.subquery())
-    total = await db.scalar(count_query) or 0
-
-    query = query.order_by(desc(Post.published_at), desc(Post.created_at)).offset((page - 1) * size).limit(size)
-    result = await db.execute(query)
-    posts = result.scalars().all()
-
-    # 从评论表实时统计评论数，避免与 posts.comment_count 缓存不一致
-    post_ids = [p.id for p in posts]
-    comment_counts = {}
-    if post_ids:
-        count_stmt = (
-            select(Comment.post_id, func.count(Comment.id).label("cnt"))
-            .where(Comment.post_id.in_(post_ids), Comment.is_deleted == False)
-            .group_by(Comment.post_id)
-        )
-        count_result = await db.execute(count_stmt)
-        comment_counts = {row.post_id: row.cnt for row in count_result.all()}
 
+def _serialize_post_list(posts: List[Post], search: Optional[str] = None) -> List[dict]:
+    # comment_count 由评论增删原子维护，直接使用 posts.comment_count
     posts_data = []
     for p in posts:
         item = PostListResponse.model_validate(p).model_dump()
-        item["comment_count"] = comment_counts.get(p.id, 0)
+        if search:
+            item["highlight"] = build_snippet(p.content, search)
         posts_data.append(item)
-    pages = math.ceil(total / size) if total > 0 else 1
+    return posts_data
 
-    response_data = {
-        "items": posts_data,
-        "total": total,
-        "page": page,
+
+async def _paginate_posts(
+    db: AsyncSession,
+    query,
+    page: int,
+    size: int,
+    cursor: Optional[str],
+    with_total: bool,
+    rank=None,
+    search: Optional[str] = None,
+) -> dict:
+    """
+    文章列表分页：
+    - cursor 为 None 时使用传统 page/size（OFFSET）分页，始终返回 total；
+    - cursor 不为 None 时使用 keyset 分页（空字符串表示第一页），仅在 with_total 时统计总数。
+    全文检索（rank 非空）时按相关度排序，只支持 page/size 分页。
+    """
+    if cursor is None:
+        count_query = select(func.count()).select_from(query.subquery())
+        total = await db.scalar(count_query) or 0
+
+        order = (rank.desc(), *_LIST_ORDER) if rank is not None else _LIST_ORDER
+        result = await db.execute(query.order_by(*order).offset((page - 1) * size).limit(size))
+        posts = result.scalars().all()
+        return {
+            "items": _serialize_post_list(posts, search),
+            "total": total,
+            "page": page,
+            "size": size,
+            "pages": math.ceil(total / size) if total > 0 else 1,
+        }
+
+    if rank is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="全文检索结果按相关度排序，不支持游标分页"
+        )
+
+    total = None
+    if with_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery())) or 0
+
+    direction = "next"
+    page_query = query
+    if cursor:
+        published_at, created_at, post_id, direction = _decode_cursor(cursor)
+        page_query = page_query.where(_keyset_condition(published_at, created_at, post_id, direction))
+
+    # 多取一行用于判断该方向上是否还有数据
+    order = _LIST_ORDER if direction == "next" else _LIST_ORDER_REVERSED
+    result = await db.execute(page_query.order_by(*order).limit(size + 1))
+    posts = list(result.scalars().all())
+    has_more = len(posts) > size
+    posts = posts[:size]
+    if direction == "prev":
+        posts.reverse()
+
+    next_cursor = prev_cursor = None
+    if posts:
+        if direction == "next":
+            next_cursor = _encode_cursor(posts[-1], "next") if has_more else None
+            prev_cursor = _encode_cursor(posts[0], "prev") if cursor else None
+        else:
+            next_cursor = _encode_cursor(posts[-1], "next")
+            prev_cursor = _encode_cursor(posts[0], "prev") if has_more else None
+
+    return {
+        "items": _serialize_post_list(posts),
         "size": size,
-        "pages": pages
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "total": total,
     }
 
-    await set_cache(cache_key, json.dumps(response_data, default=str), ttl=300)
 
-    return response_data
+@router.get(
+    "/published",
+    response_model=Union[PaginatedResponse[PostListResponse], CursorPaginatedResponse[PostListResponse]],
+)
+@cached_endpoint(
+    ttl=300,
+    namespace=POST_LIST_NAMESPACE,
+    stale_ttl=60,
+    cache_control="public, max-age=30, stale-while-revalidate=60",
+    key_fn=lambda page, size, category_id, include_descendants, tag_id, search, cursor, with_total, **_: (
+        f"published:page:{page}:size:{size}:category:{category_id}:descendants:{include_descendants}"
+        f":tag:{tag_id}:search:{search}:cursor:{cursor}:total:{with_total}"
+    ),
+)
+async def get_published_posts(
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+    category_id: Optional[int] = None,
+    include_descendants: bool = Query(False, description="按分类过滤时是否包含其全部子分类"),
+    tag_id: Optional[int] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传 next_cursor / prev_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否统计总数"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """获取已发布文章列表（不包含草稿）"""
+    # 只加载列表所需的列；检索时需要正文生成命中片段
+    query = post_list_query(with_content=bool(search)).where(Post.status == PostStatus.PUBLISHED)
+    category_ids = await _category_filter_ids(db, category_id, include_descendants)
+    query, rank = _apply_list_filters(query, category_id, tag_id, search, category_ids)
+    return await _paginate_posts(db, query, page, size, cursor, with_total, rank, search)
 
 
-@router.get("/", response_model=PaginatedResponse[PostListResponse])
+@router.get(
+    "/",
+    response_model=Union[PaginatedResponse[PostListResponse], CursorPaginatedResponse[PostListResponse]],
+)
+@cached_endpoint(
+    ttl=300,
+    namespace=POST_LIST_NAMESPACE,
+    stale_ttl=60,
+    # 管理员可见草稿，只允许浏览器私有缓存，且每次都需验证
+    cache_control="private, no-cache",
+    key_fn=lambda page, size, category_id, include_descendants, tag_id, search, status, cursor, with_total, current_admin, **_: (
+        f"page:{page}:size:{size}:category:{category_id}:descendants:{include_descendants}:tag:{tag_id}"
+        f":search:{search}:status:{status}:admin:{current_admin is not None}:cursor:{cursor}:total:{with_total}"
+    ),
+)
 async def get_posts(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
     category_id: Optional[int] = None,
+    include_descendants: bool = Query(False, description="按分类过滤时是否包含其全部子分类"),
     tag_id: Optional[int] = None,
     search: Optional[str] = None,
     status: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传 next_cursor / prev_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否统计总数"),
+    db: AsyncSession = Depends(get_read_db),
     current_admin: Optional[User] = Depends(get_optional_admin)
 ):
     """获取文章列表（管理员可以查看所有状态）"""
-    # 尝试从缓存获取
-    cache_key = f"post:list:page:{page}:size:{size}:category:{category_id}:tag:{tag_id}:search:{search}:status:{status}:admin:{current_admin is not None}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return json.loads(cached)
-    
     is_admin = current_admin is not None
     
-    # 构建查询
-    base_query = select(Post).options(
-        selectinload(Post.author),
-        selectinload(Post.categories),
-        selectinload(Post.tags)
-    )
+    # 构建查询（只加载列表所需的列；检索时需要正文生成命中片段）
+    base_query = post_list_query(with_content=bool(search))
     
     # 如果是管理员且没有指定status，则返回所有状态
     # 否则，按status过滤
     if is_admin and status is None:
         # 管理员且未指定status，返回所有状态
         query = base_query
-    elif status == "DRAFT":
-        # 只有管理员可以看到草稿
+    elif status in ("DRAFT", "SCHEDULED"):
+        # 只有管理员可以看到草稿与定时文章
         if not is_admin:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="需要管理员权限")
-        query = base_query.where(Post.status == PostStatus.DRAFT)
+            raise HTTPException(status_code=403, detail="需要管理员权限")
+        query = base_query.where(Post.status == status)
     elif status == "PUBLISHED":
         query = base_query.where(Post.status == PostStatus.PUBLISHED)
     else:
         # 默认只返回已发布的文章
         query = base_query.where(Post.status == PostStatus.PUBLISHED)
     
-    if category_id:
-        query = query.join(Post.categories).where(Category.id == category_id)
-    if tag_id:
-        query = query.join(Post.tags).where(Tag.id == tag_id)
-    if search:
-        query = query.where(
-            (Post.title.ilike(f"%{search}%")) | (Post.content.ilike(f"%{search}%"))
-        )
-    
-    # 计算总数（复制查询条件但不包含分页和排序）
-    count_query = select(func.count()).select_from(query.subquery())
-    total = await db.scalar(count_query) or 0
-    
-    # 分页查询
-    query = query.order_by(desc(Post.published_at), desc(Post.created_at)).offset((page - 1) * size).limit(size)
-    
-    result = await db.execute(query)
-    posts = result.scalars().all()
+    category_ids = await _category_filter_ids(db, category_id, include_descendants)
+    query, rank = _apply_list_filters(query, category_id, tag_id, search, category_ids)
+    return await _paginate_posts(db, query, page, size, cursor, with_total, rank, search)
 
-    # 从评论表实时统计评论数，避免与 posts.comment_count 缓存不一致
-    post_ids = [p.id for p in posts]
-    comment_counts = {}
-    if post_ids:
-        count_stmt = (
-            select(Comment.post_id, func.count(Comment.id).label("cnt"))
-            .where(Comment.post_id.in_(post_ids), Comment.is_deleted == False)
-            .group_by(Comment.post_id)
-        )
-        count_result = await db.execute(count_stmt)
-        comment_counts = {row.post_id: row.cnt for row in count_result.all()}
-    
-    # 构建分页响应
-    posts_data = []
-    for p in posts:
-        item = PostListResponse.model_validate(p).model_dump()
-        item["comment_count"] = comment_counts.get(p.id, 0)
-        posts_data.append(item)
-    pages = math.ceil(total / size) if total > 0 else 1
-    
-    response_data = {
-        "items": posts_data,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": pages
-    }
-    
-    # 缓存结果
-    await set_cache(cache_key, json.dumps(response_data, default=str), ttl=300)
-    
-    return response_data
+
+@router.get("/hot", response_model=List[HotPostResponse])
+async def get_hot_posts(limit: int = Query(10, ge=1, le=HOT_POSTS_SIZE)):
+    """热门文章（按近期阅读速度排序）；榜单由后台任务定期计算，此处只读取 Redis"""
+    body = await get_hot_posts_json(limit)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": make_etag(body), "Cache-Control": "public, max-age=60"},
+    )
 
 
 @router.get("/id/{post_id}", response_model=PostResponse)
@@ -245,25 +363,85 @@ async def get_post_by_id(
     return post_data
 
 
-@router.get("/{slug}", response_model=PostResponse)
-async def get_post(slug: str, db: AsyncSession = Depends(get_db)):
-    """获取文章详情"""
-    # 尝试从缓存获取
-    cache_key = f"post:detail:{slug}"
-    cached = await get_cache(cache_key)
-    if cached:
-        data = json.loads(cached)
-        # 评论数始终从评论表实时统计，不信任缓存中的 comment_count
-        post_id = data.get("id")
-        if post_id is not None:
-            comment_count = await db.scalar(
-                select(func.count(Comment.id))
-                .where(Comment.post_id == post_id, Comment.is_deleted == False)
-            ) or 0
-            data["comment_count"] = comment_count
-        return data
-    
-    result = await db.execute(
+async def _get_post_id_or_404(db: AsyncSession, post_id: int) -> int:
+    if await db.scalar(select(Post.id).where(Post.id == post_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="文章不存在"
+        )
+    return post_id
+
+
+@router.get("/id/{post_id}/revisions", response_model=PaginatedResponse[PostRevisionResponse])
+async def get_post_revisions(
+    post_id: int,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """文章修订历史（按版本倒序，仅管理员）"""
+    await _get_post_id_or_404(db, post_id)
+    rows, total = await list_revisions(db, post_id, page, size)
+    return {
+        "items": [PostRevisionResponse.model_validate(row).model_dump() for row in rows],
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": math.ceil(total / size) if total > 0 else 1,
+    }
+
+
+@router.get("/id/{post_id}/revisions/diff", response_model=PostRevisionDiffResponse)
+async def diff_post_revisions(
+    post_id: int,
+    from_version: int = Query(..., ge=1),
+    to_version: int = Query(..., ge=1),
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """两个版本之间的 unified diff（仅管理员）"""
+    await _get_post_id_or_404(db, post_id)
+    diff = await diff_revisions(db, post_id, from_version, to_version)
+    if diff is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="版本不存在"
+        )
+    return diff
+
+
+@router.get("/id/{post_id}/revisions/{version}", response_model=PostRevisionDetailResponse)
+async def get_post_revision(
+    post_id: int,
+    version: int,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """还原指定版本的标题与正文（仅管理员）"""
+    await _get_post_id_or_404(db, post_id)
+    revision = await get_revision(db, post_id, version)
+    if revision is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="版本不存在"
+        )
+    return revision
+
+
+# 详情 JSON 的第一个字段是 PostResponse.id，从缓存的字节中取出文章 ID，不必解析整篇文章
+_DETAIL_ID_RE = re.compile(rb'\{"id":(\d+)')
+
+
+# 每次访问都需回源验证（命中时返回 304），保证阅读量按访问计数
+@cached_endpoint(
+    ttl=300,
+    stale_ttl=60,
+    cache_control="public, no-cache",
+    key_fn=lambda slug, render, **_: post_detail_cache_key(slug, rendered=render),
+)
+async def _get_post_detail(slug: str, render: bool, db: AsyncSession):
+    query = (
         select(Post)
         .options(
             selectinload(Post.author),
@@ -272,6 +450,9 @@ async def get_post(slug: str, db: AsyncSession = Depends(get_db)):
         )
         .where(Post.slug == slug)
     )
+    if render:
+        query = query.options(undefer(Post.content_html), undefer(Post.content_toc))
+    result = await db.execute(query)
     post = result.scalar_one_or_none()
     
     if not post:
@@ -279,22 +460,72 @@ async def get_post(slug: str, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="文章不存在"
         )
+    # 评论增删、阅读量刷写时会清理详情缓存，缓存中的计数最多滞后一个刷写周期
+    # 上一篇 / 下一篇随详情缓存，相邻文章发布 / 撤回 / 删除时由 invalidate_post_neighbors 清理
+    response_model = PostRenderedResponse if render else PostResponse
+    return response_model.model_validate(post).model_dump() | await load_post_neighbors(db, post)
+
+
+@router.get("/{slug}", response_model=Union[PostRenderedResponse, PostResponse])
+async def get_post(
+    slug: str,
+    render: bool = Query(False, description="是否附带服务端渲染的 HTML 与目录（content_html / content_toc）"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """获取文章详情"""
+    response = await _get_post_detail(slug=slug, render=render, db=db)
     
-    # 增加阅读量
-    post.view_count += 1
-    await db.commit()
-    
-    # 从评论表实时统计评论数，与列表接口一致，避免 posts.comment_count 不同步
-    comment_count = await db.scalar(
-        select(func.count(Comment.id))
-        .where(Comment.post_id == post.id, Comment.is_deleted == False)
-    ) or 0
+    # 阅读量按文章 ID 写入 Redis 缓冲，由后台任务批量写回数据库
+    match = _DETAIL_ID_RE.match(response.body)
+    if match:
+        await record_view(int(match.group(1)))
     
-    post_data = PostResponse.model_validate(post).model_dump()
-    post_data["comment_count"] = comment_count
-    await set_cache(cache_key, json.dumps(post_data, default=str), ttl=300)
-    
-    return post_data
+    return response
+
+
+@cached_endpoint(
+    ttl=600,
+    namespace=RELATED_NAMESPACE,
+    stale_ttl=120,
+    cache_control="public, max-age=300",
+    key_fn=lambda slug, **_: slug,
+)
+async def _get_related_posts(slug: str, db: AsyncSession):
+    post_id = await db.scalar(select(Post.id).where(Post.slug == slug))
+    if post_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="文章不存在"
+        )
+    result = await db.execute(
+        post_list_query()
+        .join(PostRelated, PostRelated.related_post_id == Post.id)
+        .where(PostRelated.post_id == post_id, Post.status == PostStatus.PUBLISHED.value)
+        .order_by(PostRelated.rank)
+    )
+    return [PostListResponse.model_validate(p).model_dump() for p in result.scalars().all()]
+
+
+@router.get("/{slug}/related", response_model=List[PostListResponse])
+async def get_related_posts(slug: str, db: AsyncSession = Depends(get_read_db)):
+    """获取相关文章（按标签 / 分类重合度与正文相似度预先计算）"""
+    return await _get_related_posts(slug=slug, db=db)
+
+
+def _scheduled_time(value: Optional[datetime]) -> datetime:
+    """定时发布时间：必须晚于当前时间，统一为不带时区的 UTC"""
+    if value is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="定时发布需要指定发布时间"
+        )
+    value = to_utc_naive(value)
+    if value <= datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="定时发布时间必须晚于当前时间"
+        )
+    return value
 
 
 @router.post("/", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
@@ -336,6 +567,8 @@ async def create_post(
     else:
         tags = []
     
+    scheduled_at = _scheduled_time(post_data.published_at) if post_data.status == PostStatus.SCHEDULED.value else None
+    
     # 创建文章
     new_post = Post(
         title=post_data.title,
@@ -345,12 +578,17 @@ async def create_post(
         cover_image=post_data.cover_image,
         status=post_data.status,
         author_id=current_user.id,
-        published_at=datetime.utcnow() if post_data.status == PostStatus.PUBLISHED.value else None
+        published_at=datetime.utcnow() if post_data.status == PostStatus.PUBLISHED.value else scheduled_at
     )
     new_post.categories = categories
     new_post.tags = tags
+    await render_post(new_post)
     
     db.add(new_post)
+    await db.flush()
+    # 与文章写入同一事务建立全文检索索引与版本 1
+    await index_post(db, new_post.id, new_post.title, new_post.content)
+    await record_revision(db, new_post.id, new_post.title, new_post.content, current_user.id)
     await db.commit()
     await db.refresh(new_post)
     
@@ -367,36 +605,261 @@ async def create_post(
     post = result.scalar_one()
     
     # 清除相关缓存
-    await delete_cache_pattern("post:list:*")
+    await bump_namespace(POST_LIST_NAMESPACE)
+    neighbors: List[str] = []
+    if post.status == PostStatus.PUBLISHED.value:
+        await invalidate_post_feeds(post.id)
+        await invalidate_post_counts()
+        neighbors = await invalidate_post_neighbors(db, [(post.published_at, post.created_at, post.id)])
+        await index_post_suggestions([post])
+        asyncio.create_task(refresh_related_posts(post.id))
+    schedule_post_snapshot(post, neighbors=neighbors)
+    if post.status == PostStatus.SCHEDULED.value:
+        await schedule_post(post.id, post.published_at, notify=post_data.notify_subscribers is not False)
     
     # 发布且勾选通知订阅用户时，向已订阅的活跃用户发送新文章通知邮件（后台任务）
     notify = getattr(post_data, "notify_subscribers", True)
     if post.status == PostStatus.PUBLISHED.value and notify:
-        email_config = await get_email_config(db)
-        site_basic = await get_site_basic_config(db)
-        site_url = (site_basic.get("site_url") or "").strip().rstrip("/")
-        site_title = site_basic.get("site_title") or "博客"
-        post_url = f"{site_url}/posts/{post.slug}" if site_url else ""
-        if post_url:
+        await queue_new_post_notifications(db, [(post.title, post.excerpt, post.slug)])
+    
+    return post
+
+
+@router.post("/import")
+async def import_posts(
+    file: UploadFile = File(..., description="zip（Markdown 文件 + YAML front matter）或 NDJSON（每行一篇文章）"),
+    on_conflict: str = Query("skip", pattern="^(skip|update)$", description="slug 已存在时跳过或覆盖"),
+    default_status: str = Query(PostStatus.DRAFT.value, pattern="^(DRAFT|PUBLISHED)$", description="未指定状态的文章使用的状态"),
+    current_user: User = Depends(get_current_admin),
+):
+    """
+    批量导入文章（仅管理员）。以 NDJSON 流式返回进度：
+    每条失败 / 跳过的记录一行（type=error / skipped），每批结束一行 progress，最后一行 done。
+    """
+    try:
+        fmt = detect_import_format(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def generate():
+        async for event in run_post_import(
+            file.file, fmt, current_user.id, on_conflict=on_conflict, default_status=default_status
+        ):
+            yield dump_json(event) + b"\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+BULK_MAX_POSTS = 1000
+_BULK_ACTIONS = {
+    "publish", "unpublish", "delete",
+    "set_categories", "add_categories", "remove_categories",
+    "set_tags", "add_tags", "remove_tags",
+}
+
+
+async def _bulk_update_terms(
+    db: AsyncSession, action: str, post_ids: List[int], term_ids: List[int]
+) -> Set[int]:
+    """批量修改分类 / 标签关联，返回关联发生变化的文章 ID"""
+    mode, _, kind = action.partition("_")
+    model, table = (Category, post_categories) if kind == "categories" else (Tag, post_tags)
+    term_column = table.c.category_id if kind == "categories" else table.c.tag_id
+    changed: Set[int] = set()
+    if mode in ("set", "remove"):
+        condition = term_column.in_(term_ids) if mode == "remove" else term_column.not_in(term_ids)
+        result = await db.execute(
+            delete(table).where(table.c.post_id.in_(post_ids), condition).returning(table.c.post_id)
+        )
+        changed.update(result.scalars().all())
+    if mode in ("set", "add") and term_ids:
+        pairs = (
+            select(Post.id, model.id)
+            .join_from(Post, model, true())
+            .where(Post.id.in_(post_ids), model.id.in_(term_ids))
+        )
+        result = await db.execute(
+            pg_insert(table)
+            .from_select([table.c.post_id, term_column], pairs)
+            .on_conflict_do_nothing()
+            .returning(table.c.post_id)
+        )
+        changed.update(result.scalars().all())
+    return changed
+
+
+@router.post("/bulk", response_model=PostBulkResponse)
+async def bulk_update_posts(
+    data: PostBulkRequest,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    批量操作文章（仅管理员）。每种操作对全部文章执行集合式 SQL，在一个事务中提交；
+    提交后缓存、订阅源、相关文章与静态快照统一失效 / 更新一次，
+    publish 时为全部首次发布的文章排队一次订阅通知。
+    """
+    if data.action not in _BULK_ACTIONS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="不支持的批量操作")
+    requested = list(dict.fromkeys(data.post_ids))
+    if not requested:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请选择文章")
+    if len(requested) > BULK_MAX_POSTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一次最多操作 {BULK_MAX_POSTS} 篇文章"
+        )
+
+    term_ids: List[int] = []
+    if data.action.endswith("_categories") or data.action.endswith("_tags"):
+        model = Category if data.action.endswith("_categories") else Tag
+        term_ids = list(dict.fromkeys(data.category_ids if model is Category else data.tag_ids))
+        found = set((await db.execute(select(model.id).where(model.id.in_(term_ids)))).scalars().all())
+        unknown = [term_id for term_id in term_ids if term_id not in found]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{'分类' if model is Category else '标签'}不存在: {', '.join(map(str, unknown))}"
+            )
+
+    result = await db.execute(
+        select(
+            Post.id, Post.slug, Post.title, Post.excerpt, Post.status, Post.published_at, Post.created_at,
+            Post.view_count,
+        ).where(Post.id.in_(requested))
+    )
+    before = {row.id: row for row in result.all()}
+    post_ids = [post_id for post_id in requested if post_id in before]
+    missing_ids = [post_id for post_id in requested if post_id not in before]
+
+    changed: Set[int] = set()
+    published_at: Dict[int, Optional[datetime]] = {post_id: before[post_id].published_at for post_id in post_ids}
+    sources: List[int] = []
+    if post_ids:
+        now = datetime.utcnow()
+        if data.action == "publish":
             result = await db.execute(
-                select(User.email, User.id).where(
-                    User.is_active == True, User.is_subscribed == True
+                update(Post)
+                .where(Post.id.in_(post_ids), Post.status != PostStatus.PUBLISHED.value)
+                .values(
+                    status=PostStatus.PUBLISHED.value,
+                    # 定时文章改为立即发布
+                    published_at=case(
+                        (Post.status == PostStatus.SCHEDULED.value, now),
+                        else_=func.coalesce(Post.published_at, now),
+                    ),
                 )
+                .returning(Post.id, Post.published_at)
+                .execution_options(synchronize_session=False)
             )
-            subscribers = [(row[0], row[1]) for row in result.all()]
-            asyncio.create_task(
-                _send_new_post_notification_emails(
-                    subscribers,
-                    post.title,
-                    post.excerpt,
-                    post_url,
-                    site_title,
-                    site_url,
-                    email_config,
+            for post_id, new_published_at in result.all():
+                changed.add(post_id)
+                published_at[post_id] = new_published_at
+        elif data.action == "unpublish":
+            result = await db.execute(
+                update(Post)
+                .where(
+                    Post.id.in_(post_ids),
+                    Post.status.in_([PostStatus.PUBLISHED.value, PostStatus.SCHEDULED.value]),
+                )
+                # 撤回定时文章时计划时间作废
+                .values(
+                    status=PostStatus.DRAFT.value,
+                    published_at=case(
+                        (Post.status == PostStatus.SCHEDULED.value, None),
+                        else_=Post.published_at,
+                    ),
                 )
+                .returning(Post.id)
+                .execution_options(synchronize_session=False)
             )
-    
-    return post
+            changed.update(result.scalars().all())
+        elif data.action == "delete":
+            # post_related 中指向这些文章的记录会被级联删除，先记下需要重算的文章
+            sources = [source for source in await related_sources(db, *post_ids) if source not in before]
+            await db.execute(delete(post_tags).where(post_tags.c.post_id.in_(post_ids)))
+            await db.execute(delete(post_categories).where(post_categories.c.post_id.in_(post_ids)))
+            await db.execute(
+                delete(Comment).where(Comment.post_id.in_(post_ids)).execution_options(synchronize_session=False)
+            )
+            result = await db.execute(
+                delete(Post)
+                .where(Post.id.in_(post_ids))
+                .returning(Post.id)
+                .execution_options(synchronize_session=False)
+            )
+            changed.update(result.scalars().all())
+        else:
+            changed = await _bulk_update_terms(db, data.action, post_ids, term_ids)
+    await db.commit()
+
+    # 按请求顺序处理发生变化的文章
+    changed_ids = [post_id for post_id in post_ids if post_id in changed]
+    was_published = {post_id: before[post_id].status == PostStatus.PUBLISHED.value for post_id in changed_ids}
+    if data.action == "publish":
+        is_published = dict.fromkeys(changed_ids, True)
+    elif data.action in ("unpublish", "delete"):
+        is_published = dict.fromkeys(changed_ids, False)
+    else:
+        is_published = was_published
+    public_ids = [post_id for post_id in changed_ids if was_published[post_id] or is_published[post_id]]
+    if data.action in ("publish", "unpublish", "delete"):
+        await unschedule_posts(
+            *(post_id for post_id in changed_ids if before[post_id].status == PostStatus.SCHEDULED.value)
+        )
+
+    # 清除相关缓存（整批一次）
+    if changed_ids:
+        await bump_namespace(POST_LIST_NAMESPACE)
+        await delete_cache(*(key for post_id in changed_ids for key in post_detail_cache_keys(before[post_id].slug)))
+    if public_ids:
+        await invalidate_post_feeds(*public_ids)
+        await invalidate_post_counts()
+    if public_ids or sources:
+        asyncio.create_task(refresh_related_posts(*public_ids, sources=sources))
+    # 进入 / 离开已发布列表的文章：其两侧文章的上一篇 / 下一篇随之变化，输入联想索引随之增删
+    shifted_ids = [post_id for post_id in public_ids if was_published[post_id] != is_published[post_id]]
+    if data.action == "publish":
+        await index_post_suggestions(before[post_id] for post_id in shifted_ids)
+    elif shifted_ids:
+        await remove_post_suggestions(*shifted_ids)
+    await invalidate_hot_posts(*public_ids)
+    neighbors = await invalidate_post_neighbors(
+        db, [(published_at[post_id], before[post_id].created_at, post_id) for post_id in shifted_ids]
+    )
+    changes = [
+        PostSnapshotChange(
+            [before[post_id].slug],
+            (published_at[post_id], before[post_id].created_at, post_id),
+            shifted=was_published[post_id] != is_published[post_id],
+        )
+        for post_id in public_ids
+    ]
+    if changes and neighbors:
+        # 相邻文章的详情文件随第一项变化一并重新生成（导出时按 slug 去重）
+        changes[0].slugs.extend(neighbors)
+    schedule_posts_snapshot(changes)
+
+    # 首次发布的文章：查询一次订阅用户与配置，排队一个后台任务发送全部通知
+    newly_published = [
+        post_id for post_id in changed_ids
+        if before[post_id].published_at is None or before[post_id].status == PostStatus.SCHEDULED.value
+    ]
+    if data.action == "publish" and newly_published and data.notify_subscribers:
+        await queue_new_post_notifications(
+            db, [(before[post_id].title, before[post_id].excerpt, before[post_id].slug) for post_id in newly_published]
+        )
+
+    return PostBulkResponse(
+        action=data.action,
+        matched=len(post_ids),
+        affected=len(changed_ids),
+        missing_ids=missing_ids,
+    )
 
 
 @router.put("/{post_id}", response_model=PostResponse)
@@ -424,6 +887,12 @@ async def update_post(
             detail="文章不存在"
         )
     
+    old_slug = post.slug
+    old_sort_key = (post.published_at, post.created_at, post.id)
+    was_published = post.status == PostStatus.PUBLISHED.value
+    was_scheduled = post.status == PostStatus.SCHEDULED.value
+    previous = (post.title, post.content)
+    
     # 更新字段
     if post_data.title is not None:
         post.title = post_data.title
@@ -445,16 +914,29 @@ async def update_post(
         post.cover_image = post_data.cover_image
     newly_published = False
     if post_data.status is not None:
+        if post_data.status == PostStatus.SCHEDULED.value:
+            post.published_at = _scheduled_time(post_data.published_at or (post.published_at if was_scheduled else None))
+        elif was_scheduled:
+            # 取消定时：计划时间作废，立即发布时以当前时间为发布时间
+            post.published_at = None
         post.status = post_data.status
         if post_data.status == PostStatus.PUBLISHED.value and not post.published_at:
             post.published_at = datetime.utcnow()
             newly_published = True
+    elif was_scheduled and post_data.published_at is not None:
+        post.published_at = _scheduled_time(post_data.published_at)
     if post_data.category_ids is not None:
         result = await db.execute(select(Category).where(Category.id.in_(post_data.category_ids)))
         post.categories = result.scalars().all()
     if post_data.tag_ids is not None:
         result = await db.execute(select(Tag).where(Tag.id.in_(post_data.tag_ids)))
         post.tags = result.scalars().all()
+    if post_data.title is not None or post_data.content is not None:
+        await index_post(db, post.id, post.title, post.content)
+    if post_data.content is not None:
+        await render_post(post)
+    if post_data.title is not None or post_data.content is not None:
+        await record_revision(db, post.id, post.title, post.content, current_user.id, previous=previous)
     
     await db.commit()
     
@@ -471,35 +953,44 @@ async def update_post(
     updated_post = result.scalar_one()
     
     # 清除相关缓存
-    await delete_cache_pattern("post:list:*")
-    await delete_cache(f"post:detail:{updated_post.slug}")
+    await bump_namespace(POST_LIST_NAMESPACE)
+    detail_keys = post_detail_cache_keys(updated_post.slug)
+    if old_slug != updated_post.slug:
+        detail_keys += post_detail_cache_keys(old_slug)
+    await delete_cache(*detail_keys)
+    is_published = updated_post.status == PostStatus.PUBLISHED.value
+    if was_published or is_published:
+        await invalidate_post_feeds(updated_post.id)
+        asyncio.create_task(refresh_related_posts(updated_post.id))
+    if was_published != is_published or (
+        is_published and (post_data.category_ids is not None or post_data.tag_ids is not None)
+    ):
+        await invalidate_post_counts()
+    # 相邻文章的上一篇 / 下一篇链接包含本文标题与 slug
+    neighbors: List[str] = []
+    if was_published != is_published or (
+        is_published and (updated_post.title != previous[0] or updated_post.slug != old_slug)
+    ):
+        sort_keys = [old_sort_key] if was_published else []
+        if is_published:
+            sort_keys.append((updated_post.published_at, updated_post.created_at, updated_post.id))
+        neighbors = await invalidate_post_neighbors(db, sort_keys)
+    if is_published:
+        await index_post_suggestions([updated_post])
+    elif was_published:
+        await remove_post_suggestions(updated_post.id)
+    if was_published:
+        await invalidate_hot_posts(updated_post.id)
+    schedule_post_snapshot(updated_post, old_slug=old_slug, was_published=was_published, neighbors=neighbors)
+    if updated_post.status == PostStatus.SCHEDULED.value:
+        await schedule_post(updated_post.id, updated_post.published_at, notify=post_data.notify_subscribers)
+    elif was_scheduled:
+        await unschedule_posts(updated_post.id)
     
     # 若刚从草稿变为已发布且勾选通知订阅用户，向已订阅的活跃用户发送新文章通知邮件（后台任务）
     notify = getattr(post_data, "notify_subscribers", True)
     if newly_published and notify:
-        email_config = await get_email_config(db)
-        site_basic = await get_site_basic_config(db)
-        site_url = (site_basic.get("site_url") or "").strip().rstrip("/")
-        site_title = site_basic.get("site_title") or "博客"
-        post_url = f"{site_url}/posts/{updated_post.slug}" if site_url else ""
-        if post_url:
-            result = await db.execute(
-                select(User.email, User.id).where(
-                    User.is_active == True, User.is_subscribed == True
-                )
-            )
-            subscribers = [(row[0], row[1]) for row in result.all()]
-            asyncio.create_task(
-                _send_new_post_notification_emails(
-                    subscribers,
-                    updated_post.title,
-                    updated_post.excerpt,
-                    post_url,
-                    site_title,
-                    site_url,
-                    email_config,
-                )
-            )
+        await queue_new_post_notifications(db, [(updated_post.title, updated_post.excerpt, updated_post.slug)])
     
     return updated_post
 
@@ -520,9 +1011,25 @@ async def delete_post(
             detail="文章不存在"
         )
     
+    # post_related 中指向该文章的记录会被级联删除，先记下需要重算的文章
+    sources = await related_sources(db, post.id)
     await db.delete(post)
     await db.commit()
     
     # 清除相关缓存
-    await delete_cache_pattern("post:list:*")
-    await delete_cache(f"post:detail:{post.slug}")
+    await bump_namespace(POST_LIST_NAMESPACE)
+    await delete_cache(*post_detail_cache_keys(post.slug))
+    neighbors: List[str] = []
+    if post.status == PostStatus.PUBLISHED.value:
+        await invalidate_post_feeds(post.id)
+        await invalidate_post_counts()
+        neighbors = await invalidate_post_neighbors(db, [(post.published_at, post.created_at, post.id)])
+        await remove_post_suggestions(post.id)
+        await invalidate_hot_posts(post.id)
+    if post.status == PostStatus.PUBLISHED.value or sources:
+        asyncio.create_task(refresh_related_posts(post.id, sources=sources))
+    schedule_post_snapshot(
+        post, was_published=post.status == PostStatus.PUBLISHED.value, deleted=True, neighbors=neighbors
+    )
+    if post.status == PostStatus.SCHEDULED.value:
+        await unschedule_posts(post.id)
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Query, Response
+from typing import List
+
+from app.core.cache import dump_json
+from app.schemas.search import SuggestionItem
+from app.services.suggest_service import suggest
+
+router = APIRouter()
+
+
+@router.get("/suggest", response_model=List[SuggestionItem])
+async def search_suggest(
+    q: str = Query(..., min_length=1, max_length=100, description="已输入的内容（前缀匹配）"),
+    limit: int = Query(8, ge=1, le=20),
+):
+    """搜索框输入联想：前缀匹配已发布文章标题与标签名（只读 Redis 索引）"""
+    body = dump_json(await suggest(q, limit))
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": "public, max-age=60"})
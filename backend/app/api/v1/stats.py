@@ -2,24 +2,28 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
-from app.core.database import get_db
+from app.core.database import get_read_db
+from app.core.db_instrumentation import db_metrics_snapshot
+from app.api.dependencies import get_current_admin
+from app.models.user import User
 from app.models.post import Post
 from app.models.comment import Comment
+from app.services.view_count_service import get_total_pending_views
 
 router = APIRouter()
 
 
-def _compute_stats(db_result_views, db_result_comments, db_result_posts):
-    """共用统计逻辑"""
+def _compute_stats(db_result_views, db_result_comments, db_result_posts, pending_views: int = 0):
+    """共用统计逻辑；阅读量 = 数据库已落盘值 + Redis 中尚未刷写的增量"""
     return {
-        "total_views": int(db_result_views or 0),
+        "total_views": int(db_result_views or 0) + pending_views,
         "total_comments": int(db_result_comments or 0),
         "total_posts": int(db_result_posts or 0),
     }
 
 
 @router.get("/")
-async def get_statistics(db: AsyncSession = Depends(get_db)):
+async def get_statistics(db: AsyncSession = Depends(get_read_db)):
     """获取全站统计信息（前端仪表盘用）"""
     total_views = await db.scalar(
         select(func.sum(Post.view_count)).where(Post.status == "PUBLISHED")
@@ -30,11 +34,12 @@ async def get_statistics(db: AsyncSession = Depends(get_db)):
     total_posts = await db.scalar(
         select(func.count(Post.id)).where(Post.status == "PUBLISHED")
     )
-    return _compute_stats(total_views, total_comments, total_posts)
+    pending_views = await get_total_pending_views()
+    return _compute_stats(total_views, total_comments, total_posts, pending_views)
 
 
 @router.get("/overview")
-async def get_statistics_overview(db: AsyncSession = Depends(get_db)):
+async def get_statistics_overview(db: AsyncSession = Depends(get_read_db)):
     """获取全站统计信息（overview 别名，与 / 返回一致）"""
     total_views = await db.scalar(
         select(func.sum(Post.view_count)).where(Post.status == "PUBLISHED")
@@ -45,4 +50,11 @@ async def get_statistics_overview(db: AsyncSession = Depends(get_db)):
     total_posts = await db.scalar(
         select(func.count(Post.id)).where(Post.status == "PUBLISHED")
     )
-    return _compute_stats(total_views, total_comments, total_posts)
+    pending_views = await get_total_pending_views()
+    return _compute_stats(total_views, total_comments, total_posts, pending_views)
+
+
+@router.get("/db")
+async def get_db_metrics(current_user: User = Depends(get_current_admin)):
+    """数据库查询指标（仅管理员）：当前 worker 自启动以来按路由累计的查询次数 / 耗时、N+1 次数与慢查询"""
+    return db_metrics_snapshot()
@@ -2,42 +2,42 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import List, Optional
-import json
-import re
 import math
 
-from app.core.database import get_db
-from app.core.redis_client import get_cache, set_cache, delete_cache_pattern
+from app.core.database import get_db, get_read_db
+from app.core.redis_client import (
+    bump_namespace,
+    TAG_LIST_NAMESPACE, POST_LIST_NAMESPACE,
+)
+from app.core.cache import cached_endpoint
+from app.core.slug import slugify
+from app.services.snapshot_service import schedule_snapshot_section
+from app.services.taxonomy_count_service import tag_post_counts, cloud_weights, refresh_term_posts, tag_post_changes
+from app.services.suggest_service import index_tag_suggestions, remove_tag_suggestions
 from app.api.dependencies import get_current_admin
-from app.schemas.tag import TagCreate, TagResponse
+from app.schemas.tag import TagCreate, TagResponse, TagCloudItem
 from app.schemas.pagination import PaginatedResponse
-from app.models.tag import Tag
+from app.models.tag import Tag, post_tags
+from app.models.post import Post, PostStatus
 from app.models.user import User
 
 router = APIRouter()
 
 
-def slugify(text: str) -> str:
-    """将文本转换为 slug"""
-    text = text.lower().strip()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[-\s]+', '-', text)
-    return text
-
-
 @router.get("/", response_model=PaginatedResponse[TagResponse])
+@cached_endpoint(
+    ttl=600,
+    namespace=TAG_LIST_NAMESPACE,
+    stale_ttl=120,
+    cache_control="public, max-age=60",
+    key_fn=lambda page, size, **_: f"page:{page}:size:{size}",
+)
 async def get_tags(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取标签列表（分页）"""
-    # 尝试从缓存获取
-    cache_key = f"tag:list:page:{page}:size:{size}"
-    cached = await get_cache(cache_key)
-    if cached:
-        return json.loads(cached)
-    
     # 构建查询
     query = select(Tag).order_by(Tag.name)
     
@@ -50,8 +50,13 @@ async def get_tags(
     result = await db.execute(query)
     tags = result.scalars().all()
     
+    # 当前页标签的已发布文章数（一次聚合查询）
+    counts = await tag_post_counts(db, [t.id for t in tags])
+    
     # 构建分页响应
-    tags_data = [TagResponse.model_validate(t).model_dump() for t in tags]
+    tags_data = [
+        TagResponse.model_validate(t).model_dump() | {"post_count": counts.get(t.id, 0)} for t in tags
+    ]
     pages = math.ceil(total / size) if total > 0 else 1
     
     response_data = {
@@ -61,13 +66,40 @@ async def get_tags(
         "size": size,
         "pages": pages
     }
-    
-    # 缓存结果
-    await set_cache(cache_key, json.dumps(response_data, default=str), ttl=600)
-    
     return response_data
 
 
+@router.get("/cloud", response_model=List[TagCloudItem])
+@cached_endpoint(
+    ttl=600,
+    namespace=TAG_LIST_NAMESPACE,
+    stale_ttl=120,
+    cache_control="public, max-age=60",
+    key_fn=lambda limit, **_: f"cloud:{limit}",
+)
+async def get_tag_cloud(
+    limit: int = Query(50, ge=1, le=500, description="按文章数取前若干个标签"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """标签云：已发布文章数最多的标签，按名称排序，weight 为按文章数对数分级的权重"""
+    post_count = func.count().label("post_count")
+    result = await db.execute(
+        select(Tag.id, Tag.name, Tag.slug, post_count)
+        .join(post_tags, post_tags.c.tag_id == Tag.id)
+        .join(Post, Post.id == post_tags.c.post_id)
+        .where(Post.status == PostStatus.PUBLISHED.value)
+        .group_by(Tag.id)
+        .order_by(post_count.desc(), Tag.name)
+        .limit(limit)
+    )
+    rows = sorted(result.all(), key=lambda row: row.name)
+    weights = cloud_weights([row.post_count for row in rows])
+    return [
+        {"id": row.id, "name": row.name, "slug": row.slug, "post_count": row.post_count, "weight": weight}
+        for row, weight in zip(rows, weights)
+    ]
+
+
 @router.post("/", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
 async def create_tag(
     tag_data: TagCreate,
@@ -93,8 +125,9 @@ async def create_tag(
     await db.refresh(new_tag)
     
     # 清除缓存（必须在返回前完成）
-    await delete_cache_pattern("tag:list*")
-    await delete_cache_pattern("post:list:*")
+    await bump_namespace(TAG_LIST_NAMESPACE, POST_LIST_NAMESPACE)
+    schedule_snapshot_section("tags")
+    await index_tag_suggestions(db, [new_tag])
     
     return new_tag
 
@@ -115,9 +148,13 @@ async def delete_tag(
             detail="标签不存在"
         )
     
+    # 关联行随标签级联删除，先记下其下的已发布文章
+    post_changes = await tag_post_changes(db, tag_id)
     await db.delete(tag)
     await db.commit()
     
     # 清除缓存（必须在返回前完成）
-    await delete_cache_pattern("tag:list*")
-    await delete_cache_pattern("post:list:*")
+    await bump_namespace(TAG_LIST_NAMESPACE, POST_LIST_NAMESPACE)
+    schedule_snapshot_section("tags")
+    await refresh_term_posts(post_changes)
+    await remove_tag_suggestions(tag_id)
@@ -0,0 +1,99 @@
+"""
+后端命令行工具（在 backend 目录下执行，使用 .env / 环境变量中的配置）：
+
+    python -m app.cli snapshot [--target local|oss] [--dir PATH] [--no-prune]
+    python -m app.cli import FILE [--on-conflict skip|update] [--status DRAFT|PUBLISHED] [--author USERNAME]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from sqlalchemy import select
+
+from app.core.cache import dump_json
+from app.core.database import AsyncSessionLocal, engine
+from app.models.user import User, UserRole
+from app.services.post_import_service import detect_import_format, import_posts
+from app.services.snapshot_service import SnapshotError, export_snapshot
+
+
+async def _snapshot(args: argparse.Namespace) -> int:
+    target = args.target or ("local" if args.dir else None)
+    try:
+        summary = await export_snapshot(target=target, directory=args.dir, prune=not args.no_prune)
+    except SnapshotError as e:
+        print(f"导出失败: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0
+
+
+async def _import(args: argparse.Namespace) -> int:
+    try:
+        fmt = detect_import_format(args.file)
+    except ValueError as e:
+        print(f"导入失败: {e}", file=sys.stderr)
+        return 1
+    async with AsyncSessionLocal() as db:
+        query = select(User.id)
+        if args.author:
+            query = query.where(User.username == args.author)
+        else:
+            # 默认使用第一个管理员作为作者
+            query = query.where(User.role == UserRole.ADMIN).order_by(User.id).limit(1)
+        author_id = await db.scalar(query)
+    if author_id is None:
+        print("导入失败: 找不到作者用户", file=sys.stderr)
+        return 1
+
+    # 失败 / 跳过的记录按 NDJSON 输出到标准输出，进度输出到标准错误
+    done = {}
+    with open(args.file, "rb") as f:
+        async for event in import_posts(f, fmt, author_id, on_conflict=args.on_conflict, default_status=args.status):
+            if event["type"] in ("progress", "done"):
+                print(
+                    f"[{event['type']}] 已处理 {event['processed']}，新增 {event['imported']}，更新 {event['updated']}，"
+                    f"跳过 {event['skipped']}，失败 {event['failed']}",
+                    file=sys.stderr,
+                )
+                done = event
+            else:
+                sys.stdout.write(dump_json(event).decode() + "\n")
+    return 1 if done.get("failed") else 0
+
+
+async def _run(args: argparse.Namespace) -> int:
+    # 命令行输出不需要 SQL 回显
+    engine.echo = False
+    try:
+        return await args.handler(args)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="博客后端命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    snapshot = subparsers.add_parser("snapshot", help="导出公开接口的静态 JSON 快照")
+    snapshot.add_argument("--target", choices=["local", "oss"], help="导出目标，默认使用 SNAPSHOT_TARGET（指定 --dir 时为 local）")
+    snapshot.add_argument("--dir", help="本地导出目录，默认 SNAPSHOT_DIR")
+    snapshot.add_argument("--no-prune", action="store_true", help="不清理旧版本中不再引用的文件")
+    snapshot.set_defaults(handler=_snapshot)
+
+    importer = subparsers.add_parser("import", help="批量导入文章（zip：Markdown + front matter；NDJSON：每行一篇）")
+    importer.add_argument("file", help=".zip 或 .ndjson / .jsonl 文件")
+    importer.add_argument("--on-conflict", choices=["skip", "update"], default="skip", help="slug 已存在时跳过或覆盖")
+    importer.add_argument("--status", choices=["DRAFT", "PUBLISHED"], default="DRAFT", help="未指定状态的文章使用的状态")
+    importer.add_argument("--author", help="作者用户名，默认第一个管理员")
+    importer.set_defaults(handler=_import)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+接口响应缓存。
+
+@cached_endpoint 缓存接口最终序列化后的 JSON 字节（orjson），命中时直接返回原始 Response，
+跳过 FastAPI 按 response_model 的再次校验与序列化。
+缓存内容同时带有 ETag（响应体哈希）与 Last-Modified（生成时间），
+由 ConditionalRequestMiddleware 处理 If-None-Match / If-Modified-Since 并返回 304。
+"""
+import functools
+import hashlib
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+
+from app.core.redis_client import get_or_load_cache
+
+
+def _default(obj: Any) -> Any:
+    # orjson 原生支持 datetime / date / UUID / Enum，其余类型（如 Decimal）转为字符串
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return str(obj)
+
+
+def dump_json(data: Any) -> bytes:
+    """将接口返回值序列化为 JSON 字节"""
+    if isinstance(data, BaseModel):
+        return data.model_dump_json().encode()
+    return orjson.dumps(data, default=_default)
+
+
+def make_etag(body: bytes) -> str:
+    """基于响应体内容的强 ETag"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _pack(body: bytes) -> bytes:
+    # 缓存格式：ETag \n 生成时间戳 \n 响应体
+    return make_etag(body).encode() + b"\n" + str(int(time.time())).encode() + b"\n" + body
+
+
+def _unpack(data: bytes) -> Tuple[str, int, bytes]:
+    if not data.startswith(b'"'):
+        # 升级前写入的缓存只有响应体
+        return make_etag(data), int(time.time()), data
+    etag, generated_at, body = data.split(b"\n", 2)
+    return etag.decode(), int(generated_at), body
+
+
+async def cached_response(
+    key: str,
+    loader: Callable[[], Awaitable[bytes]],
+    *,
+    media_type: str = "application/json",
+    ttl: int = 300,
+    namespace: Optional[str] = None,
+    stale_ttl: int = 0,
+    cache_control: Optional[str] = None,
+) -> Response:
+    """
+    返回带 ETag / Last-Modified 的缓存响应；loader 返回响应体字节，仅在缓存未命中时调用。
+    ttl / namespace / stale_ttl 的含义同 get_or_load_cache。
+    """
+    async def load() -> bytes:
+        return _pack(await loader())
+
+    cached = await get_or_load_cache(key, load, ttl=ttl, namespace=namespace, stale_ttl=stale_ttl, raw=True)
+    etag, generated_at, body = _unpack(cached)
+    headers = {"ETag": etag, "Last-Modified": formatdate(generated_at, usegmt=True)}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def cached_endpoint(
+    *,
+    ttl: int = 300,
+    key_fn: Callable[..., str],
+    namespace: Optional[str] = None,
+    stale_ttl: int = 0,
+    cache_control: Optional[str] = None,
+):
+    """
+    缓存异步接口（或被接口调用的加载函数）的返回结果。
+
+    被装饰函数需以关键字参数调用（FastAPI 即如此），key_fn 接收同样的关键字参数并返回缓存 key。
+    未命中时执行函数并序列化一次，命中时直接返回缓存中的字节。
+    ttl / namespace / stale_ttl 的含义同 get_or_load_cache；cache_control 为响应的 Cache-Control 头。
+    返回值中的数据须已按 response_model 整理好（如 XxxResponse.model_validate(obj).model_dump()）。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async def load() -> bytes:
+                return dump_json(await func(*args, **kwargs))
+
+            return await cached_response(
+                key_fn(**kwargs),
+                load,
+                ttl=ttl,
+                namespace=namespace,
+                stale_ttl=stale_ttl,
+                cache_control=cache_control,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # 弱比较：忽略 W/ 前缀
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def is_not_modified(request_headers: Headers, response_headers: Headers) -> bool:
+    """按 RFC 9110 判断条件请求是否可返回 304：有 If-None-Match 时只比较 ETag"""
+    if_none_match = request_headers.get("if-none-match")
+    etag = response_headers.get("etag")
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    last_modified = response_headers.get("last-modified")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+# 304 响应不携带响应体相关的头
+_BODY_HEADERS = {b"content-length", b"content-type", b"content-encoding"}
+
+
+class ConditionalRequestMiddleware:
+    """
+    条件请求中间件（纯 ASGI）：GET/HEAD 请求携带 If-None-Match / If-Modified-Since 且 200 响应的
+    ETag / Last-Modified 匹配时，改写为不带响应体的 304。
+    缓存命中时响应体来自缓存，因此整个过程不访问数据库。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        if "if-none-match" not in request_headers and "if-modified-since" not in request_headers:
+            await self.app(scope, receive, send)
+            return
+
+        not_modified = False
+
+        async def send_wrapper(message):
+            nonlocal not_modified
+            if message["type"] == "http.response.start":
+                if message["status"] == 200 and is_not_modified(request_headers, Headers(raw=message["headers"])):
+                    not_modified = True
+                    headers = [(k, v) for k, v in message["headers"] if k.lower() not in _BODY_HEADERS]
+                    await send({"type": "http.response.start", "status": 304, "headers": headers})
+                    return
+            elif message["type"] == "http.response.body" and not_modified:
+                if not message.get("more_body", False):
+                    await send({"type": "http.response.body", "body": b""})
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -35,14 +35,59 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     
+    # 只读副本（逗号分隔的连接串，为空时全部读写走主库）：公开的只读 GET 接口轮询使用复制延迟不超过
+    # DB_REPLICA_MAX_LAG_SECONDS 的副本（每 DB_REPLICA_CHECK_SECONDS 秒检查一次），否则回退主库；
+    # 同一客户端写请求后 DB_READ_AFTER_WRITE_SECONDS 秒内的读请求走主库（Cookie）
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_CHECK_SECONDS: int = 2
+    DB_READ_AFTER_WRITE_SECONDS: int = 10
+    
+    # SQL 日志与查询统计（见 app/core/db_instrumentation.py）：
+    # DB_ECHO 逐条打印 SQL（仅本地排查用）；DB_DEBUG_HEADERS 在响应头中返回本次请求的查询次数 / 耗时；
+    # 超过 DB_SLOW_QUERY_MS 毫秒的语句按 DB_SLOW_QUERY_SAMPLE_RATE 抽样记录慢查询日志；
+    # 同一语句在一个请求内执行超过 DB_N_PLUS_ONE_THRESHOLD 次时告警（疑似 N+1）
+    DB_ECHO: bool = False
+    DB_DEBUG_HEADERS: bool = False
+    DB_SLOW_QUERY_MS: int = 200
+    DB_SLOW_QUERY_SAMPLE_RATE: float = 1.0
+    DB_N_PLUS_ONE_THRESHOLD: int = 10
+    
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # 进程内本地缓存（位于 Redis 缓存之前）：容量上限（字节）与单条存活秒数
+    LOCAL_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    LOCAL_CACHE_TTL_SECONDS: float = 5.0
+    
     # JWT
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # 阅读量写后计数：Redis 缓冲的增量每隔多少秒写回数据库
+    VIEW_COUNT_FLUSH_INTERVAL_SECONDS: int = 10
+    
+    # 相关文章：每天几点（UTC）全量重算一次
+    RELATED_POSTS_REBUILD_HOUR: int = 3
+    
+    # 热门文章：按小时分桶记录阅读，统计最近 HOT_POSTS_WINDOW_DAYS 天，权重每 HOT_POSTS_HALF_LIFE_HOURS 小时减半
+    HOT_POSTS_WINDOW_DAYS: int = 7
+    HOT_POSTS_HALF_LIFE_HOURS: int = 24
+    # 热门榜每隔多少秒重新计算一次
+    HOT_POSTS_REFRESH_SECONDS: int = 300
+    
+    # 静态 JSON 快照（公开接口数据，供 CDN 直接提供）：
+    # SNAPSHOT_TARGET 为空时不自动导出；local 写入 SNAPSHOT_DIR（为空时为 app/snapshots），oss 写入 S3_BUCKET_NAME 的 SNAPSHOT_OSS_PREFIX 下
+    SNAPSHOT_TARGET: str = ""
+    SNAPSHOT_DIR: str = ""
+    SNAPSHOT_OSS_PREFIX: str = "snapshots"
+    # 保留最近几个版本中被替换的文件（持有旧 manifest 的客户端仍可读取）
+    SNAPSHOT_KEEP_VERSIONS: int = 5
+    
+    # 站点地址（如 https://blog.example.com）：后台站点配置 site_url 为空时用于订阅源与站点地图中的链接
+    SITE_URL: str = ""
+    
     # CORS - 定义为字符串，避免 pydantic-settings 自动 JSON 解析
     CORS_ORIGINS: str = "http://localhost:3000"
     
@@ -63,6 +108,12 @@ class Settings(BaseSettings):
         origins = [origin.strip() for origin in self.CORS_ORIGINS.split(',') if origin.strip()]
         return origins if origins else ["http://localhost:3000"]
     
+    @computed_field
+    @property
+    def database_replica_urls_list(self) -> List[str]:
+        """将 DATABASE_REPLICA_URLS 按逗号解析为列表"""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    
     # S3
     AWS_ACCESS_KEY_ID: str = ""
     AWS_SECRET_ACCESS_KEY: str = ""
@@ -1,13 +1,25 @@
+import asyncio
+import itertools
+import logging
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
+from app.core.db_instrumentation import instrument_engine
+from app.core.redis_client import invalidation_event, invalidation_seq
+
+logger = logging.getLogger(__name__)
 
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
     future=True
 )
+instrument_engine(engine)
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -24,3 +36,158 @@ async def get_db() -> AsyncSession:
             yield session
         finally:
             await session.close()
+
+
+# 只读副本（DATABASE_REPLICA_URLS）：只用于公开的只读 GET 接口（get_read_db），写操作与后台任务始终使用主库
+replica_engines = [
+    create_async_engine(url, echo=settings.DB_ECHO, future=True, pool_pre_ping=True)
+    for url in settings.database_replica_urls_list
+]
+for _replica in replica_engines:
+    instrument_engine(_replica)
+_replica_sessions = [
+    async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False) for replica in replica_engines
+]
+# 各副本最近一次检查到的复制延迟（秒），None 表示不可用或尚未检查
+replica_lag: List[Optional[float]] = [None] * len(replica_engines)
+# 各副本已回放到的缓存失效广播序号（见 redis_client.invalidation_seq）：
+# 收到广播后读取主库当前 WAL 位置，副本回放超过该位置时即已包含广播前的全部写入
+_replica_synced_seq: List[int] = [-1] * len(replica_engines)
+_round_robin = itertools.count()
+
+# 写请求后由 ReadAfterWriteMiddleware 设置，存在期间该客户端的读请求走主库
+READ_PRIMARY_COOKIE = "db_read_primary"
+_REPLICA_CHECK_TIMEOUT_SECONDS = 2
+# 广播触发的两次检查之间的最小间隔，写入密集时合并检查
+_REPLICA_RECHECK_MIN_SECONDS = 0.05
+# 已回放到收到的全部 WAL 时延迟为 0（空闲的主库没有新事务，回放时间戳不再前进）
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END AS lag, "
+    "pg_last_wal_replay_lsn()::text AS replay_lsn"
+)
+_PRIMARY_LSN_SQL = text("SELECT pg_current_wal_lsn()::text")
+
+
+def _parse_lsn(lsn: Optional[str]) -> Optional[int]:
+    """PostgreSQL LSN（形如 16/B374D848）转为整数以便比较"""
+    if not lsn:
+        return None
+    high, _, low = lsn.partition("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def read_session_factory() -> async_sessionmaker:
+    """
+    只读请求使用的会话工厂：在延迟不超过 DB_REPLICA_MAX_LAG_SECONDS、
+    且已回放到最近一次缓存失效广播之前全部写入的副本间轮询，没有这样的副本时使用主库，
+    避免缓存失效后从尚未追上的副本读到旧数据并重新写入缓存。
+    收到广播后副本检查任务会立即比较 WAL 位置，通常只有几毫秒读主库。
+    """
+    seq = invalidation_seq()
+    if seq is None:
+        return AsyncSessionLocal
+    max_lag = settings.DB_REPLICA_MAX_LAG_SECONDS
+    healthy = [
+        i for i, lag in enumerate(replica_lag)
+        if lag is not None and lag <= max_lag and _replica_synced_seq[i] >= seq
+    ]
+    if not healthy:
+        return AsyncSessionLocal
+    return _replica_sessions[healthy[next(_round_robin) % len(healthy)]]
+
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """公开只读接口的会话：可用时来自只读副本，本客户端刚写入过数据时为主库"""
+    factory = AsyncSessionLocal if request.cookies.get(READ_PRIMARY_COOKIE) else read_session_factory()
+    async with factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def _primary_lsn() -> Optional[int]:
+    try:
+        async with engine.connect() as conn:
+            return _parse_lsn(await asyncio.wait_for(conn.scalar(_PRIMARY_LSN_SQL), _REPLICA_CHECK_TIMEOUT_SECONDS))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning("读取主库 WAL 位置失败: %s", e)
+        return None
+
+
+async def check_replica_lag() -> None:
+    """检查各副本的复制延迟与回放位置，连接失败的副本标记为不可用"""
+    # 先取广播序号再读主库 WAL 位置：序号内的写入均已在主库提交，其 WAL 位置不超过读到的位置
+    seq = invalidation_seq()
+    primary_lsn = None
+    if seq is not None and any(synced < seq for synced in _replica_synced_seq):
+        primary_lsn = await _primary_lsn()
+    for i, replica in enumerate(replica_engines):
+        try:
+            async with replica.connect() as conn:
+                result = await asyncio.wait_for(conn.execute(_REPLICA_LAG_SQL), _REPLICA_CHECK_TIMEOUT_SECONDS)
+                row = result.one()
+            replica_lag[i] = float(row.lag or 0)
+            replay_lsn = _parse_lsn(row.replay_lsn)
+            if primary_lsn is not None and replay_lsn is not None and replay_lsn >= primary_lsn:
+                _replica_synced_seq[i] = max(_replica_synced_seq[i], seq)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if replica_lag[i] is not None:
+                logger.warning("只读副本 %d 不可用，读请求回退主库: %s", i, e)
+            replica_lag[i] = None
+
+
+async def replica_lag_monitor_loop() -> None:
+    """
+    后台任务：每个 worker 每 DB_REPLICA_CHECK_SECONDS 秒检查副本延迟，
+    收到缓存失效广播时立即检查，使副本追上后尽快恢复读取（未配置副本时直接返回）
+    """
+    if not replica_engines:
+        return
+    logger.info("只读副本延迟检查任务启动（%d 个副本）", len(replica_engines))
+    try:
+        while True:
+            invalidation_event.clear()
+            await check_replica_lag()
+            try:
+                await asyncio.wait_for(invalidation_event.wait(), settings.DB_REPLICA_CHECK_SECONDS)
+                await asyncio.sleep(_REPLICA_RECHECK_MIN_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    except asyncio.CancelledError:
+        logger.info("只读副本延迟检查任务已停止")
+        raise
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
+
+
+class ReadAfterWriteMiddleware:
+    """写请求（非 GET / HEAD / OPTIONS）成功后设置短期 Cookie，使该客户端随后的读请求走主库、能读到自己的写入"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_engines or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}=1; Max-Age={settings.DB_READ_AFTER_WRITE_SECONDS}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,225 @@
+"""
+数据库查询统计（替代 echo=True 逐条打印 SQL）。
+
+在引擎的 before/after_cursor_execute 事件上计时，按请求汇总（ContextVar，由 QueryStatsMiddleware 设置）：
+- 查询次数、数据库总耗时、最慢的几条语句；DB_DEBUG_HEADERS 开启时通过 X-DB-* 响应头返回；
+- 同一语句形态（参数占位符归一化后的 SQL）在一个请求内执行超过 DB_N_PLUS_ONE_THRESHOLD 次时记为疑似 N+1 并告警；
+- 按路由累计的进程级指标（请求数、查询数、耗时、慢查询、N+1 次数）与最慢的语句形态，见 db_metrics_snapshot()；
+- 超过 DB_SLOW_QUERY_MS 的语句按 DB_SLOW_QUERY_SAMPLE_RATE 抽样写入慢查询日志（指标中全部计入）。
+请求之外（后台任务）的查询只计入全局指标。
+"""
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+# 每个请求保留的最慢语句数，以及进程级统计保留的语句形态数
+_REQUEST_SLOWEST = 3
+_MAX_TRACKED_SHAPES = 200
+_SHAPE_LOG_CHARS = 500
+_PLACEHOLDER_LIST_RE = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*|%\(\w+\)s(?:\s*,\s*%\(\w+\)s)*")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """语句形态：合并空白，IN 列表等连续的参数占位符折叠为一个"""
+    return _PLACEHOLDER_LIST_RE.sub("?", _WHITESPACE_RE.sub(" ", statement).strip())
+
+
+@dataclass
+class RequestQueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    slowest: List[Tuple[float, str]] = field(default_factory=list)
+    shapes: Counter = field(default_factory=Counter)
+    # 响应结束后置为 True：请求中创建的后台任务继承了上下文，其查询不再计入该请求
+    closed: bool = False
+
+    def record(self, shape: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.shapes[shape] += 1
+        if len(self.slowest) < _REQUEST_SLOWEST or elapsed_ms > self.slowest[-1][0]:
+            self.slowest.append((elapsed_ms, shape))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[_REQUEST_SLOWEST:]
+
+    def repeated_shapes(self) -> List[Tuple[str, int]]:
+        """疑似 N+1 的语句形态及其执行次数"""
+        threshold = settings.DB_N_PLUS_ONE_THRESHOLD
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("db_request_stats", default=None)
+
+
+@dataclass
+class _RouteMetrics:
+    requests: int = 0
+    queries: int = 0
+    db_ms: float = 0.0
+    max_queries: int = 0
+    n_plus_one: int = 0
+
+
+@dataclass
+class _ShapeMetrics:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+class _Metrics:
+    """进程级累计指标（每个 worker 一份）"""
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.slow_queries = 0
+        self.routes: Dict[str, _RouteMetrics] = {}
+        self.slow_shapes: Dict[str, _ShapeMetrics] = {}
+
+    def record_query(self, shape: str, elapsed_ms: float, slow: bool) -> None:
+        self.queries += 1
+        self.db_ms += elapsed_ms
+        if not slow:
+            return
+        self.slow_queries += 1
+        metrics = self.slow_shapes.get(shape)
+        if metrics is None:
+            if len(self.slow_shapes) >= _MAX_TRACKED_SHAPES:
+                return
+            metrics = self.slow_shapes[shape] = _ShapeMetrics()
+        metrics.count += 1
+        metrics.total_ms += elapsed_ms
+        metrics.max_ms = max(metrics.max_ms, elapsed_ms)
+
+    def record_request(self, route: str, stats: RequestQueryStats, n_plus_one: int) -> None:
+        metrics = self.routes.setdefault(route, _RouteMetrics())
+        metrics.requests += 1
+        metrics.queries += stats.count
+        metrics.db_ms += stats.total_ms
+        metrics.max_queries = max(metrics.max_queries, stats.count)
+        metrics.n_plus_one += n_plus_one
+
+
+_metrics = _Metrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_query_started_at", None)
+    if started_at is None:
+        return
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    shape = statement_shape(statement)
+    slow = elapsed_ms >= settings.DB_SLOW_QUERY_MS
+    _metrics.record_query(shape, elapsed_ms, slow)
+    stats = _current_stats.get()
+    if stats is not None and not stats.closed:
+        stats.record(shape, elapsed_ms)
+    if slow and random.random() < settings.DB_SLOW_QUERY_SAMPLE_RATE:
+        slow_query_logger.warning("慢查询 %.1f ms: %s", elapsed_ms, shape[:_SHAPE_LOG_CHARS])
+
+
+def instrument_engine(engine) -> None:
+    """在异步引擎（的同步引擎）上注册查询计时事件"""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "<unmatched>"
+    return f"{scope['method']} {path}"
+
+
+class QueryStatsMiddleware:
+    """按请求汇总数据库查询（纯 ASGI），响应结束后计入路由指标并检查 N+1"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.DB_DEBUG_HEADERS:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.total_ms:.1f}"
+                if stats.slowest:
+                    headers["X-DB-Slowest-Ms"] = ",".join(f"{ms:.1f}" for ms, _ in stats.slowest)
+                repeated = stats.repeated_shapes()
+                if repeated:
+                    headers["X-DB-N-Plus-One"] = str(len(repeated))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stats.closed = True
+            _current_stats.reset(token)
+            route = _route_name(scope)
+            repeated = stats.repeated_shapes()
+            for shape, n in repeated:
+                logger.warning("疑似 N+1 查询：%s 中同一语句执行 %d 次: %s", route, n, shape[:_SHAPE_LOG_CHARS])
+            _metrics.record_request(route, stats, len(repeated))
+
+
+def db_metrics_snapshot(top: int = 20) -> Dict[str, Any]:
+    """当前 worker 的累计指标：按数据库总耗时排序的路由、按最大耗时排序的慢查询形态"""
+    routes = sorted(_metrics.routes.items(), key=lambda item: item[1].db_ms, reverse=True)[:top]
+    slow_shapes = sorted(_metrics.slow_shapes.items(), key=lambda item: item[1].max_ms, reverse=True)[:top]
+    return {
+        "pid": os.getpid(),
+        "since": _metrics.started_at,
+        "queries": _metrics.queries,
+        "db_ms": round(_metrics.db_ms, 1),
+        "slow_queries": _metrics.slow_queries,
+        "slow_query_ms": settings.DB_SLOW_QUERY_MS,
+        "routes": [
+            {
+                "route": route,
+                "requests": m.requests,
+                "queries": m.queries,
+                "avg_queries": round(m.queries / m.requests, 2),
+                "max_queries": m.max_queries,
+                "db_ms": round(m.db_ms, 1),
+                "avg_db_ms": round(m.db_ms / m.requests, 2),
+                "n_plus_one": m.n_plus_one,
+            }
+            for route, m in routes
+        ],
+        "slow_statements": [
+            {
+                "statement": shape[:_SHAPE_LOG_CHARS],
+                "count": m.count,
+                "avg_ms": round(m.total_ms / m.count, 1),
+                "max_ms": round(m.max_ms, 1),
+            }
+            for shape, m in slow_shapes
+        ],
+    }
+
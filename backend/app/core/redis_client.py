@@ -1,10 +1,18 @@
+import asyncio
 import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
 import redis.asyncio as redis
-from typing import Optional, Any
+from typing import Optional, Any, Callable, Awaitable, Union, Tuple, List
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 redis_client: Optional[redis.Redis] = None
+raw_redis_client: Optional[redis.Redis] = None
 
 
 async def get_redis() -> redis.Redis:
@@ -18,11 +26,159 @@ async def get_redis() -> redis.Redis:
     return redis_client
 
 
+async def get_raw_redis() -> redis.Redis:
+    """不解码响应的客户端，用于直接读写字节（如已序列化的接口响应）"""
+    global raw_redis_client
+    if raw_redis_client is None:
+        raw_redis_client = await redis.from_url(settings.REDIS_URL)
+    return raw_redis_client
+
+
 async def close_redis():
-    global redis_client
+    global redis_client, raw_redis_client
     if redis_client:
         await redis_client.close()
         redis_client = None
+    if raw_redis_client:
+        await raw_redis_client.close()
+        raw_redis_client = None
+
+
+# 本地缓存条目的 key：(命名空间, key, 是否为字节)
+LocalKey = Tuple[str, str, bool]
+# 每个条目的额外内存开销估算（元组、OrderedDict 节点等）
+_LOCAL_ENTRY_OVERHEAD = 200
+
+
+class LocalCache:
+    """
+    进程内 TTL + LRU 缓存，位于 Redis 之前，按字节数限制容量。
+    只有订阅到失效广播（见 cache_invalidation_listener）时才启用，否则其它 worker 的写操作无法通知到本进程。
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = False
+        # 每次失效自增；读 Redis 前记下，回填时若已变化说明期间发生过失效，放弃写入本地
+        self.generation = 0
+        self._entries: "OrderedDict[LocalKey, Tuple[float, Union[str, bytes], int]]" = OrderedDict()
+        self._size = 0
+
+    def get(self, key: LocalKey) -> Optional[Union[str, bytes]]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: LocalKey, value: Union[str, bytes], generation: int):
+        if not self.enabled or generation != self.generation:
+            return
+        # str 按字符数估算，中文内容会偏小，作为容量上限足够
+        size = len(value) + len(key[1]) + _LOCAL_ENTRY_OVERHEAD
+        if size > self.max_bytes // 4:
+            # 单条过大的数据不进入本地缓存，避免挤掉其它热点
+            return
+        self._pop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    def invalidate_key(self, key: str):
+        self.generation += 1
+        for raw in (False, True):
+            self._pop(("", key, raw))
+
+    def invalidate_namespace(self, namespace: str):
+        self.generation += 1
+        for local_key in [k for k in self._entries if k[0] == namespace]:
+            self._pop(local_key)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._size = 0
+
+    def _pop(self, key: LocalKey):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+
+local_cache = LocalCache(settings.LOCAL_CACHE_MAX_BYTES, settings.LOCAL_CACHE_TTL_SECONDS)
+
+# 缓存失效广播频道，消息为 "key:{key}" 或 "ns:{namespace}"
+INVALIDATION_CHANNEL = "cache:invalidate"
+_RECONNECT_DELAY_SECONDS = 1
+# 失效广播（即某个 worker 写入了数据）计数：本进程发出广播时立即递增，不等订阅端收到回环消息，
+# 以及计数变化时置位的事件（供只读副本检查任务立即检查）
+_invalidation_seq = 0
+invalidation_event = asyncio.Event()
+
+
+def invalidation_seq() -> Optional[int]:
+    """已收到的缓存失效广播序号；未订阅到广播时返回 None（无法得知其它 worker 的写入）"""
+    if not local_cache.enabled:
+        return None
+    return _invalidation_seq
+
+
+def _note_invalidation():
+    global _invalidation_seq
+    _invalidation_seq += 1
+    invalidation_event.set()
+
+
+def _apply_invalidation(message: str):
+    _note_invalidation()
+    kind, _, name = message.partition(":")
+    if kind == "key":
+        local_cache.invalidate_key(name)
+    elif kind == "ns":
+        local_cache.invalidate_namespace(name)
+
+
+async def cache_invalidation_listener():
+    """
+    后台任务：订阅缓存失效广播，清理本进程的本地缓存。
+    订阅成功后才启用本地缓存；连接断开期间停用并清空（期间的广播可能已丢失）。
+    """
+    logger.info("缓存失效订阅任务启动")
+    while True:
+        pubsub = None
+        try:
+            r = await get_redis()
+            pubsub = r.pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # 订阅前的广播可能已丢失，视为刚发生过写入
+            _note_invalidation()
+            local_cache.clear()
+            local_cache.enabled = True
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    _apply_invalidation(message["data"])
+        except asyncio.CancelledError:
+            logger.info("缓存失效订阅任务已取消")
+            raise
+        except Exception as e:
+            logger.warning("缓存失效订阅中断，%s 秒后重连: %s", _RECONNECT_DELAY_SECONDS, e)
+        finally:
+            local_cache.enabled = False
+            local_cache.clear()
+            if pubsub is not None:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+        await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
 
 
 async def set_cache(key: str, value: Any, ttl: int = 3600):
@@ -39,15 +195,167 @@ async def get_cache(key: str) -> Optional[str]:
     return await r.get(key)
 
 
-async def delete_cache(key: str):
-    """删除缓存"""
+async def delete_cache(*keys: str):
+    """删除一个或多个缓存，并广播使所有 worker 的本地缓存失效"""
     r = await get_redis()
-    await r.delete(key)
+    pipe = r.pipeline(transaction=False)
+    pipe.delete(*keys)
+    for key in keys:
+        pipe.publish(INVALIDATION_CHANNEL, f"key:{key}")
+    await pipe.execute()
+    # 本进程的写入立即生效：在检查任务确认之前不再从只读副本回填刚失效的缓存
+    _note_invalidation()
+    for key in keys:
+        local_cache.invalidate_key(key)
+
 
+def post_detail_cache_key(slug: str, rendered: bool = False) -> str:
+    """文章详情缓存 key；rendered 为附带服务端渲染结果的版本"""
+    return f"post:detail:{slug}:rendered" if rendered else f"post:detail:{slug}"
 
-async def delete_cache_pattern(pattern: str):
-    """按模式删除缓存"""
+
+def post_detail_cache_keys(slug: str) -> List[str]:
+    """文章详情的全部缓存 key，文章或其计数变化时一并删除"""
+    return [post_detail_cache_key(slug), post_detail_cache_key(slug, rendered=True)]
+
+
+# 命名空间版本号：缓存 key 形如 {namespace}:v{N}:{key}，INCR 版本号即可整体失效，
+# 旧版本的 key 不再被读取，随 TTL 自然过期（O(1)，不需要 KEYS / SCAN）
+NAMESPACE_VERSION_PREFIX = "cache:ns:"
+
+POST_LIST_NAMESPACE = "post:list"
+CATEGORY_LIST_NAMESPACE = "category:list"
+TAG_LIST_NAMESPACE = "tag:list"
+CONFIG_NAMESPACE = "config"
+RELATED_NAMESPACE = "post:related"
+
+
+async def bump_namespace(*namespaces: str):
+    """使一个或多个命名空间下的所有缓存失效（含各 worker 的本地缓存）"""
+    r = await get_redis()
+    pipe = r.pipeline(transaction=False)
+    for namespace in namespaces:
+        pipe.incr(f"{NAMESPACE_VERSION_PREFIX}{namespace}")
+        pipe.publish(INVALIDATION_CHANNEL, f"ns:{namespace}")
+    await pipe.execute()
+    _note_invalidation()
+    for namespace in namespaces:
+        local_cache.invalidate_namespace(namespace)
+
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+async def acquire_lock(key: str, ttl: int) -> Optional[str]:
+    """获取一个带过期时间的 Redis 锁，成功返回 token，失败返回 None"""
+    r = await get_redis()
+    token = uuid.uuid4().hex
+    if await r.set(key, token, nx=True, ex=ttl):
+        return token
+    return None
+
+
+async def release_lock(key: str, token: str):
+    """释放锁（仅当锁仍由 token 持有时）"""
     r = await get_redis()
-    keys = await r.keys(pattern)
-    if keys:
-        await r.delete(*keys)
+    await r.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+
+
+# 一次往返完成「解析命名空间版本 + 读缓存 + 检查新鲜标记」，返回 {完整 key, 缓存值, 是否新鲜}
+_READ_FOR_LOAD_SCRIPT = """
+local key = ARGV[2]
+if ARGV[1] ~= '' then
+    local version = redis.call('GET', KEYS[1]) or '0'
+    key = ARGV[1] .. ':v' .. version .. ':' .. ARGV[2]
+end
+return {key, redis.call('GET', key), redis.call('EXISTS', key .. ':fresh')}
+"""
+
+_FILL_POLL_INTERVAL = 0.05
+
+
+async def _store_for_load(r: redis.Redis, key: str, value: Union[str, bytes], ttl: int, stale_ttl: int):
+    pipe = r.pipeline(transaction=False)
+    pipe.setex(key, ttl + stale_ttl, value)
+    if stale_ttl:
+        pipe.setex(f"{key}:fresh", ttl, "1")
+    await pipe.execute()
+
+
+async def _wait_for_fill(r: redis.Redis, key: str, lock_key: str, timeout: float) -> Optional[Union[str, bytes]]:
+    """等待持锁的 worker 回填缓存；锁已释放但仍无数据（如加载失败）时立即返回 None"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_FILL_POLL_INTERVAL)
+        value, locked = await r.mget(key, lock_key)
+        if value is not None:
+            return value
+        if locked is None:
+            return None
+    return None
+
+
+async def get_or_load_cache(
+    key: str,
+    loader: Callable[[], Awaitable[Union[str, bytes]]],
+    ttl: int = 300,
+    namespace: Optional[str] = None,
+    stale_ttl: int = 0,
+    lock_ttl: int = 10,
+    wait_timeout: float = 3.0,
+    raw: bool = False,
+) -> Union[str, bytes]:
+    """
+    带防击穿（single-flight）的缓存读取：
+    - 先查进程内本地缓存（只保存新鲜数据，见 LocalCache），再查 Redis；
+    - 命中且新鲜：直接返回；
+    - 未命中：只有拿到 {key}:lock 的请求执行 loader 并回填，其余请求轮询等待回填结果；
+    - stale_ttl > 0 时启用 stale-while-revalidate：数据在 ttl 后变旧但仍保留 stale_ttl 秒，
+      旧数据期间由拿到锁的请求刷新，其余请求直接返回旧值。
+    loader 返回序列化后的字符串；namespace 非空时 key 位于该命名空间下（见 bump_namespace）。
+    raw=True 时 loader 返回 bytes，命中时也直接返回 bytes，不做解码。
+    """
+    local_key = (namespace or "", key, raw)
+    local_value = local_cache.get(local_key)
+    if local_value is not None:
+        return local_value
+    generation = local_cache.generation
+
+    r = await (get_raw_redis() if raw else get_redis())
+    full_key, value, fresh = await r.eval(
+        _READ_FOR_LOAD_SCRIPT, 1, f"{NAMESPACE_VERSION_PREFIX}{namespace or ''}", namespace or "", key
+    )
+    if isinstance(full_key, bytes):
+        full_key = full_key.decode()
+    if value is not None and (fresh or not stale_ttl):
+        local_cache.set(local_key, value, generation)
+        return value
+
+    lock_key = f"{full_key}:lock"
+    token = await acquire_lock(lock_key, lock_ttl)
+    if token is None:
+        if value is not None:
+            # 其他请求正在刷新，先返回旧值
+            return value
+        filled = await _wait_for_fill(r, full_key, lock_key, wait_timeout)
+        if filled is not None:
+            local_cache.set(local_key, filled, generation)
+            return filled
+        # 等待超时或持锁请求加载失败，自行加载
+        value = await loader()
+        await _store_for_load(r, full_key, value, ttl, stale_ttl)
+        local_cache.set(local_key, value, generation)
+        return value
+
+    try:
+        value = await loader()
+        await _store_for_load(r, full_key, value, ttl, stale_ttl)
+        local_cache.set(local_key, value, generation)
+        return value
+    finally:
+        await release_lock(lock_key, token)
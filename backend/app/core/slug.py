@@ -0,0 +1,18 @@
+import re
+
+# 合法 slug：与 slugify 的输出字符集一致（字母、数字、下划线、连字符），不含 / 与 .
+SLUG_PATTERN = r"^[\w-]+$"
+_SLUG_RE = re.compile(SLUG_PATTERN)
+
+
+def slugify(text: str) -> str:
+    """将文本转换为 slug"""
+    text = text.lower().strip()
+    text = re.sub(r'[^\w\s-]', '', text)
+    text = re.sub(r'[-\s]+', '-', text)
+    return text
+
+
+def is_valid_slug(slug: str) -> bool:
+    """slug 是否只包含 slugify 会产生的字符（可安全用于 URL 路径与快照文件名）"""
+    return bool(_SLUG_RE.match(slug))
@@ -1,5 +1,7 @@
 from app.models.user import User
 from app.models.post import Post
+from app.models.post_related import PostRelated, PostTermVector
+from app.models.post_revision import PostRevision
 from app.models.category import Category
 from app.models.tag import Tag
 from app.models.comment import Comment
@@ -9,7 +11,7 @@ from app.models.github_trending import GitHubTrending, GitHubTrendingLlm
 from app.models.book import BookCategory, Book, BookReadingProgress, BookAnnotation, book_categories
 
 __all__ = [
-    "User", "Post", "Category", "Tag", "Comment", "Config", "Media",
+    "User", "Post", "PostRelated", "PostTermVector", "PostRevision", "Category", "Tag", "Comment", "Config", "Media",
     "GitHubTrending", "GitHubTrendingLlm",
     "BookCategory", "Book", "BookReadingProgress", "BookAnnotation", "book_categories",
 ]
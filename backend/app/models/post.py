@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Integer as SQLInteger
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index, Integer as SQLInteger
+from sqlalchemy.dialects.postgresql import TSVECTOR, JSONB
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 import enum
 
@@ -9,6 +10,7 @@ from app.core.database import Base
 class PostStatus(str, enum.Enum):
     DRAFT = "DRAFT"
     PUBLISHED = "PUBLISHED"
+    SCHEDULED = "SCHEDULED"  # 定时发布：published_at 为计划发布时间
 
 
 class Post(Base):
@@ -27,9 +29,26 @@ class Post(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     published_at = Column(DateTime, nullable=True)
+    # 全文检索向量（应用层中文分词后写入，见 app/services/search_service.py）
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+    # 服务端渲染结果（保存时生成，见 app/services/markdown_service.py）
+    content_html = deferred(Column(Text, nullable=True))
+    content_toc = deferred(Column(JSONB, nullable=True))  # [{"level", "text", "id"}]
+    word_count = Column(SQLInteger, default=0, nullable=False)
+    reading_time = Column(SQLInteger, default=0, nullable=False)  # 预计阅读时长（分钟）
+    content_hash = Column(String(64), nullable=True)
 
     # Relationships
     author = relationship("User", back_populates="posts")
     categories = relationship("Category", secondary="post_categories", back_populates="posts")
     tags = relationship("Tag", secondary="post_tags", back_populates="posts")
     comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # 与列表排序 (published_at DESC, created_at DESC, id DESC) 一致，支撑 keyset 分页
+        Index(
+            "ix_posts_status_published_at_keyset",
+            status, published_at.desc(), created_at.desc(), id.desc(),
+        ),
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+    )
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class PostRelated(Base):
+    """预计算的相关文章（见 app/services/related_service.py），每篇文章保留得分最高的若干篇"""
+    __tablename__ = "post_related"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    related_post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+    rank = Column(Integer, nullable=False)  # 从 0 开始，越小越相关
+
+    __table_args__ = (
+        Index("ix_post_related_post_id_rank", post_id, rank),
+        # 增量更新时查找「哪些文章的相关列表中包含该文章」
+        Index("ix_post_related_related_post_id", related_post_id),
+    )
+
+
+class PostTermVector(Base):
+    """文章的词频向量（标题 + 正文分词后的高频词），增量计算相关文章时无需重新读取全部正文"""
+    __tablename__ = "post_term_vectors"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    terms = Column(JSONB, nullable=False)  # {词元: 词频}
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class PostRevision(Base):
+    """
+    文章修订历史（见 app/services/revision_service.py）：
+    快照版本保存完整正文（content），其余版本只保存相对上一版本的行级差异（delta）。
+    """
+    __tablename__ = "post_revisions"
+
+    id = Column(Integer, primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)  # 每篇文章从 1 开始递增
+    title = Column(String, nullable=False)
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    content = Column(Text, nullable=True)  # 仅快照版本
+    delta = Column(JSONB, nullable=True)  # 仅差异版本
+    content_hash = Column(String(64), nullable=False)  # 该版本完整正文的 sha256
+    content_length = Column(Integer, nullable=False)  # 该版本完整正文的字符数
+    stored_size = Column(Integer, nullable=False)  # content 或 delta 实际占用的字节数
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # 还原时按 (post_id, version) 范围读取快照及其后的差异
+        UniqueConstraint("post_id", "version", name="uq_post_revisions_post_id_version"),
+    )
@@ -1,19 +1,25 @@
 from app.schemas.user import UserCreate, UserLogin, UserResponse, TokenResponse
-from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostListResponse
-from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
-from app.schemas.tag import TagCreate, TagResponse
+from app.schemas.post import (
+    PostCreate, PostUpdate, PostResponse, PostRenderedResponse, PostListResponse, PostBulkRequest, PostBulkResponse,
+    PostRevisionResponse, PostRevisionDetailResponse, PostRevisionDiffResponse, PostNeighborResponse, HotPostResponse,
+)
+from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse, CategoryTreeNode
+from app.schemas.tag import TagCreate, TagResponse, TagCloudItem
 from app.schemas.comment import CommentCreate, CommentResponse, CommentListResponse
 from app.schemas.config import ConfigCreate, ConfigUpdate, ConfigResponse
 from app.schemas.media import MediaCreate, MediaResponse
-from app.schemas.pagination import PaginatedResponse
+from app.schemas.pagination import PaginatedResponse, CursorPaginatedResponse
+from app.schemas.search import SuggestionItem
 
 __all__ = [
     "UserCreate", "UserLogin", "UserResponse", "TokenResponse",
-    "PostCreate", "PostUpdate", "PostResponse", "PostListResponse",
-    "CategoryCreate", "CategoryUpdate", "CategoryResponse",
-    "TagCreate", "TagResponse",
+    "PostCreate", "PostUpdate", "PostResponse", "PostRenderedResponse", "PostListResponse", "PostBulkRequest", "PostBulkResponse",
+    "PostRevisionResponse", "PostRevisionDetailResponse", "PostRevisionDiffResponse", "PostNeighborResponse", "HotPostResponse",
+    "CategoryCreate", "CategoryUpdate", "CategoryResponse", "CategoryTreeNode",
+    "TagCreate", "TagResponse", "TagCloudItem",
     "CommentCreate", "CommentResponse", "CommentListResponse",
     "ConfigCreate", "ConfigUpdate", "ConfigResponse",
     "MediaCreate", "MediaResponse",
-    "PaginatedResponse",
+    "PaginatedResponse", "CursorPaginatedResponse",
+    "SuggestionItem",
 ]
@@ -25,6 +25,12 @@ class CategoryResponse(BaseModel):
     parent_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
+    post_count: int = 0  # 已发布文章数
 
     class Config:
         from_attributes = True
+
+
+class CategoryTreeNode(CategoryResponse):
+    total_post_count: int = 0  # 整棵子树的已发布文章数（同一篇文章只计一次）
+    children: List["CategoryTreeNode"] = []
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, TypeVar, Generic
+from typing import List, Optional, TypeVar, Generic
 
 T = TypeVar('T')
 
@@ -14,3 +14,15 @@ class PaginatedResponse(BaseModel, Generic[T]):
 
     class Config:
         from_attributes = True
+
+
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    """游标（keyset）分页响应，total 仅在显式请求时返回"""
+    items: List[T]
+    size: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+    class Config:
+        from_attributes = True
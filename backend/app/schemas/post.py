@@ -1,15 +1,18 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
+from app.core.slug import SLUG_PATTERN
+
 
 class PostCreate(BaseModel):
     title: str
-    slug: str
+    slug: str = Field(pattern=SLUG_PATTERN)
     content: str
     excerpt: Optional[str] = None
     cover_image: Optional[str] = None
     status: str = "DRAFT"
+    published_at: Optional[datetime] = None  # status=SCHEDULED 时为计划发布时间（不带时区时视为 UTC）
     category_ids: List[int] = []
     tag_ids: List[int] = []
     notify_subscribers: Optional[bool] = True  # 发布时是否通知订阅用户，仅当 status=PUBLISHED 时有效
@@ -17,16 +20,33 @@ class PostCreate(BaseModel):
 
 class PostUpdate(BaseModel):
     title: Optional[str] = None
-    slug: Optional[str] = None
+    slug: Optional[str] = Field(None, pattern=SLUG_PATTERN)
     content: Optional[str] = None
     excerpt: Optional[str] = None
     cover_image: Optional[str] = None
     status: Optional[str] = None
+    published_at: Optional[datetime] = None  # 定时发布的计划时间（status=SCHEDULED 或文章已是定时状态时有效）
     category_ids: Optional[List[int]] = None
     tag_ids: Optional[List[int]] = None
     notify_subscribers: Optional[bool] = None  # 发布时是否通知订阅用户，仅当从草稿变为已发布时有效
 
 
+class PostBulkRequest(BaseModel):
+    """批量操作：action 为 publish / unpublish / delete / set_categories / add_categories / remove_categories / set_tags / add_tags / remove_tags"""
+    post_ids: List[int]
+    action: str
+    category_ids: List[int] = []  # *_categories 操作使用
+    tag_ids: List[int] = []  # *_tags 操作使用
+    notify_subscribers: Optional[bool] = True  # publish 时是否通知订阅用户，仅对首次发布的文章有效
+
+
+class PostBulkResponse(BaseModel):
+    action: str
+    matched: int  # 存在的文章数
+    affected: int  # 实际发生变化的文章数
+    missing_ids: List[int] = []  # 不存在的文章 ID
+
+
 class TagResponse(BaseModel):
     id: int
     name: str
@@ -54,6 +74,17 @@ class AuthorResponse(BaseModel):
         from_attributes = True
 
 
+class TocItem(BaseModel):
+    level: int
+    text: str
+    id: str
+
+
+class PostNeighborResponse(BaseModel):
+    title: str
+    slug: str
+
+
 class PostResponse(BaseModel):
     id: int
     title: str
@@ -64,17 +95,28 @@ class PostResponse(BaseModel):
     status: str
     view_count: int
     comment_count: int
+    word_count: int = 0
+    reading_time: int = 0  # 预计阅读时长（分钟）
     author: AuthorResponse
     categories: List[CategoryResponse] = []
     tags: List[TagResponse] = []
     created_at: datetime
     updated_at: datetime
     published_at: Optional[datetime] = None
+    # 上一篇（更早发布）/ 下一篇（更晚发布），仅已发布文章的详情接口返回
+    prev: Optional[PostNeighborResponse] = None
+    next: Optional[PostNeighborResponse] = None
 
     class Config:
         from_attributes = True
 
 
+class PostRenderedResponse(PostResponse):
+    """附带服务端渲染结果的文章详情（?render=true）"""
+    content_html: Optional[str] = None
+    content_toc: Optional[List[TocItem]] = None
+
+
 class PostListResponse(BaseModel):
     id: int
     title: str
@@ -84,11 +126,51 @@ class PostListResponse(BaseModel):
     status: str
     view_count: int
     comment_count: int
+    word_count: int = 0
+    reading_time: int = 0
     author: AuthorResponse
     categories: List[CategoryResponse] = []
     tags: List[TagResponse] = []
     created_at: datetime
     published_at: Optional[datetime] = None
+    highlight: Optional[str] = None  # 全文检索命中片段（HTML，命中词以 <mark> 标记），仅检索时返回
+
+    class Config:
+        from_attributes = True
+
+
+class HotPostResponse(PostListResponse):
+    hot_score: float  # 按小时衰减加权的近期阅读数
+
+
+class PostRevisionResponse(BaseModel):
+    version: int
+    title: str
+    is_snapshot: bool  # 保存完整正文的版本，其余版本只保存差异
+    content_length: int
+    stored_size: int  # 实际占用的字节数
+    author_id: Optional[int] = None
+    created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class PostRevisionDetailResponse(BaseModel):
+    version: int
+    title: str
+    content: str
+    content_hash: str
+    content_length: int
+    author_id: Optional[int] = None
+    created_at: datetime
+
+
+class PostRevisionDiffResponse(BaseModel):
+    from_version: int
+    to_version: int
+    from_title: str
+    to_title: str
+    diff: str  # unified diff
+    additions: int
+    deletions: int
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class SuggestionItem(BaseModel):
+    type: str  # post / tag
+    text: str  # 文章标题或标签名
+    slug: str
@@ -12,6 +12,15 @@ class TagResponse(BaseModel):
     name: str
     slug: str
     created_at: datetime
+    post_count: int = 0  # 已发布文章数
 
     class Config:
         from_attributes = True
+
+
+class TagCloudItem(BaseModel):
+    id: int
+    name: str
+    slug: str
+    post_count: int
+    weight: int  # 1 ~ 5，按文章数的对数分级
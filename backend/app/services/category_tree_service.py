@@ -0,0 +1,105 @@
+"""
+分类树。
+
+分类以 parent_id 组成森林，子树用递归 CTE 一次解析：
+- category_subtree_ids：某分类及其全部后代的 ID，缓存在分类命名空间（分类增删改时失效），
+  文章列表的 include_descendants 过滤据此对 post_categories 做一次 IN；
+- build_category_tree：整棵树（含每个分类自身与整棵子树的已发布文章数），供 /categories/tree 使用。
+递归使用 UNION（而非 UNION ALL），即使历史数据中存在环也能终止。
+"""
+from typing import Any, Dict, List, Optional
+
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis_client import CATEGORY_LIST_NAMESPACE, get_or_load_cache
+from app.models.category import Category, post_categories
+from app.models.post import Post, PostStatus
+from app.schemas.category import CategoryResponse
+from app.services.taxonomy_count_service import category_post_counts
+
+_SUBTREE_CACHE_TTL = 3600
+
+
+def _subtree_cte(root_ids=None):
+    """(ancestor_id, category_id)：category_id 为 ancestor_id 自身或其后代；root_ids 为空时包含每个分类"""
+    base = select(Category.id.label("ancestor_id"), Category.id.label("category_id"))
+    if root_ids is not None:
+        base = base.where(Category.id.in_(root_ids))
+    tree = base.cte("category_subtree", recursive=True)
+    child = select(tree.c.ancestor_id, Category.id).join(Category, Category.parent_id == tree.c.category_id)
+    return tree.union(child)
+
+
+async def _load_subtree_ids(db: AsyncSession, category_id: int) -> List[int]:
+    tree = _subtree_cte([category_id])
+    result = await db.execute(select(tree.c.category_id).order_by(tree.c.category_id))
+    return list(result.scalars().all())
+
+
+async def category_subtree_ids(db: AsyncSession, category_id: int) -> List[int]:
+    """分类自身及其全部后代的 ID（分类不存在时为空）"""
+    async def load() -> str:
+        return orjson.dumps(await _load_subtree_ids(db, category_id)).decode()
+
+    cached = await get_or_load_cache(
+        f"subtree:{category_id}", load, ttl=_SUBTREE_CACHE_TTL, namespace=CATEGORY_LIST_NAMESPACE
+    )
+    return orjson.loads(cached)
+
+
+async def is_descendant(db: AsyncSession, category_id: int, ancestor_id: int) -> bool:
+    """category_id 是否为 ancestor_id 自身或其后代（修改父分类时防止形成环）"""
+    return category_id in await _load_subtree_ids(db, ancestor_id)
+
+
+async def _subtree_post_counts(db: AsyncSession) -> Dict[int, int]:
+    """{分类 ID: 整棵子树中的已发布文章数}，同一篇文章属于子树中多个分类时只计一次"""
+    tree = _subtree_cte()
+    result = await db.execute(
+        select(tree.c.ancestor_id, func.count(func.distinct(post_categories.c.post_id)))
+        .join(post_categories, post_categories.c.category_id == tree.c.category_id)
+        .join(Post, Post.id == post_categories.c.post_id)
+        .where(Post.status == PostStatus.PUBLISHED.value)
+        .group_by(tree.c.ancestor_id)
+    )
+    return {row[0]: row[1] for row in result.all()}
+
+
+async def build_category_tree(db: AsyncSession) -> List[Dict[str, Any]]:
+    """按名称排序的分类树；父分类不存在（或成环）的分类作为根节点"""
+    result = await db.execute(select(Category).order_by(Category.name))
+    categories = result.scalars().all()
+    counts = await category_post_counts(db)
+    subtree_counts = await _subtree_post_counts(db)
+
+    nodes: Dict[int, Dict[str, Any]] = {}
+    for category in categories:
+        nodes[category.id] = CategoryResponse.model_validate(category).model_dump() | {
+            "post_count": counts.get(category.id, 0),
+            "total_post_count": subtree_counts.get(category.id, 0),
+            "children": [],
+        }
+
+    roots: List[Dict[str, Any]] = []
+    for category in categories:
+        node = nodes[category.id]
+        parent = nodes.get(category.parent_id) if category.parent_id is not None else None
+        if parent is None or _reaches(nodes, category.parent_id, category.id):
+            roots.append(node)
+        else:
+            parent["children"].append(node)
+    return roots
+
+
+def _reaches(nodes: Dict[int, Dict[str, Any]], start: Optional[int], target: int) -> bool:
+    """沿 parent_id 从 start 向上能否回到 target（即存在环）"""
+    seen = set()
+    current = start
+    while current is not None and current in nodes and current not in seen:
+        if current == target:
+            return True
+        seen.add(current)
+        current = nodes[current]["parent_id"]
+    return False
@@ -0,0 +1,91 @@
+"""
+文章评论数对账。
+posts.comment_count 由评论增删时原子递增 / 递减维护，是列表与详情接口的唯一数据来源；
+本任务定期修正可能出现的偏差（如手工改库、历史数据）：先用聚合查询找出不一致的文章，
+再按 ID 顺序锁定这些行后按评论表重新计数并更新，避免覆盖对账期间并发评论的递增 / 递减。
+多个 worker 每个周期只有一个执行（Redis 锁在本周期内不释放）。
+"""
+import asyncio
+import logging
+from typing import List
+
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.orm import aliased
+
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import (
+    POST_LIST_NAMESPACE, acquire_lock, bump_namespace, delete_cache, post_detail_cache_keys, release_lock,
+)
+from app.models.comment import Comment
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL_SECONDS = 6 * 3600
+RECONCILE_LOCK_KEY = "lock:comment_count:reconcile"
+
+
+async def reconcile_comment_counts() -> List[str]:
+    """按评论表重算所有文章的评论数，仅更新不一致的行，返回被修正的文章 slug"""
+    counted = aliased(Post)
+    actual = (
+        select(counted.id.label("post_id"), func.count(Comment.id).label("cnt"))
+        .select_from(counted)
+        .outerjoin(Comment, and_(Comment.post_id == counted.id, Comment.is_deleted == False))
+        .group_by(counted.id)
+        .subquery()
+    )
+    live_count = (
+        select(func.count(Comment.id))
+        .where(Comment.post_id == Post.id, Comment.is_deleted == False)
+        .scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Post.id).where(Post.id == actual.c.post_id, Post.comment_count != actual.c.cnt)
+        )
+        post_ids = sorted(result.scalars().all())
+        if not post_ids:
+            return []
+        # 评论增删在同一事务内先写评论、再递增 / 递减本行：持有行锁后下一条语句的快照
+        # 已包含所有已提交的评论，尚未提交的评论其计数变化会在本事务提交后再叠加
+        await db.execute(select(Post.id).where(Post.id.in_(post_ids)).order_by(Post.id).with_for_update())
+        result = await db.execute(
+            update(Post)
+            .where(Post.id.in_(post_ids), Post.comment_count != live_count)
+            .values(comment_count=live_count, updated_at=Post.updated_at)
+            .returning(Post.slug)
+            .execution_options(synchronize_session=False)
+        )
+        slugs = list(result.scalars().all())
+        await db.commit()
+
+    if slugs:
+        await bump_namespace(POST_LIST_NAMESPACE)
+        await delete_cache(*(key for slug in slugs for key in post_detail_cache_keys(slug)))
+        logger.warning("评论数对账修正了 %d 篇文章: %s", len(slugs), ", ".join(slugs[:20]))
+    return slugs
+
+
+async def comment_count_reconcile_loop() -> None:
+    """后台任务：启动时及之后每 6 小时对账一次评论数（多个 worker 每个周期只执行一次）"""
+    logger.info("评论数对账任务启动")
+    try:
+        while True:
+            try:
+                token = await acquire_lock(RECONCILE_LOCK_KEY, RECONCILE_INTERVAL_SECONDS - 60)
+                if token:
+                    try:
+                        await reconcile_comment_counts()
+                    except Exception:
+                        # 失败时释放锁，10 分钟后任一 worker 可重试
+                        await release_lock(RECONCILE_LOCK_KEY, token)
+                        raise
+                await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("评论数对账任务发生异常: %s", e)
+                await asyncio.sleep(600)
+    except asyncio.CancelledError:
+        logger.info("评论数对账任务已取消")
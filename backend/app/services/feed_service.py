@@ -0,0 +1,227 @@
+"""
+RSS / Atom 订阅源与站点地图生成。
+
+- /feed.xml、/atom.xml：最近发布的 FEED_SIZE 篇文章（全文为服务端渲染的 HTML）；
+- /sitemap.xml：站点地图索引，按文章 ID 每 SITEMAP_SHARD_SIZE 篇一个分片 /sitemap-posts-{n}.xml。
+生成结果缓存在 Redis（带 ETag）；已发布文章变化时只删除受影响的分片、索引与订阅源，下次请求时重新生成。
+分片按 ID 区间划分，文章增删改不会改变其它文章所在的分片。
+结果中的绝对地址只取自站点配置 site_url（未配置时为环境变量 SITE_URL），不使用请求的 Host，
+两者都未配置时返回 503。
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import List, Optional
+from urllib.parse import quote
+from xml.etree import ElementTree as ET
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+
+from app.core.config import settings
+from app.core.config_loader import get_site_basic_config
+from app.core.redis_client import delete_cache
+from app.models.post import Post, PostStatus
+from app.models.user import User
+
+FEED_SIZE = 20
+SITEMAP_SHARD_SIZE = 1000
+
+RSS_CACHE_KEY = "feed:rss"
+ATOM_CACHE_KEY = "feed:atom"
+SITEMAP_INDEX_CACHE_KEY = "sitemap:index"
+
+_XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8"?>\n'
+_ATOM_NS = "http://www.w3.org/2005/Atom"
+_CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+# RSS 2.0 的 <author> 必须是邮箱，作者名用 Dublin Core 的 <dc:creator>
+_DC_NS = "http://purl.org/dc/elements/1.1/"
+_SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+ET.register_namespace("content", _CONTENT_NS)
+ET.register_namespace("atom", _ATOM_NS)
+ET.register_namespace("dc", _DC_NS)
+
+
+def sitemap_shard_cache_key(shard: int) -> str:
+    return f"sitemap:posts:{shard}"
+
+
+def sitemap_shard_of(post_id: int) -> int:
+    return post_id // SITEMAP_SHARD_SIZE
+
+
+async def invalidate_post_feeds(*post_ids: int) -> None:
+    """已发布文章新增 / 修改 / 删除后调用：删除订阅源、站点地图索引及文章所在分片的缓存"""
+    shards = {sitemap_shard_of(post_id) for post_id in post_ids}
+    await delete_cache(
+        RSS_CACHE_KEY,
+        ATOM_CACHE_KEY,
+        SITEMAP_INDEX_CACHE_KEY,
+        *(sitemap_shard_cache_key(shard) for shard in sorted(shards)),
+    )
+
+
+async def _site_info(db: AsyncSession) -> dict:
+    site_basic = await get_site_basic_config(db)
+    site_url = (site_basic.get("site_url") or settings.SITE_URL or "").strip().rstrip("/")
+    if not site_url:
+        # 生成结果会被全局缓存，不能用请求头（Host）拼接地址
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="未配置站点地址")
+    return {
+        "url": site_url,
+        "title": site_basic.get("site_title") or "博客",
+        "description": site_basic.get("site_description") or site_basic.get("site_subtitle") or "",
+    }
+
+
+def _utc(dt: Optional[datetime]) -> datetime:
+    # 数据库中的时间均为 UTC（naive）
+    return (dt or datetime.utcnow()).replace(tzinfo=timezone.utc)
+
+
+def _post_url(site_url: str, slug: str) -> str:
+    return f"{site_url}/posts/{quote(slug)}"
+
+
+def _to_bytes(root: ET.Element) -> bytes:
+    return _XML_DECLARATION + ET.tostring(root, encoding="utf-8", xml_declaration=False)
+
+
+async def _latest_posts(db: AsyncSession) -> List[Post]:
+    result = await db.execute(
+        select(Post)
+        .options(
+            load_only(
+                Post.id, Post.title, Post.slug, Post.excerpt, Post.content_html, Post.author_id,
+                Post.created_at, Post.updated_at, Post.published_at,
+                raiseload=True,
+            ),
+            selectinload(Post.author).load_only(User.id, User.username),
+            selectinload(Post.categories),
+        )
+        .where(Post.status == PostStatus.PUBLISHED.value)
+        .order_by(Post.published_at.desc().nulls_last(), Post.id.desc())
+        .limit(FEED_SIZE)
+    )
+    return list(result.scalars().all())
+
+
+async def build_rss(db: AsyncSession) -> bytes:
+    """RSS 2.0"""
+    site = await _site_info(db)
+    posts = await _latest_posts(db)
+
+    rss = ET.Element("rss", {"version": "2.0"})
+    channel = ET.SubElement(rss, "channel")
+    ET.SubElement(channel, "title").text = site["title"]
+    ET.SubElement(channel, "link").text = site["url"]
+    ET.SubElement(channel, "description").text = site["description"]
+    ET.SubElement(channel, f"{{{_ATOM_NS}}}link", {
+        "href": f"{site['url']}/feed.xml", "rel": "self", "type": "application/rss+xml",
+    })
+    if posts:
+        ET.SubElement(channel, "lastBuildDate").text = format_datetime(
+            _utc(max(p.updated_at for p in posts))
+        )
+
+    for post in posts:
+        url = _post_url(site["url"], post.slug)
+        item = ET.SubElement(channel, "item")
+        ET.SubElement(item, "title").text = post.title
+        ET.SubElement(item, "link").text = url
+        ET.SubElement(item, "guid", {"isPermaLink": "true"}).text = url
+        ET.SubElement(item, "pubDate").text = format_datetime(_utc(post.published_at or post.created_at))
+        if post.author:
+            ET.SubElement(item, f"{{{_DC_NS}}}creator").text = post.author.username
+        for category in post.categories:
+            ET.SubElement(item, "category").text = category.name
+        ET.SubElement(item, "description").text = post.excerpt or ""
+        if post.content_html:
+            ET.SubElement(item, f"{{{_CONTENT_NS}}}encoded").text = post.content_html
+    return _to_bytes(rss)
+
+
+async def build_atom(db: AsyncSession) -> bytes:
+    """Atom 1.0"""
+    site = await _site_info(db)
+    posts = await _latest_posts(db)
+
+    def el(parent, tag, text=None, **attrs):
+        node = ET.SubElement(parent, tag, attrs)
+        if text is not None:
+            node.text = text
+        return node
+
+    # 默认命名空间直接写在根元素上（ElementTree 的 default_namespace 不支持无前缀属性）
+    feed = ET.Element("feed", {"xmlns": _ATOM_NS})
+    el(feed, "id", f"{site['url']}/")
+    el(feed, "title", site["title"])
+    if site["description"]:
+        el(feed, "subtitle", site["description"])
+    el(feed, "link", href=site["url"])
+    el(feed, "link", href=f"{site['url']}/atom.xml", rel="self", type="application/atom+xml")
+    updated = max((p.updated_at for p in posts), default=None)
+    el(feed, "updated", _utc(updated).isoformat())
+
+    for post in posts:
+        url = _post_url(site["url"], post.slug)
+        entry = el(feed, "entry")
+        el(entry, "id", url)
+        el(entry, "title", post.title)
+        el(entry, "link", href=url)
+        el(entry, "published", _utc(post.published_at or post.created_at).isoformat())
+        el(entry, "updated", _utc(post.updated_at).isoformat())
+        if post.author:
+            el(el(entry, "author"), "name", post.author.username)
+        for category in post.categories:
+            el(entry, "category", term=category.name)
+        if post.excerpt:
+            el(entry, "summary", post.excerpt)
+        if post.content_html:
+            el(entry, "content", post.content_html, type="html")
+    return _to_bytes(feed)
+
+
+async def build_sitemap_index(db: AsyncSession) -> bytes:
+    """站点地图索引：列出所有包含已发布文章的分片及其最后修改时间"""
+    site = await _site_info(db)
+    shard = (Post.id // SITEMAP_SHARD_SIZE).label("shard")
+    result = await db.execute(
+        select(shard, func.max(Post.updated_at))
+        .where(Post.status == PostStatus.PUBLISHED.value)
+        .group_by(shard)
+        .order_by(shard)
+    )
+
+    index = ET.Element("sitemapindex", {"xmlns": _SITEMAP_NS})
+    for shard_no, last_modified in result.all():
+        sitemap = ET.SubElement(index, "sitemap")
+        ET.SubElement(sitemap, "loc").text = f"{site['url']}/sitemap-posts-{shard_no}.xml"
+        ET.SubElement(sitemap, "lastmod").text = _utc(last_modified).isoformat()
+    return _to_bytes(index)
+
+
+async def build_sitemap_shard(db: AsyncSession, shard: int) -> Optional[bytes]:
+    """单个站点地图分片；分片内没有已发布文章时返回 None"""
+    site = await _site_info(db)
+    result = await db.execute(
+        select(Post.slug, Post.updated_at)
+        .where(
+            Post.status == PostStatus.PUBLISHED.value,
+            Post.id >= shard * SITEMAP_SHARD_SIZE,
+            Post.id < (shard + 1) * SITEMAP_SHARD_SIZE,
+        )
+        .order_by(Post.id)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+
+    urlset = ET.Element("urlset", {"xmlns": _SITEMAP_NS})
+    for slug, updated_at in rows:
+        url = ET.SubElement(urlset, "url")
+        ET.SubElement(url, "loc").text = _post_url(site["url"], slug)
+        ET.SubElement(url, "lastmod").text = _utc(updated_at).isoformat()
+    return _to_bytes(urlset)
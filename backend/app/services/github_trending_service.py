@@ -17,11 +17,20 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.core.database import AsyncSessionLocal
 from app.core.config_loader import get_email_config, get_github_trending_config, get_llm_config, get_site_basic_config
+from app.core.redis_client import bump_namespace, POST_LIST_NAMESPACE
 from app.models.config import Config
 from app.models.github_trending import GitHubTrending, GitHubTrendingLlm
 from app.models.post import Post, PostStatus
 from app.models.user import User, UserRole
 from app.services.email_service import email_service
+from app.services.search_service import index_post
+from app.services.markdown_service import render_post
+from app.services.feed_service import invalidate_post_feeds
+from app.services.related_service import refresh_related_posts
+from app.services.snapshot_service import schedule_post_snapshot
+from app.services.post_neighbor_service import invalidate_post_neighbors
+from app.services.suggest_service import index_post_suggestions
+from app.services.taxonomy_count_service import invalidate_post_counts
 
 logger = logging.getLogger(__name__)
 
@@ -453,13 +462,28 @@ async def run_daily_summary_and_post(trend_date: date) -> bool:
             author_id=author.id,
             published_at=datetime.utcnow() if default_status == PostStatus.PUBLISHED.value else None,
         )
+        await render_post(post)
         db.add(post)
+        await db.flush()
+        await index_post(db, post.id, post.title, post.content)
         await db.commit()
         await db.refresh(post)
         new_post = post
 
     logger.info("每日热点文章已创建: %s, status=%s", new_post.slug, default_status)
 
+    await bump_namespace(POST_LIST_NAMESPACE)
+    if default_status == PostStatus.PUBLISHED.value:
+        await invalidate_post_feeds(new_post.id)
+        await invalidate_post_counts()
+        await refresh_related_posts(new_post.id)
+        async with AsyncSessionLocal() as db:
+            neighbors = await invalidate_post_neighbors(
+                db, [(new_post.published_at, new_post.created_at, new_post.id)]
+            )
+        await index_post_suggestions([new_post])
+        schedule_post_snapshot(new_post, neighbors=neighbors)
+
     if default_status == PostStatus.PUBLISHED.value:
         async with AsyncSessionLocal() as db:
             email_config = await get_email_config(db)
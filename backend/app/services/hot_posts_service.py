@@ -0,0 +1,138 @@
+"""
+热门文章：按最近的阅读速度排序，而不是累计阅读量。
+
+- 每次阅读在当前小时的有序集合 post:hot:h:{小时} 上 ZINCRBY（member 为文章 ID），与阅读量缓冲同一次往返，
+  桶在统计窗口结束后自动过期；
+- 后台任务每隔 HOT_POSTS_REFRESH_SECONDS 秒（多个 worker 只有一个执行）用 ZUNIONSTORE 按衰减权重
+  合并最近 HOT_POSTS_WINDOW_DAYS 天的桶：距今 n 小时的桶权重为 0.5 ** (n / HOT_POSTS_HALF_LIFE_HOURS)；
+- 取得分最高的已发布文章，把序列化好的列表项按名次写入 Redis 列表 post:hot:list；
+- /posts/hot 只读取该列表（LRANGE），请求路径上不访问数据库；
+- 榜上文章撤回 / 删除 / 修改后由 invalidate_hot_posts 立即重算，不等下一个周期。
+"""
+import asyncio
+import logging
+import time
+from typing import List, Tuple
+
+import orjson
+
+from app.core.cache import dump_json
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import acquire_lock, get_raw_redis, get_redis
+from app.models.post import Post, PostStatus
+from app.schemas.post import PostListResponse
+from app.services.post_query_service import post_list_query
+
+logger = logging.getLogger(__name__)
+
+HOT_BUCKET_PREFIX = "post:hot:h:"
+HOT_SCORES_KEY = "post:hot:scores"
+HOT_LIST_KEY = "post:hot:list"
+HOT_REFRESH_LOCK_KEY = "lock:hot:refresh"
+# 榜单保留的文章数（/posts/hot 的 limit 上限）
+HOT_POSTS_SIZE = 50
+# 取得分最高的若干篇文章再过滤掉未发布 / 已删除的
+_CANDIDATES = HOT_POSTS_SIZE * 3
+
+
+def _current_hour() -> int:
+    return int(time.time() // 3600)
+
+
+def _window_hours() -> int:
+    return settings.HOT_POSTS_WINDOW_DAYS * 24
+
+
+def hot_bucket_key(hour: int) -> str:
+    return f"{HOT_BUCKET_PREFIX}{hour}"
+
+
+def add_hot_view(pipe, post_id: int) -> None:
+    """在 pipeline 中记录一次阅读（由 record_view 调用，与阅读量缓冲同一次往返）"""
+    key = hot_bucket_key(_current_hour())
+    pipe.zincrby(key, 1, post_id)
+    # 桶在统计窗口结束后（多留一小时余量）过期
+    pipe.expire(key, (_window_hours() + 1) * 3600)
+
+
+def _bucket_weights(now_hour: int) -> dict:
+    half_life = max(settings.HOT_POSTS_HALF_LIFE_HOURS, 1)
+    return {
+        hot_bucket_key(now_hour - age): 0.5 ** (age / half_life)
+        for age in range(_window_hours())
+    }
+
+
+async def _load_list_items(scores: List[Tuple[int, float]]) -> List[bytes]:
+    """按得分顺序序列化已发布文章的列表项"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            post_list_query().where(
+                Post.id.in_([post_id for post_id, _ in scores]), Post.status == PostStatus.PUBLISHED.value
+            )
+        )
+        posts = {post.id: post for post in result.scalars().all()}
+    items = []
+    for post_id, score in scores:
+        post = posts.get(post_id)
+        if post is not None:
+            item = PostListResponse.model_validate(post).model_dump()
+            item["hot_score"] = round(score, 4)
+            items.append(dump_json(item))
+        if len(items) >= HOT_POSTS_SIZE:
+            break
+    return items
+
+
+async def refresh_hot_posts() -> int:
+    """重新计算热门榜并写入 Redis，返回上榜文章数"""
+    r = await get_redis()
+    await r.zunionstore(HOT_SCORES_KEY, _bucket_weights(_current_hour()), aggregate="SUM")
+    top = await r.zrevrange(HOT_SCORES_KEY, 0, _CANDIDATES - 1, withscores=True)
+    top = [(int(post_id), score) for post_id, score in top]
+    items = await _load_list_items(top) if top else []
+
+    raw = await get_raw_redis()
+    pipe = raw.pipeline(transaction=True)
+    pipe.delete(HOT_LIST_KEY)
+    if items:
+        pipe.rpush(HOT_LIST_KEY, *items)
+    await pipe.execute()
+    return len(items)
+
+
+async def get_hot_posts_json(limit: int) -> bytes:
+    """热门榜前 limit 篇，直接返回 JSON 数组字节（只读 Redis）"""
+    raw = await get_raw_redis()
+    items = await raw.lrange(HOT_LIST_KEY, 0, limit - 1)
+    return b"[" + b",".join(items) + b"]"
+
+
+async def invalidate_hot_posts(*post_ids: int) -> None:
+    """文章撤回 / 删除 / 修改（标题、slug 等）并提交后调用：其中有文章在榜上时立即重算热门榜"""
+    if not post_ids:
+        return
+    raw = await get_raw_redis()
+    listed = {orjson.loads(item)["id"] for item in await raw.lrange(HOT_LIST_KEY, 0, -1)}
+    if listed.intersection(post_ids):
+        await refresh_hot_posts()
+
+
+async def hot_posts_refresh_loop() -> None:
+    """后台任务：定期重算热门榜；锁在本周期内不释放，多个 worker 每个周期只计算一次"""
+    logger.info("热门文章计算任务启动")
+    interval = max(settings.HOT_POSTS_REFRESH_SECONDS, 10)
+    try:
+        while True:
+            try:
+                if await acquire_lock(HOT_REFRESH_LOCK_KEY, interval - 1):
+                    await refresh_hot_posts()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("热门文章计算失败: %s", e)
+            await asyncio.sleep(interval)
+    except asyncio.CancelledError:
+        logger.info("热门文章计算任务已停止")
+        raise
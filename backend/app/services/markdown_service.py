@@ -0,0 +1,217 @@
+"""
+文章 Markdown 服务端渲染。
+
+文章保存时把 Markdown 渲染为经过清洗的 HTML（代码块由 Pygments 高亮），同时提取标题目录、字数与预计阅读时长，
+写入 posts.content_html / content_toc / word_count / reading_time，前端可直接使用而不必在浏览器中渲染。
+渲染结果按内容哈希（含渲染器版本）缓存在 Redis 中，内容未变化时不重复渲染。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import re
+import secrets
+from typing import Any, Dict, List, Optional
+
+import nh3
+from markdown_it import MarkdownIt
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+from sqlalchemy import select, update
+
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import get_cache, set_cache
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+# 渲染规则变化时递增，使旧的渲染缓存与 content_hash 失效
+RENDER_VERSION = "2"
+RENDER_CACHE_TTL = 7 * 24 * 3600
+
+# 阅读速度：中文每分钟 300 字，英文每分钟 200 词
+_CJK_CHARS_PER_MINUTE = 300
+_WORDS_PER_MINUTE = 200
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_CJK_CHAR_RE = re.compile(f"[{_CJK}]")
+_WORD_RE = re.compile(r"[A-Za-z0-9]+(?:['\u2019.-][A-Za-z0-9]+)*")
+_ANCHOR_STRIP_RE = re.compile(f"[^\\w{_CJK} -]")
+
+_FORMATTER = HtmlFormatter(nowrap=True)
+
+_ALLOWED_TAGS = set(nh3.ALLOWED_TAGS) | {"tfoot"}
+_ALLOWED_ATTRIBUTES = {tag: set(attrs) for tag, attrs in nh3.ALLOWED_ATTRIBUTES.items()}
+_ALLOWED_ATTRIBUTES.update({
+    "*": {"class"},
+    "img": _ALLOWED_ATTRIBUTES["img"] | {"title", "loading"},
+    "a": _ALLOWED_ATTRIBUTES["a"] | {"title"},
+})
+# 只有标题可以带 id，且只保留渲染器生成的目录锚点（见 render_markdown），原始 HTML 中的 id 一律去掉
+for _heading in ("h1", "h2", "h3", "h4", "h5", "h6"):
+    _ALLOWED_ATTRIBUTES[_heading] = _ALLOWED_ATTRIBUTES.get(_heading, set()) | {"id"}
+
+
+def _highlight_code(code: str, lang: str, _attrs: str) -> str:
+    try:
+        lexer = get_lexer_by_name(lang) if lang else None
+    except ClassNotFound:
+        lexer = None
+    if lexer is None:
+        return ""  # 交给 markdown-it 默认渲染（转义后的 <pre><code>）
+    highlighted = highlight(code, lexer, _FORMATTER)
+    return f'<pre class="highlight"><code class="language-{lang}">{highlighted}</code></pre>\n'
+
+
+_md = (
+    MarkdownIt("commonmark", {"html": True, "highlight": _highlight_code})
+    .enable("table")
+    .enable("strikethrough")
+)
+
+
+def content_hash(content: str) -> str:
+    """内容哈希（含渲染器版本），用于判断是否需要重新渲染"""
+    return hashlib.sha256(f"{RENDER_VERSION}\0{content or ''}".encode()).hexdigest()
+
+
+def _anchor_id(text: str, used: Dict[str, int]) -> str:
+    base = _ANCHOR_STRIP_RE.sub("", text.strip().lower()).replace(" ", "-") or "section"
+    count = used.get(base, 0)
+    used[base] = count + 1
+    return base if count == 0 else f"{base}-{count}"
+
+
+def count_words(text: str) -> int:
+    """字数：每个中日韩字符计一个字，其它按单词计"""
+    return len(_CJK_CHAR_RE.findall(text)) + len(_WORD_RE.findall(text))
+
+
+def _reading_time(text: str) -> int:
+    minutes = len(_CJK_CHAR_RE.findall(text)) / _CJK_CHARS_PER_MINUTE + len(_WORD_RE.findall(text)) / _WORDS_PER_MINUTE
+    return max(1, math.ceil(minutes)) if text.strip() else 0
+
+
+def render_markdown(content: str) -> Dict[str, Any]:
+    """
+    渲染 Markdown（同步、CPU 密集，应在线程池中调用）。
+    返回 {"html", "toc", "word_count", "reading_time"}，toc 为 [{"level", "text", "id"}]。
+    """
+    env: Dict[str, Any] = {}
+    tokens = _md.parse(content or "", env)
+
+    toc: List[Dict[str, Any]] = []
+    used: Dict[str, int] = {}
+    # 渲染器生成的锚点带上本次渲染的随机前缀，清洗时据此区分正文中原始 HTML 写入的 id
+    nonce = f"{secrets.token_hex(8)}:"
+    text_parts: List[str] = []
+    for i, token in enumerate(tokens):
+        if token.type == "heading_open":
+            text = "".join(
+                child.content for child in (tokens[i + 1].children or []) if child.type in ("text", "code_inline")
+            )
+            anchor = _anchor_id(text, used)
+            token.attrSet("id", nonce + anchor)
+            toc.append({"level": int(token.tag[1]), "text": text, "id": anchor})
+        elif token.type == "inline":
+            text_parts.append(token.content)
+        elif token.type in ("fence", "code_block"):
+            text_parts.append(token.content)
+
+    def keep_generated_id(_element: str, attribute: str, value: str) -> Optional[str]:
+        if attribute != "id":
+            return value
+        return value[len(nonce):] if value.startswith(nonce) else None
+
+    html = nh3.clean(
+        _md.renderer.render(tokens, _md.options, env),
+        tags=_ALLOWED_TAGS,
+        attributes=_ALLOWED_ATTRIBUTES,
+        attribute_filter=keep_generated_id,
+    )
+    plain = "\n".join(text_parts)
+    return {
+        "html": html,
+        "toc": toc,
+        "word_count": count_words(plain),
+        "reading_time": _reading_time(plain),
+    }
+
+
+async def render_markdown_cached(content: str) -> Dict[str, Any]:
+    """按内容哈希缓存渲染结果；未命中时在线程池中渲染"""
+    digest = content_hash(content)
+    cache_key = f"post:render:{digest}"
+    try:
+        cached = await get_cache(cache_key)
+    except Exception as e:
+        logger.warning("读取渲染缓存失败: %s", e)
+        cached = None
+    if cached:
+        rendered = json.loads(cached)
+    else:
+        loop = asyncio.get_running_loop()
+        rendered = await loop.run_in_executor(None, render_markdown, content)
+        try:
+            await set_cache(cache_key, rendered, ttl=RENDER_CACHE_TTL)
+        except Exception as e:
+            logger.warning("写入渲染缓存失败: %s", e)
+    rendered["content_hash"] = digest
+    return rendered
+
+
+async def render_post(post: Post) -> None:
+    """渲染文章正文并写入 ORM 对象（随调用方的事务一起提交），内容未变化时跳过"""
+    if post.content_hash and post.content_hash == content_hash(post.content):
+        return
+    rendered = await render_markdown_cached(post.content)
+    post.content_html = rendered["html"]
+    post.content_toc = rendered["toc"]
+    post.word_count = rendered["word_count"]
+    post.reading_time = rendered["reading_time"]
+    post.content_hash = rendered["content_hash"]
+
+
+async def render_missing_posts(batch_size: int = 50) -> int:
+    """为尚未渲染的文章补充渲染结果（启动时后台执行），返回处理数量"""
+    total = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            while True:
+                result = await db.execute(
+                    select(Post.id, Post.content)
+                    .where(Post.content_hash.is_(None))
+                    .order_by(Post.id)
+                    .limit(batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+                for row in rows:
+                    rendered = await render_markdown_cached(row.content)
+                    await db.execute(
+                        update(Post)
+                        .where(Post.id == row.id)
+                        # 补充渲染不属于内容修改，保持 updated_at 不变
+                        .values(
+                            content_html=rendered["html"],
+                            content_toc=rendered["toc"],
+                            word_count=rendered["word_count"],
+                            reading_time=rendered["reading_time"],
+                            content_hash=rendered["content_hash"],
+                            updated_at=Post.updated_at,
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                await db.commit()
+                total += len(rows)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception("补充渲染文章失败: %s", e)
+    if total:
+        logger.info("已为 %d 篇文章补充渲染结果", total)
+    return total
@@ -0,0 +1,517 @@
+"""
+文章批量导入（迁移旧站点的文章存档）。
+
+支持两种输入：
+- zip：每个 .md / .markdown 文件为一篇文章，开头可带 YAML front matter（以 --- 包围），字段见 _to_record；
+  缺少 title 时取第一个一级标题或文件名，缺少 slug 时由文件名生成；
+- NDJSON：每行一个 JSON 对象，字段同 front matter，正文为 content。
+
+导入流水线：逐条解析（线程池中）→ 每 IMPORT_BATCH_SIZE 条为一批：批量补建分类 / 标签、服务端渲染、
+INSERT ... ON CONFLICT 写入文章与关联表，每批一个事务。单条记录解析或校验失败只记录错误，不影响其它记录。
+import_posts() 以异步生成器的形式逐条产出事件（error / skipped / progress / done），供接口流式返回或命令行打印。
+"""
+import asyncio
+import itertools
+import json
+import logging
+import re
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import PurePosixPath
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Set, Union
+
+import yaml
+from sqlalchemy import delete, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import (
+    CATEGORY_LIST_NAMESPACE, POST_LIST_NAMESPACE, TAG_LIST_NAMESPACE,
+    bump_namespace, delete_cache, post_detail_cache_keys,
+)
+from app.core.slug import is_valid_slug, slugify
+from app.models.category import Category, post_categories
+from app.models.post import Post, PostStatus
+from app.models.tag import Tag, post_tags
+from app.services.feed_service import invalidate_post_feeds
+from app.services.hot_posts_service import invalidate_hot_posts
+from app.services.markdown_service import content_hash, render_markdown
+from app.services.post_neighbor_service import SortKey, invalidate_post_neighbors
+from app.services.related_service import rebuild_related_posts
+from app.services.search_service import search_vector_expression
+from app.services.suggest_service import rebuild_suggest_index
+from app.services.snapshot_service import export_snapshot, snapshot_enabled
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 200
+IMPORT_FORMATS = ("zip", "ndjson")
+# 单篇 Markdown 文件的大小上限
+MAX_FILE_BYTES = 5 * 1024 * 1024
+
+_MARKDOWN_SUFFIXES = (".md", ".markdown")
+_FRONT_MATTER_RE = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.S)
+_H1_RE = re.compile(r"^#[ \t]+(.+?)[ \t#]*$", re.M)
+# 冲突时（slug 已存在且 on_conflict=update）覆盖的列
+_UPDATE_COLUMNS = (
+    "title", "content", "excerpt", "cover_image", "status", "published_at",
+    "content_html", "content_toc", "word_count", "reading_time", "content_hash", "search_vector", "updated_at",
+)
+
+
+@dataclass
+class ImportRecord:
+    source: str  # 文件名或 NDJSON 行号，用于错误报告
+    title: str
+    slug: str
+    content: str
+    excerpt: Optional[str]
+    cover_image: Optional[str]
+    status: str
+    categories: List[str]
+    tags: List[str]
+    published_at: Optional[datetime]
+    created_at: Optional[datetime]
+
+
+@dataclass
+class ImportFailure:
+    source: str
+    error: str
+
+
+@dataclass
+class ImportStats:
+    processed: int = 0
+    imported: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    # 导入后为已发布，或被覆盖前为已发布（包括被覆盖为草稿）的文章
+    published_ids: Set[int] = field(default_factory=set)
+    updated_slugs: Set[str] = field(default_factory=set)
+    # 被覆盖前为已发布的文章的原排序键，用于清理其原位置两侧文章的上一篇 / 下一篇
+    previous_sort_keys: Set[SortKey] = field(default_factory=set)
+
+    def event(self, event_type: str) -> Dict[str, Any]:
+        return {
+            "type": event_type,
+            "processed": self.processed,
+            "imported": self.imported,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
+
+
+def detect_import_format(filename: Optional[str]) -> str:
+    """按文件扩展名判断输入格式"""
+    name = (filename or "").lower()
+    if name.endswith(".zip"):
+        return "zip"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    raise ValueError("仅支持 .zip（Markdown + front matter）或 .ndjson / .jsonl 文件")
+
+
+# ---------- 解析 ----------
+
+def _to_datetime(value: Any, name: str) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime(value.year, value.month, value.day)
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"{name} 不是有效的时间: {value}")
+    # 数据库中的时间均为 UTC（naive）
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _to_names(value: Any) -> List[str]:
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        raise ValueError("分类 / 标签应为字符串或字符串列表")
+    return list(dict.fromkeys(str(v).strip() for v in value if str(v).strip()))
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _to_record(source: str, data: Dict[str, Any], default_status: str) -> ImportRecord:
+    """
+    字段：title、slug、content、excerpt、cover_image、status（DRAFT / PUBLISHED，也可用 draft: true）、
+    categories / category、tags、published_at / date、created_at。
+    """
+    title = str(data.get("title") or "").strip()
+    if not title:
+        raise ValueError("缺少 title")
+    slug = str(data.get("slug") or "").strip() or slugify(title)
+    if not slug:
+        raise ValueError("缺少 slug")
+    if not is_valid_slug(slug):
+        raise ValueError(f"slug 只能包含字母、数字、下划线和连字符: {slug}")
+    content = data.get("content")
+    if not isinstance(content, str):
+        raise ValueError("缺少 content")
+
+    if data.get("status"):
+        status = str(data["status"]).strip().upper()
+    elif "draft" in data:
+        status = PostStatus.DRAFT.value if data["draft"] else PostStatus.PUBLISHED.value
+    else:
+        status = default_status
+    if status not in (PostStatus.DRAFT.value, PostStatus.PUBLISHED.value):
+        raise ValueError(f"无效的 status: {status}")
+
+    return ImportRecord(
+        source=source,
+        title=title,
+        slug=slug,
+        content=content,
+        excerpt=_optional_str(data.get("excerpt") or data.get("description")),
+        cover_image=_optional_str(data.get("cover_image") or data.get("cover")),
+        status=status,
+        categories=_to_names(data.get("categories", data.get("category"))),
+        tags=_to_names(data.get("tags")),
+        published_at=_to_datetime(data.get("published_at") or data.get("date"), "published_at"),
+        created_at=_to_datetime(data.get("created_at"), "created_at"),
+    )
+
+
+def _parse_markdown(source: str, text: str, default_status: str) -> ImportRecord:
+    meta: Dict[str, Any] = {}
+    match = _FRONT_MATTER_RE.match(text)
+    if match:
+        meta = yaml.safe_load(match.group(1)) or {}
+        if not isinstance(meta, dict):
+            raise ValueError("front matter 必须是键值对")
+        text = text[match.end():]
+    meta["content"] = text
+    stem = PurePosixPath(source).stem
+    if not meta.get("title"):
+        heading = _H1_RE.search(text)
+        meta["title"] = heading.group(1) if heading else stem
+    if not meta.get("slug"):
+        meta["slug"] = slugify(stem)
+    return _to_record(source, meta, default_status)
+
+
+def _iter_zip(fileobj: BinaryIO, default_status: str) -> Iterator[Union[ImportRecord, ImportFailure]]:
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        yield ImportFailure("(archive)", "不是有效的 zip 文件")
+        return
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or not name.lower().endswith(_MARKDOWN_SUFFIXES) or name.startswith("__MACOSX/"):
+                continue
+            if info.file_size > MAX_FILE_BYTES:
+                yield ImportFailure(name, f"文件超过 {MAX_FILE_BYTES // 1024 // 1024}MB")
+                continue
+            try:
+                text = archive.read(info).decode("utf-8-sig")
+                yield _parse_markdown(name, text, default_status)
+            except (ValueError, UnicodeDecodeError, yaml.YAMLError) as e:
+                yield ImportFailure(name, str(e))
+
+
+def _iter_ndjson(fileobj: BinaryIO, default_status: str) -> Iterator[Union[ImportRecord, ImportFailure]]:
+    for lineno, line in enumerate(fileobj, 1):
+        source = f"line {lineno}"
+        try:
+            line = line.decode("utf-8-sig").strip() if isinstance(line, bytes) else line.strip()
+            if not line:
+                continue
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("每行应为一个 JSON 对象")
+            yield _to_record(source, data, default_status)
+        except (ValueError, UnicodeDecodeError) as e:
+            yield ImportFailure(source, str(e))
+
+
+def iter_import_records(fileobj: BinaryIO, fmt: str, default_status: str = PostStatus.DRAFT.value):
+    """逐条解析输入（同步，应在线程池中调用）"""
+    if fmt == "zip":
+        return _iter_zip(fileobj, default_status)
+    if fmt == "ndjson":
+        return _iter_ndjson(fileobj, default_status)
+    raise ValueError(f"不支持的导入格式: {fmt}")
+
+
+# ---------- 写入 ----------
+
+def _prepare_rows(
+    records: List[ImportRecord], author_id: int, existing_published_at: Dict[str, Optional[datetime]]
+) -> List[Dict[str, Any]]:
+    """
+    渲染 Markdown 并生成文章行（CPU 密集，在线程池中调用）。
+    existing_published_at 为将被覆盖的已有文章（slug → 发布时间）：记录未提供发布时间时
+    published_at 留空，由 ON CONFLICT 的 coalesce 保留原值；原本没有发布时间的已发布文章才取默认值。
+    """
+    now = datetime.utcnow()
+    rows = []
+    for record in records:
+        rendered = render_markdown(record.content)
+        created_at = record.created_at or record.published_at or now
+        published_at = record.published_at
+        if (
+            record.status == PostStatus.PUBLISHED.value
+            and published_at is None
+            and existing_published_at.get(record.slug) is None
+        ):
+            published_at = created_at
+        rows.append({
+            "title": record.title,
+            "slug": record.slug,
+            "content": record.content,
+            "excerpt": record.excerpt,
+            "cover_image": record.cover_image,
+            "status": record.status,
+            "view_count": 0,
+            "comment_count": 0,
+            "author_id": author_id,
+            "created_at": created_at,
+            "updated_at": now,
+            "published_at": published_at,
+            "search_vector": search_vector_expression(record.title, record.content),
+            "content_html": rendered["html"],
+            "content_toc": rendered["toc"],
+            "word_count": rendered["word_count"],
+            "reading_time": rendered["reading_time"],
+            "content_hash": content_hash(record.content),
+        })
+    return rows
+
+
+async def _resolve_names(db: AsyncSession, model, names: Set[str]) -> Dict[str, int]:
+    """按名称查找分类 / 标签，不存在的批量创建（slug 由名称生成），返回 {名称: id}"""
+    if not names:
+        return {}
+
+    async def lookup(wanted) -> Dict[str, int]:
+        result = await db.execute(select(model.id, model.name).where(model.name.in_(wanted)).order_by(model.id))
+        found: Dict[str, int] = {}
+        for row_id, name in result.all():
+            found.setdefault(name, row_id)  # 分类名称不唯一时取最早创建的
+        return found
+
+    mapping = await lookup(names)
+    missing = names - mapping.keys()
+    if missing:
+        now = datetime.utcnow()
+        values = [{"name": name, "slug": slugify(name) or name, "created_at": now} for name in sorted(missing)]
+        if model is Category:
+            for value in values:
+                value["updated_at"] = now
+        # slug 已被其它名称占用时不创建，对应的记录在下面报告为失败
+        await db.execute(pg_insert(model).values(values).on_conflict_do_nothing())
+        mapping.update(await lookup(missing))
+    return mapping
+
+
+async def _write_batch(
+    db: AsyncSession,
+    records: List[ImportRecord],
+    author_id: int,
+    on_conflict: str,
+    stats: ImportStats,
+) -> List[Dict[str, Any]]:
+    """写入一批记录（调用方负责提交），返回本批的 error / skipped 事件"""
+    events: List[Dict[str, Any]] = []
+
+    def fail(record: ImportRecord, error: str) -> None:
+        stats.failed += 1
+        events.append({"type": "error", "source": record.source, "slug": record.slug, "error": error})
+
+    def skip(record: ImportRecord) -> None:
+        stats.skipped += 1
+        events.append({"type": "skipped", "source": record.source, "slug": record.slug, "reason": "slug 已存在"})
+
+    # 同一条 INSERT 中 slug 不能重复
+    unique: Dict[str, ImportRecord] = {}
+    for record in records:
+        if record.slug in unique:
+            fail(record, f"slug 与 {unique[record.slug].source} 重复")
+        else:
+            unique[record.slug] = record
+    existing_published_at: Dict[str, Optional[datetime]] = {}
+    previously_published: Dict[str, SortKey] = {}
+    if on_conflict == "skip":
+        # 先排除已存在的 slug，省去渲染；并发写入由下面的 ON CONFLICT DO NOTHING 兜底
+        result = await db.execute(select(Post.slug).where(Post.slug.in_(list(unique))))
+        for slug in result.scalars().all():
+            skip(unique.pop(slug))
+    else:
+        # 锁定将被覆盖的文章，读取其原状态与发布时间
+        result = await db.execute(
+            select(Post.id, Post.slug, Post.status, Post.published_at, Post.created_at)
+            .where(Post.slug.in_(list(unique)))
+            .with_for_update()
+        )
+        for row in result.all():
+            existing_published_at[row.slug] = row.published_at
+            if row.status == PostStatus.PUBLISHED.value:
+                previously_published[row.slug] = (row.published_at, row.created_at, row.id)
+
+    categories = await _resolve_names(db, Category, {n for r in unique.values() for n in r.categories})
+    tags = await _resolve_names(db, Tag, {n for r in unique.values() for n in r.tags})
+    accepted: List[ImportRecord] = []
+    for record in unique.values():
+        missing = [n for n in record.categories if n not in categories] + [n for n in record.tags if n not in tags]
+        if missing:
+            fail(record, f"分类 / 标签的 slug 与已有的冲突: {', '.join(missing)}")
+        else:
+            accepted.append(record)
+    if not accepted:
+        return events
+
+    loop = asyncio.get_running_loop()
+    rows = await loop.run_in_executor(None, _prepare_rows, accepted, author_id, existing_published_at)
+    stmt = pg_insert(Post).values(rows)
+    if on_conflict == "update":
+        set_ = {name: stmt.excluded[name] for name in _UPDATE_COLUMNS}
+        # 记录未提供发布时间时保留原发布时间
+        set_["published_at"] = func.coalesce(stmt.excluded.published_at, Post.published_at)
+        stmt = stmt.on_conflict_do_update(index_elements=[Post.slug], set_=set_)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[Post.slug])
+    # xmax = 0 表示本次新插入的行，否则为冲突后更新的行
+    result = await db.execute(stmt.returning(Post.id, Post.slug, literal_column("xmax = 0").label("inserted")))
+    written = {row.slug: (row.id, row.inserted) for row in result.all()}
+
+    updated_ids = [post_id for post_id, inserted in written.values() if not inserted]
+    if updated_ids:
+        await db.execute(delete(post_categories).where(post_categories.c.post_id.in_(updated_ids)))
+        await db.execute(delete(post_tags).where(post_tags.c.post_id.in_(updated_ids)))
+
+    category_rows, tag_rows = [], []
+    for record in accepted:
+        if record.slug not in written:
+            skip(record)
+            continue
+        post_id, inserted = written[record.slug]
+        if inserted:
+            stats.imported += 1
+        else:
+            stats.updated += 1
+            stats.updated_slugs.add(record.slug)
+        if record.status == PostStatus.PUBLISHED.value:
+            stats.published_ids.add(post_id)
+        if not inserted and record.slug in previously_published:
+            # 已发布文章被覆盖（可能变为草稿）：订阅源、相关文章、原相邻文章与快照同样需要更新
+            stats.published_ids.add(post_id)
+            stats.previous_sort_keys.add(previously_published[record.slug])
+        category_rows.extend({"post_id": post_id, "category_id": categories[n]} for n in record.categories)
+        tag_rows.extend({"post_id": post_id, "tag_id": tags[n]} for n in record.tags)
+    if category_rows:
+        await db.execute(pg_insert(post_categories).values(category_rows).on_conflict_do_nothing())
+    if tag_rows:
+        await db.execute(pg_insert(post_tags).values(tag_rows).on_conflict_do_nothing())
+    return events
+
+
+async def _after_import(stats: ImportStats) -> None:
+    """导入结束后统一失效缓存、重算相关文章、重建输入联想索引、更新静态快照（每次导入只做一次）"""
+    await bump_namespace(POST_LIST_NAMESPACE, CATEGORY_LIST_NAMESPACE, TAG_LIST_NAMESPACE)
+    # 导入可能新建标签、修改标题或撤回文章，直接全量重建
+    await rebuild_suggest_index()
+    if stats.updated_slugs:
+        await delete_cache(*(key for slug in sorted(stats.updated_slugs) for key in post_detail_cache_keys(slug)))
+    if stats.published_ids:
+        await invalidate_post_feeds(*stats.published_ids)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Post.published_at, Post.created_at, Post.id).where(Post.id.in_(stats.published_ids))
+            )
+            sort_keys = {tuple(row) for row in result.all()} | stats.previous_sort_keys
+            await invalidate_post_neighbors(db, sort_keys)
+        await invalidate_hot_posts(*stats.published_ids)
+        await rebuild_related_posts()
+        if snapshot_enabled():
+            await export_snapshot()
+
+
+def _take(iterator: Iterator, size: int) -> list:
+    return list(itertools.islice(iterator, size))
+
+
+async def import_posts(
+    fileobj: BinaryIO,
+    fmt: str,
+    author_id: int,
+    on_conflict: str = "skip",
+    default_status: str = PostStatus.DRAFT.value,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    批量导入文章，逐条产出事件：
+    - {"type": "error", "source", "slug"?, "error"}：该记录未导入；
+    - {"type": "skipped", "source", "slug", "reason"}：slug 已存在（on_conflict=skip）；
+    - {"type": "progress", "processed", "imported", "updated", "skipped", "failed"}：每批结束；
+    - {"type": "done", ...}：全部结束，计数同 progress。
+    on_conflict：slug 已存在时 skip 跳过，update 覆盖内容（保留作者、创建时间与阅读量，记录未提供发布时间时保留原发布时间）。
+    """
+    if on_conflict not in ("skip", "update"):
+        raise ValueError(f"无效的 on_conflict: {on_conflict}")
+    loop = asyncio.get_running_loop()
+    records = iter_import_records(fileobj, fmt, default_status)
+    stats = ImportStats()
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            batch = await loop.run_in_executor(None, _take, records, batch_size)
+            if not batch:
+                break
+            stats.processed += len(batch)
+            valid: List[ImportRecord] = []
+            for item in batch:
+                if isinstance(item, ImportFailure):
+                    stats.failed += 1
+                    yield {"type": "error", "source": item.source, "error": item.error}
+                else:
+                    valid.append(item)
+            if not valid:
+                yield stats.event("progress")
+                continue
+
+            snapshot = (stats.imported, stats.updated, stats.skipped, stats.failed)
+            try:
+                events = await _write_batch(db, valid, author_id, on_conflict, stats)
+                await db.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await db.rollback()
+                logger.exception("批量导入文章失败: %s", e)
+                # 整批回滚，本批所有记录计为失败
+                stats.imported, stats.updated, stats.skipped, stats.failed = snapshot
+                stats.failed += len(valid)
+                events = [{"type": "error", "source": r.source, "slug": r.slug, "error": str(e)} for r in valid]
+            for event in events:
+                yield event
+            yield stats.event("progress")
+
+    if stats.imported or stats.updated:
+        try:
+            await _after_import(stats)
+        except Exception as e:
+            logger.exception("导入后刷新缓存 / 相关文章失败: %s", e)
+    yield stats.event("done")
@@ -0,0 +1,75 @@
+"""
+上一篇 / 下一篇。
+
+已发布文章按列表排序键 (published_at, created_at, id) 排列：prev 为更早发布的一篇，next 为更晚发布的一篇。
+两个方向各是一次沿 ix_posts_status_published_at_keyset 的 seek（排序键比较 + LIMIT 1），不扫描列表。
+
+结果随文章详情一起缓存；文章进入或离开已发布列表（发布 / 撤回 / 删除）、或已发布文章改标题 / slug 时，
+只需删除它在原位置两侧那两篇文章的详情缓存（见 invalidate_post_neighbors）。
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import DateTime, Integer, column, select, true, tuple_, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis_client import delete_cache, post_detail_cache_keys
+from app.models.post import Post, PostStatus
+
+SortKey = Tuple[Optional[datetime], datetime, int]
+
+_ORDER_DESC = (Post.published_at.desc(), Post.created_at.desc(), Post.id.desc())
+_ORDER_ASC = (Post.published_at.asc(), Post.created_at.asc(), Post.id.asc())
+# 批量失效时每条语句携带的排序键数
+_BATCH_SIZE = 500
+
+
+def _seek(sort_key, newer: bool):
+    key = tuple_(Post.published_at, Post.created_at, Post.id)
+    return (
+        select(Post.title, Post.slug)
+        .where(Post.status == PostStatus.PUBLISHED.value, key > sort_key if newer else key < sort_key)
+        .order_by(*(_ORDER_ASC if newer else _ORDER_DESC))
+        .limit(1)
+    )
+
+
+async def load_post_neighbors(db: AsyncSession, post: Post) -> Dict[str, Optional[dict]]:
+    """文章详情中的 prev / next（{title, slug}）；未发布的文章没有上一篇 / 下一篇"""
+    neighbors: Dict[str, Optional[dict]] = {"prev": None, "next": None}
+    if post.status != PostStatus.PUBLISHED.value or post.published_at is None:
+        return neighbors
+    sort_key = tuple_(post.published_at, post.created_at, post.id)
+    for name, newer in (("prev", False), ("next", True)):
+        row = (await db.execute(_seek(sort_key, newer))).first()
+        if row is not None:
+            neighbors[name] = {"title": row.title, "slug": row.slug}
+    return neighbors
+
+
+async def neighbor_slugs(db: AsyncSession, sort_keys: Iterable[SortKey]) -> Set[str]:
+    """各排序键位置两侧的已发布文章 slug（排序键对应的文章本身不计入）"""
+    keys = list(dict.fromkeys(key for key in sort_keys if key[0] is not None))
+    slugs: Set[str] = set()
+    for i in range(0, len(keys), _BATCH_SIZE):
+        positions = values(
+            column("published_at", DateTime), column("created_at", DateTime), column("id", Integer),
+            name="neighbor_keys",
+        ).data(keys[i:i + _BATCH_SIZE])
+        sort_key = tuple_(positions.c.published_at, positions.c.created_at, positions.c.id)
+        for newer in (False, True):
+            neighbor = _seek(sort_key, newer).correlate(positions).lateral("neighbor")
+            result = await db.execute(select(neighbor.c.slug).select_from(positions).join(neighbor, true()))
+            slugs.update(result.scalars().all())
+    return slugs
+
+
+async def invalidate_post_neighbors(db: AsyncSession, sort_keys: Iterable[SortKey]) -> List[str]:
+    """
+    文章发布 / 撤回 / 删除（或已发布文章改标题、slug）并提交后调用：删除原位置两侧文章的详情缓存。
+    sort_keys 为变化文章的排序键（撤回 / 删除时为变化前的排序键），返回受影响的 slug。
+    """
+    slugs = sorted(await neighbor_slugs(db, sort_keys))
+    if slugs:
+        await delete_cache(*(key for slug in slugs for key in post_detail_cache_keys(slug)))
+    return slugs
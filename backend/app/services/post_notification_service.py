@@ -0,0 +1,80 @@
+"""新文章发布通知：向已订阅的活跃用户发送邮件（后台任务），供手动发布、批量发布与定时发布共用"""
+import asyncio
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config_loader import get_email_config, get_site_basic_config
+from app.core.security import create_unsubscribe_token
+from app.models.user import User
+from app.services.email_service import email_service
+
+
+async def _send_new_post_notification_emails(
+    subscribers: List[tuple],
+    post_title: str,
+    post_excerpt: Optional[str],
+    post_url: str,
+    site_title: str,
+    site_url: str,
+    smtp_config: dict,
+) -> None:
+    """后台任务：向已订阅用户发送新文章发布通知，每封邮件带取消订阅链接。subscribers: [(email, user_id), ...]"""
+    for to_email, user_id in subscribers:
+        if to_email and user_id:
+            token = create_unsubscribe_token(user_id)
+            unsubscribe_url = f"{site_url.rstrip('/')}/unsubscribe?token={token}"
+            await email_service.send_new_post_notification(
+                to_email,
+                post_title,
+                post_excerpt,
+                post_url,
+                site_title,
+                smtp_config=smtp_config,
+                unsubscribe_url=unsubscribe_url,
+            )
+
+
+async def _send_new_posts_notification_emails(
+    subscribers: List[tuple],
+    posts: List[Tuple[str, Optional[str], str]],
+    site_title: str,
+    site_url: str,
+    smtp_config: dict,
+) -> None:
+    """后台任务：依次发送每篇新文章的通知。posts: [(title, excerpt, post_url), ...]"""
+    for post_title, post_excerpt, post_url in posts:
+        await _send_new_post_notification_emails(
+            subscribers, post_title, post_excerpt, post_url, site_title, site_url, smtp_config
+        )
+
+
+async def queue_new_post_notifications(db: AsyncSession, posts: Sequence[Tuple[str, Optional[str], str]]) -> None:
+    """
+    文章发布提交后调用，posts: [(title, excerpt, slug), ...]。
+    邮件 / 站点配置与订阅用户只查询一次，全部通知在一个后台任务中发送；未配置站点地址时不发送。
+    """
+    if not posts:
+        return
+    email_config = await get_email_config(db)
+    site_basic = await get_site_basic_config(db)
+    site_url = (site_basic.get("site_url") or "").strip().rstrip("/")
+    site_title = site_basic.get("site_title") or "博客"
+    if not site_url:
+        return
+    result = await db.execute(
+        select(User.email, User.id).where(
+            User.is_active == True, User.is_subscribed == True
+        )
+    )
+    subscribers = [(row[0], row[1]) for row in result.all()]
+    asyncio.create_task(
+        _send_new_posts_notification_emails(
+            subscribers,
+            [(title, excerpt, f"{site_url}/posts/{slug}") for title, excerpt, slug in posts],
+            site_title,
+            site_url,
+            email_config,
+        )
+    )
@@ -0,0 +1,43 @@
+"""
+文章查询的公共投影。
+
+列表类接口只需要 PostListResponse 中的字段，正文 content（可达数十 KB）与渲染结果不应随列表一起加载。
+所有文章列表查询都应从 post_list_query() 出发。
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import load_only, selectinload
+
+from app.models.post import Post
+from app.models.user import User
+
+# PostListResponse 所需的列；keyset 游标依赖 published_at / created_at / id，author_id 用于加载作者
+LIST_COLUMNS = (
+    Post.id,
+    Post.title,
+    Post.slug,
+    Post.excerpt,
+    Post.cover_image,
+    Post.status,
+    Post.view_count,
+    Post.comment_count,
+    Post.word_count,
+    Post.reading_time,
+    Post.author_id,
+    Post.created_at,
+    Post.published_at,
+)
+
+
+def post_list_query(with_content: bool = False):
+    """
+    文章列表查询：只加载列表所需的列，以及作者 / 分类 / 标签。
+    未加载的列被访问时直接报错（raiseload），避免在异步环境中隐式懒加载。
+    with_content 用于确实需要正文的场景（如全文检索生成命中片段）。
+    """
+    columns = LIST_COLUMNS + (Post.content,) if with_content else LIST_COLUMNS
+    return select(Post).options(
+        load_only(*columns, raiseload=True),
+        selectinload(Post.author).load_only(User.id, User.username, User.avatar),
+        selectinload(Post.categories),
+        selectinload(Post.tags),
+    )
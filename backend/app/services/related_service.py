@@ -0,0 +1,382 @@
+"""
+相关文章推荐。
+
+得分 = TEXT_WEIGHT × 标题+正文 TF-IDF 余弦相似度 + TAG_WEIGHT × 标签 Jaccard + CATEGORY_WEIGHT × 分类 Jaccard，
+每篇已发布文章保留得分最高的 RELATED_SIZE 篇，写入 post_related 表。
+- 词频：标题 + 正文按全文检索的规则分词（search_service.tokenize），每篇只保留 MAX_TERMS_PER_POST 个高频词，
+  存入 post_term_vectors；IDF 在每次计算时由全部词频向量统计；
+- 保存文章后增量更新：只重新分词该文章，重算它自己以及「列表中包含它」或「它可能挤进其列表」的文章；
+- 每日批量任务重新分词全部文章并全量重算，修正增量更新的累积偏差（IDF 变化、标签 / 分类调整等）。
+相似度用 scipy.sparse 稀疏矩阵分块计算，在线程池中执行。
+"""
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import RELATED_NAMESPACE, acquire_lock, bump_namespace, release_lock
+from app.models.category import post_categories
+from app.models.post import Post, PostStatus
+from app.models.post_related import PostRelated, PostTermVector
+from app.models.tag import post_tags
+from app.services.search_service import tokenize
+
+logger = logging.getLogger(__name__)
+
+RELATED_SIZE = 10
+MAX_TERMS_PER_POST = 256
+# 标题中的词元额外计入的次数
+TITLE_BOOST = 3
+TEXT_WEIGHT = 0.6
+TAG_WEIGHT = 0.3
+CATEGORY_WEIGHT = 0.1
+# 低于该得分的文章不算相关
+MIN_SCORE = 0.05
+
+_MAX_CONTENT_CHARS = 50_000
+# 每次计算的得分矩阵行数（chunk × 文章总数 的稠密矩阵）
+_SCORE_CHUNK_ROWS = 256
+# 串行化各 worker 对 post_related 的写入（pg_advisory_xact_lock）
+_ADVISORY_LOCK_KEY = 0x72656C61
+REBUILD_LOCK_KEY = "lock:related:rebuild"
+REBUILD_LOCK_TTL = 3600
+
+
+def term_counts(title: str, content: str) -> Dict[str, int]:
+    """文章的词频（标题加权），只保留出现次数最多的 MAX_TERMS_PER_POST 个词元"""
+    counts = Counter(tokenize((content or "")[:_MAX_CONTENT_CHARS]))
+    for token in tokenize(title or ""):
+        counts[token] += TITLE_BOOST
+    return dict(counts.most_common(MAX_TERMS_PER_POST))
+
+
+@dataclass
+class _CorpusData:
+    """从数据库读取的原始数据，按 post_ids 顺序一一对应"""
+    post_ids: List[int]
+    terms: List[Dict[str, int]]
+    tags: List[Set[int]]
+    categories: List[Set[int]]
+
+
+@dataclass
+class _Corpus:
+    post_ids: np.ndarray
+    index: Dict[int, int]
+    text: sparse.csr_matrix  # 行 L2 归一化的 TF-IDF
+    tags: sparse.csr_matrix  # 0/1 关联矩阵
+    categories: sparse.csr_matrix
+
+
+def _sparse_rows(rows: Sequence[Dict[Any, float]]) -> sparse.csr_matrix:
+    vocabulary: Dict[Any, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for row in rows:
+        for key, value in row.items():
+            indices.append(vocabulary.setdefault(key, len(vocabulary)))
+            data.append(value)
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(len(rows), max(len(vocabulary), 1)),
+    )
+
+
+def _tfidf(term_rows: Sequence[Dict[str, int]]) -> sparse.csr_matrix:
+    counts = _sparse_rows(term_rows)
+    n = counts.shape[0]
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + n) / (1 + df)) + 1.0
+    weights = counts.copy()
+    # 亚线性词频：1 + log(tf)
+    weights.data = (1.0 + np.log(weights.data)) * idf[weights.indices]
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ weights)
+
+
+def _build_corpus(data: _CorpusData) -> _Corpus:
+    return _Corpus(
+        post_ids=np.asarray(data.post_ids, dtype=np.int64),
+        index={post_id: i for i, post_id in enumerate(data.post_ids)},
+        text=_tfidf(data.terms),
+        tags=_sparse_rows([dict.fromkeys(group, 1.0) for group in data.tags]),
+        categories=_sparse_rows([dict.fromkeys(group, 1.0) for group in data.categories]),
+    )
+
+
+def _jaccard(matrix: sparse.csr_matrix, rows: np.ndarray) -> np.ndarray:
+    intersection = (matrix[rows] @ matrix.T).toarray()
+    sizes = np.asarray(matrix.sum(axis=1)).ravel()
+    union = sizes[rows][:, None] + sizes[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def _scores(corpus: _Corpus, rows: np.ndarray) -> np.ndarray:
+    """rows 中每篇文章与全部文章的得分（len(rows) × N），自身为 -inf"""
+    scores = TEXT_WEIGHT * (corpus.text[rows] @ corpus.text.T).toarray()
+    scores += TAG_WEIGHT * _jaccard(corpus.tags, rows)
+    scores += CATEGORY_WEIGHT * _jaccard(corpus.categories, rows)
+    scores[np.arange(len(rows)), rows] = -np.inf
+    return scores
+
+
+def _top_related(corpus: _Corpus, rows: Iterable[int]) -> Dict[int, List[Tuple[int, float]]]:
+    """计算 rows 中每篇文章的相关列表：{post_id: [(related_post_id, score)]}，按得分降序"""
+    rows = np.fromiter(rows, dtype=np.intp)
+    k = min(RELATED_SIZE, len(corpus.post_ids) - 1)
+    result: Dict[int, List[Tuple[int, float]]] = {}
+    for start in range(0, len(rows), _SCORE_CHUNK_ROWS):
+        chunk = rows[start:start + _SCORE_CHUNK_ROWS]
+        scores = _scores(corpus, chunk)
+        for i, row in enumerate(chunk):
+            post_id = int(corpus.post_ids[row])
+            if k <= 0:
+                result[post_id] = []
+                continue
+            row_scores = scores[i]
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            top = top[np.argsort(-row_scores[top], kind="stable")]
+            result[post_id] = [
+                (int(corpus.post_ids[j]), float(row_scores[j])) for j in top if row_scores[j] >= MIN_SCORE
+            ]
+    return result
+
+
+def _compute_all(data: _CorpusData) -> Dict[int, List[Tuple[int, float]]]:
+    if not data.post_ids:
+        return {}
+    corpus = _build_corpus(data)
+    return _top_related(corpus, range(len(data.post_ids)))
+
+
+def _compute_incremental(
+    data: _CorpusData,
+    post_ids: Set[int],
+    current: Dict[int, Tuple[float, int]],
+    sources: Set[int],
+) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    current 为现有列表 {post_id: (最低得分, 条数)}，sources 为列表中包含 post_ids 的文章。
+    得分对称，因此变化文章与其它文章的一行得分即可判断它会挤进哪些文章的列表。
+    """
+    if not data.post_ids:
+        return {}
+    corpus = _build_corpus(data)
+    rows = {corpus.index[source] for source in sources if source in corpus.index}
+    changed = [corpus.index[post_id] for post_id in sorted(post_ids) if post_id in corpus.index]
+    if changed:
+        thresholds = np.full(len(corpus.post_ids), MIN_SCORE)
+        for other_id, (min_score, count) in current.items():
+            other_row = corpus.index.get(other_id)
+            if other_row is not None and count >= RELATED_SIZE:
+                thresholds[other_row] = max(MIN_SCORE, min_score)
+        rows.update(changed)
+        for start in range(0, len(changed), _SCORE_CHUNK_ROWS):
+            scores = _scores(corpus, np.asarray(changed[start:start + _SCORE_CHUNK_ROWS], dtype=np.intp))
+            rows.update(int(i) for i in np.nonzero((scores >= thresholds).any(axis=0))[0])
+    return _top_related(corpus, sorted(rows))
+
+
+async def _load_corpus_data(db: AsyncSession) -> _CorpusData:
+    result = await db.execute(
+        select(PostTermVector.post_id, PostTermVector.terms)
+        .join(Post, Post.id == PostTermVector.post_id)
+        .where(Post.status == PostStatus.PUBLISHED.value)
+        .order_by(PostTermVector.post_id)
+    )
+    rows = result.all()
+    tags: Dict[int, Set[int]] = defaultdict(set)
+    for post_id, tag_id in (await db.execute(select(post_tags.c.post_id, post_tags.c.tag_id))).all():
+        tags[post_id].add(tag_id)
+    categories: Dict[int, Set[int]] = defaultdict(set)
+    for post_id, category_id in (
+        await db.execute(select(post_categories.c.post_id, post_categories.c.category_id))
+    ).all():
+        categories[post_id].add(category_id)
+    return _CorpusData(
+        post_ids=[row.post_id for row in rows],
+        terms=[row.terms for row in rows],
+        tags=[tags.get(row.post_id, set()) for row in rows],
+        categories=[categories.get(row.post_id, set()) for row in rows],
+    )
+
+
+async def _upsert_term_vectors(db: AsyncSession, vectors: Dict[int, Dict[str, int]]) -> None:
+    if not vectors:
+        return
+    now = datetime.utcnow()
+    stmt = pg_insert(PostTermVector).values(
+        [{"post_id": post_id, "terms": terms, "updated_at": now} for post_id, terms in vectors.items()]
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[PostTermVector.post_id],
+            set_={"terms": stmt.excluded.terms, "updated_at": stmt.excluded.updated_at},
+        )
+    )
+
+
+async def _replace_related(
+    db: AsyncSession, results: Dict[int, List[Tuple[int, float]]], replace_all: bool = False
+) -> None:
+    if replace_all:
+        await db.execute(delete(PostRelated))
+    elif results:
+        await db.execute(delete(PostRelated).where(PostRelated.post_id.in_(list(results))))
+    values = [
+        {"post_id": post_id, "related_post_id": related_id, "score": score, "rank": rank}
+        for post_id, related in results.items()
+        for rank, (related_id, score) in enumerate(related)
+    ]
+    if values:
+        await db.execute(insert(PostRelated), values)
+
+
+async def _lock_related(db: AsyncSession) -> None:
+    # 事务级锁，提交 / 回滚时自动释放
+    await db.execute(select(func.pg_advisory_xact_lock(_ADVISORY_LOCK_KEY)))
+
+
+async def related_sources(db: AsyncSession, *post_ids: int) -> List[int]:
+    """相关列表中包含这些文章的文章 ID（删除文章前调用：外键级联会删掉这些记录）"""
+    result = await db.execute(
+        select(PostRelated.post_id).where(PostRelated.related_post_id.in_(post_ids)).distinct()
+    )
+    return list(result.scalars().all())
+
+
+async def refresh_related_posts(*post_ids: int, sources: Iterable[int] = ()) -> None:
+    """
+    文章新增 / 修改 / 删除后调用（后台任务）：增量更新相关文章并清除缓存，批量操作时一次传入全部文章。
+    文章已删除时，sources 传入删除前 related_sources() 的结果。
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await _lock_related(db)
+            result = await db.execute(
+                select(Post.id, Post.title, Post.content, Post.status).where(Post.id.in_(post_ids))
+            )
+            published = [row for row in result.all() if row.status == PostStatus.PUBLISHED.value]
+            loop = asyncio.get_running_loop()
+            if published:
+                await _upsert_term_vectors(db, await loop.run_in_executor(None, _term_counts_batch, published))
+            gone = set(post_ids) - {row.id for row in published}
+            if gone:
+                await db.execute(delete(PostTermVector).where(PostTermVector.post_id.in_(gone)))
+                await db.execute(delete(PostRelated).where(PostRelated.post_id.in_(gone)))
+
+            affected = set(sources) | set(await related_sources(db, *post_ids))
+            result = await db.execute(
+                select(PostRelated.post_id, func.min(PostRelated.score), func.count())
+                .group_by(PostRelated.post_id)
+            )
+            current = {row[0]: (row[1], row[2]) for row in result.all()}
+            data = await _load_corpus_data(db)
+
+            results = await loop.run_in_executor(
+                None, _compute_incremental, data, set(post_ids), current, affected
+            )
+            await _replace_related(db, results)
+            await db.commit()
+        await bump_namespace(RELATED_NAMESPACE)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception("增量更新相关文章失败 post_ids=%s: %s", post_ids, e)
+
+
+def _term_counts_batch(rows: Sequence[Any]) -> Dict[int, Dict[str, int]]:
+    return {row.id: term_counts(row.title, row.content) for row in rows}
+
+
+async def rebuild_related_posts(batch_size: int = 200) -> int:
+    """全量重算：重新分词全部已发布文章并重建 post_related，返回有相关列表的文章数"""
+    loop = asyncio.get_running_loop()
+    async with AsyncSessionLocal() as db:
+        last_id = 0
+        while True:
+            result = await db.execute(
+                select(Post.id, Post.title, Post.content)
+                .where(Post.status == PostStatus.PUBLISHED.value, Post.id > last_id)
+                .order_by(Post.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            vectors = await loop.run_in_executor(None, _term_counts_batch, rows)
+            await _upsert_term_vectors(db, vectors)
+            await db.commit()
+            last_id = rows[-1].id
+        await db.execute(
+            delete(PostTermVector).where(
+                PostTermVector.post_id.in_(select(Post.id).where(Post.status != PostStatus.PUBLISHED.value))
+            )
+        )
+
+        await _lock_related(db)
+        data = await _load_corpus_data(db)
+        results = await loop.run_in_executor(None, _compute_all, data)
+        await _replace_related(db, results, replace_all=True)
+        await db.commit()
+    await bump_namespace(RELATED_NAMESPACE)
+    return sum(1 for related in results.values() if related)
+
+
+async def _rebuild_once() -> None:
+    # 多个 worker 只需一个执行
+    token = await acquire_lock(REBUILD_LOCK_KEY, REBUILD_LOCK_TTL)
+    if token is None:
+        return
+    try:
+        count = await rebuild_related_posts()
+        logger.info("相关文章全量重算完成，共 %d 篇文章", count)
+    finally:
+        await release_lock(REBUILD_LOCK_KEY, token)
+
+
+def _seconds_until_next_rebuild(now: Optional[datetime] = None) -> float:
+    now = now or datetime.utcnow()
+    next_run = now.replace(hour=settings.RELATED_POSTS_REBUILD_HOUR, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def related_posts_rebuild_loop() -> None:
+    """后台任务：尚未计算过时启动后立即全量计算，此后每天 RELATED_POSTS_REBUILD_HOUR 点（UTC）全量重算"""
+    logger.info("相关文章重算任务启动")
+    try:
+        try:
+            async with AsyncSessionLocal() as db:
+                computed = await db.scalar(select(func.count()).select_from(PostTermVector))
+            if not computed:
+                await _rebuild_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("相关文章全量计算失败: %s", e)
+        while True:
+            await asyncio.sleep(_seconds_until_next_rebuild())
+            try:
+                await _rebuild_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("相关文章全量重算失败: %s", e)
+    except asyncio.CancelledError:
+        logger.info("相关文章重算任务已停止")
+        raise
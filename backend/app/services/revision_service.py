@@ -0,0 +1,289 @@
+"""
+文章修订历史（post_revisions）。
+
+每次保存后标题或正文有变化时记录一个版本：
+- 快照版本保存完整正文，其余版本只保存相对上一版本的行级差异，存储量随修改量而不是文章长度增长；
+- 距上一个快照已有 SNAPSHOT_INTERVAL 个版本，或快照之后累计的差异大小超过正文本身时写入新的快照，
+  因此还原任意版本最多读取一个快照加 SNAPSHOT_INTERVAL - 1 个差异（一次范围查询）；
+- 修改前的正文与最新版本不一致（历史之外的改动，如批量导入覆盖）时同样写入快照，保证差异链可还原。
+
+差异格式（JSON 数组）：["=", n] 复制上一版本的 n 行，["-", n] 跳过上一版本的 n 行，["+", [行, ...]] 插入新行。
+"""
+import asyncio
+import difflib
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.post import Post
+from app.models.post_revision import PostRevision
+
+SNAPSHOT_INTERVAL = 20
+# 差异行数超过该值时在线程池中计算
+_EXECUTOR_MIN_LINES = 2000
+
+
+def _digest(content: str) -> str:
+    return hashlib.sha256((content or "").encode()).hexdigest()
+
+
+def compute_delta(old: str, new: str) -> List[list]:
+    """new 相对 old 的行级差异"""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    delta: List[list] = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append(["=", i2 - i1])
+            continue
+        if i2 > i1:
+            delta.append(["-", i2 - i1])
+        if j2 > j1:
+            delta.append(["+", new_lines[j1:j2]])
+    return delta
+
+
+def apply_delta(old: str, delta: Sequence[list]) -> str:
+    old_lines = old.splitlines(keepends=True)
+    result: List[str] = []
+    position = 0
+    for op, value in delta:
+        if op == "=":
+            result.extend(old_lines[position:position + value])
+            position += value
+        elif op == "-":
+            position += value
+        else:
+            result.extend(value)
+    return "".join(result)
+
+
+def _reconstruct(rows: Sequence[Any]) -> str:
+    """rows 为一个快照及其后按版本排序的差异"""
+    content = rows[0].content or ""
+    for row in rows[1:]:
+        content = apply_delta(content, row.delta)
+    return content
+
+
+async def _run_cpu(func_, *args, lines: int = 0):
+    if lines < _EXECUTOR_MIN_LINES:
+        return func_(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, func_, *args)
+
+
+def _line_count(*texts: str) -> int:
+    return sum((text or "").count("\n") for text in texts)
+
+
+async def record_revision(
+    db: AsyncSession,
+    post_id: int,
+    title: str,
+    content: str,
+    author_id: Optional[int],
+    previous: Optional[Tuple[str, str]] = None,
+) -> Optional[PostRevision]:
+    """
+    在保存文章的事务中调用（提交前），标题与正文均未变化时不记录。
+    previous 为修改前的 (title, content)；文章还没有历史时先把它记为版本 1。
+    """
+    # 锁住文章行，串行化同一文章的版本号分配
+    await db.execute(select(Post.id).where(Post.id == post_id).with_for_update())
+    result = await db.execute(
+        select(PostRevision.version, PostRevision.title, PostRevision.content_hash)
+        .where(PostRevision.post_id == post_id)
+        .order_by(PostRevision.version.desc())
+        .limit(1)
+    )
+    latest = result.first()
+    digest = _digest(content)
+
+    if latest is None and previous is not None:
+        previous_title, previous_content = previous
+        if previous_title == title and previous_content == content:
+            return None
+        latest = _new_snapshot(post_id, 1, previous_title, previous_content, _digest(previous_content), None)
+        db.add(latest)
+        await db.flush()
+    elif latest is not None and latest.title == title and latest.content_hash == digest:
+        return None
+
+    version = (latest.version if latest is not None else 0) + 1
+    base = previous[1] if previous is not None else None
+    if latest is None or base is None or latest.content_hash != _digest(base):
+        revision = _new_snapshot(post_id, version, title, content, digest, author_id)
+    else:
+        revision = await _new_delta(db, post_id, version, title, base, content, digest, author_id)
+    db.add(revision)
+    await db.flush()
+    return revision
+
+
+def _new_snapshot(
+    post_id: int, version: int, title: str, content: str, digest: str, author_id: Optional[int]
+) -> PostRevision:
+    return PostRevision(
+        post_id=post_id,
+        version=version,
+        title=title,
+        is_snapshot=True,
+        content=content,
+        content_hash=digest,
+        content_length=len(content),
+        stored_size=len(content.encode()),
+        author_id=author_id,
+    )
+
+
+async def _new_delta(
+    db: AsyncSession,
+    post_id: int,
+    version: int,
+    title: str,
+    base: str,
+    content: str,
+    digest: str,
+    author_id: Optional[int],
+) -> PostRevision:
+    """相对上一版本的差异版本；差异链过长或累计过大时改为快照"""
+    last_snapshot = (
+        select(func.max(PostRevision.version))
+        .where(PostRevision.post_id == post_id, PostRevision.is_snapshot.is_(True))
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(last_snapshot, func.coalesce(func.sum(PostRevision.stored_size), 0))
+        .where(PostRevision.post_id == post_id, PostRevision.version > last_snapshot)
+    )
+    snapshot_version, chain_size = result.one()
+    if snapshot_version is None or version - snapshot_version >= SNAPSHOT_INTERVAL:
+        return _new_snapshot(post_id, version, title, content, digest, author_id)
+
+    delta = await _run_cpu(compute_delta, base, content, lines=_line_count(base, content))
+    size = len(orjson.dumps(delta))
+    content_size = len(content.encode())
+    if chain_size + size > content_size:
+        return _new_snapshot(post_id, version, title, content, digest, author_id)
+    return PostRevision(
+        post_id=post_id,
+        version=version,
+        title=title,
+        is_snapshot=False,
+        delta=delta,
+        content_hash=digest,
+        content_length=len(content),
+        stored_size=size,
+        author_id=author_id,
+    )
+
+
+async def list_revisions(db: AsyncSession, post_id: int, page: int, size: int) -> Tuple[List[Any], int]:
+    """按版本倒序分页，不读取正文 / 差异"""
+    total = await db.scalar(
+        select(func.count()).select_from(PostRevision).where(PostRevision.post_id == post_id)
+    )
+    result = await db.execute(
+        select(
+            PostRevision.version,
+            PostRevision.title,
+            PostRevision.is_snapshot,
+            PostRevision.content_length,
+            PostRevision.stored_size,
+            PostRevision.author_id,
+            PostRevision.created_at,
+        )
+        .where(PostRevision.post_id == post_id)
+        .order_by(PostRevision.version.desc())
+        .offset((page - 1) * size)
+        .limit(size)
+    )
+    return result.all(), total or 0
+
+
+async def get_revision(db: AsyncSession, post_id: int, version: int) -> Optional[Dict[str, Any]]:
+    """还原指定版本：一次读取不晚于该版本的最近快照及其后的差异"""
+    snapshot_version = (
+        select(func.max(PostRevision.version))
+        .where(
+            PostRevision.post_id == post_id,
+            PostRevision.is_snapshot.is_(True),
+            PostRevision.version <= version,
+        )
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            PostRevision.version,
+            PostRevision.title,
+            PostRevision.content,
+            PostRevision.delta,
+            PostRevision.content_hash,
+            PostRevision.content_length,
+            PostRevision.author_id,
+            PostRevision.created_at,
+        )
+        .where(
+            PostRevision.post_id == post_id,
+            PostRevision.version >= snapshot_version,
+            PostRevision.version <= version,
+        )
+        .order_by(PostRevision.version)
+    )
+    rows = result.all()
+    if not rows or rows[-1].version != version:
+        return None
+    target = rows[-1]
+    lines = sum(_line_count(row.content) for row in rows) + sum(len(row.delta or ()) for row in rows)
+    content = await _run_cpu(_reconstruct, rows, lines=lines)
+    return {
+        "version": target.version,
+        "title": target.title,
+        "content": content,
+        "content_hash": target.content_hash,
+        "content_length": target.content_length,
+        "author_id": target.author_id,
+        "created_at": target.created_at,
+    }
+
+
+def _unified_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    old_lines = old["content"].splitlines(keepends=True)
+    new_lines = new["content"].splitlines(keepends=True)
+    additions = deletions = 0
+    diff: List[str] = []
+    for line in difflib.unified_diff(
+        old_lines, new_lines, fromfile=f"v{old['version']}", tofile=f"v{new['version']}"
+    ):
+        if not line.endswith("\n"):
+            line += "\n\\ No newline at end of file\n"
+        if line.startswith("+") and not line.startswith("+++"):
+            additions += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            deletions += 1
+        diff.append(line)
+    return {"diff": "".join(diff), "additions": additions, "deletions": deletions}
+
+
+async def diff_revisions(
+    db: AsyncSession, post_id: int, from_version: int, to_version: int
+) -> Optional[Dict[str, Any]]:
+    """两个版本之间的 unified diff，任一版本不存在时返回 None"""
+    old = await get_revision(db, post_id, from_version)
+    new = await get_revision(db, post_id, to_version)
+    if old is None or new is None:
+        return None
+    result = await _run_cpu(
+        _unified_diff, old, new, lines=_line_count(old["content"], new["content"])
+    )
+    return {
+        "from_version": from_version,
+        "to_version": to_version,
+        "from_title": old["title"],
+        "to_title": new["title"],
+        **result,
+    }
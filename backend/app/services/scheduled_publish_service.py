@@ -0,0 +1,211 @@
+"""
+定时发布：状态为 SCHEDULED 的文章在 published_at（UTC）到达时自动发布。
+
+- Redis 有序集合 SCHEDULED_POSTS_KEY 记录待发布文章（member 为文章 ID，score 为发布时间戳），
+  保存 / 撤销定时后更新，并在 SCHEDULE_CHANNEL 上广播；
+- 每个 worker 运行一个计时任务：只睡眠到最早一项到期（收到广播时提前醒来重新计算），
+  到期后以 ZREM 认领，删除成功的 worker 才执行发布，因此多 worker 下每篇文章只发布一次；
+- 发布以数据库为准（status = SCHEDULED 且 published_at 已到），随后清除缓存、更新订阅源 / 相关文章 / 静态快照并通知订阅用户；
+- 启动时按数据库重建有序集合：Redis 数据丢失、或认领后进程退出未完成的发布都会补上。
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import POST_LIST_NAMESPACE, bump_namespace, delete_cache, get_redis, post_detail_cache_keys
+from app.models.post import Post, PostStatus
+from app.services.feed_service import invalidate_post_feeds
+from app.services.post_neighbor_service import invalidate_post_neighbors
+from app.services.post_notification_service import queue_new_post_notifications
+from app.services.related_service import refresh_related_posts
+from app.services.suggest_service import index_post_suggestions
+from app.services.snapshot_service import PostSnapshotChange, schedule_posts_snapshot
+from app.services.taxonomy_count_service import invalidate_post_counts
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_POSTS_KEY = "post:scheduled"
+# 发布时是否通知订阅用户：{post_id: "1" / "0"}，缺省为通知
+SCHEDULED_NOTIFY_KEY = "post:scheduled:notify"
+SCHEDULE_CHANNEL = "post:scheduled:wakeup"
+# 没有广播时最长的睡眠时间（广播可能在重连期间丢失）
+_MAX_SLEEP_SECONDS = 300
+# 认领后发布失败时，延后重试的秒数
+_RETRY_DELAY_SECONDS = 30
+_RECONNECT_DELAY_SECONDS = 1
+_CLAIM_BATCH = 50
+
+
+def _timestamp(value: datetime) -> float:
+    """数据库中的时间为不带时区的 UTC"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """请求中的时间统一转换为不带时区的 UTC（不带时区时视为 UTC）"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def schedule_post(post_id: int, publish_at: datetime, notify: Optional[bool] = None) -> None:
+    """文章设为定时发布（或修改发布时间）并提交后调用；notify 为 None 时保留原有的通知设置"""
+    r = await get_redis()
+    pipe = r.pipeline(transaction=True)
+    pipe.zadd(SCHEDULED_POSTS_KEY, {str(post_id): _timestamp(publish_at)})
+    if notify is not None:
+        pipe.hset(SCHEDULED_NOTIFY_KEY, str(post_id), "1" if notify else "0")
+    pipe.publish(SCHEDULE_CHANNEL, str(post_id))
+    await pipe.execute()
+
+
+async def unschedule_posts(*post_ids: int) -> None:
+    """文章取消定时（改为草稿 / 立即发布 / 删除）并提交后调用"""
+    if not post_ids:
+        return
+    members = [str(post_id) for post_id in post_ids]
+    r = await get_redis()
+    pipe = r.pipeline(transaction=True)
+    pipe.zrem(SCHEDULED_POSTS_KEY, *members)
+    pipe.hdel(SCHEDULED_NOTIFY_KEY, *members)
+    pipe.publish(SCHEDULE_CHANNEL, members[0])
+    await pipe.execute()
+
+
+async def sync_scheduled_posts() -> int:
+    """按数据库重建有序集合（保留已有的通知设置），返回待发布文章数"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Post.id, Post.published_at).where(
+                Post.status == PostStatus.SCHEDULED.value, Post.published_at.is_not(None)
+            )
+        )
+        scheduled = {str(row.id): _timestamp(row.published_at) for row in result.all()}
+    r = await get_redis()
+    stale = [member for member in await r.zrange(SCHEDULED_POSTS_KEY, 0, -1) if member not in scheduled]
+    pipe = r.pipeline(transaction=True)
+    if stale:
+        pipe.zrem(SCHEDULED_POSTS_KEY, *stale)
+        pipe.hdel(SCHEDULED_NOTIFY_KEY, *stale)
+    if scheduled:
+        pipe.zadd(SCHEDULED_POSTS_KEY, scheduled)
+    pipe.publish(SCHEDULE_CHANNEL, "sync")
+    await pipe.execute()
+    return len(scheduled)
+
+
+async def publish_scheduled_post(post_id: int, notify: bool = True) -> bool:
+    """发布一篇到期的定时文章（已认领），返回是否发布"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Post)
+            .where(
+                Post.id == post_id,
+                Post.status == PostStatus.SCHEDULED.value,
+                Post.published_at <= datetime.utcnow(),
+            )
+            .values(status=PostStatus.PUBLISHED.value, updated_at=Post.updated_at)
+            .returning(
+                Post.id, Post.slug, Post.title, Post.excerpt, Post.published_at, Post.created_at, Post.view_count
+            )
+            .execution_options(synchronize_session=False)
+        )
+        row = result.first()
+        if row is None:
+            # 已撤销 / 已发布，或发布时间被改晚而广播丢失：按数据库重新加入
+            published_at = await db.scalar(
+                select(Post.published_at).where(Post.id == post_id, Post.status == PostStatus.SCHEDULED.value)
+            )
+            if published_at is not None:
+                await schedule_post(post_id, published_at)
+            return False
+        await db.commit()
+
+        await bump_namespace(POST_LIST_NAMESPACE)
+        await delete_cache(*post_detail_cache_keys(row.slug))
+        await invalidate_post_feeds(row.id)
+        await invalidate_post_counts()
+        sort_key = (row.published_at, row.created_at, row.id)
+        neighbors = await invalidate_post_neighbors(db, [sort_key])
+        await index_post_suggestions([row])
+        asyncio.create_task(refresh_related_posts(row.id))
+        schedule_posts_snapshot([PostSnapshotChange([row.slug, *neighbors], sort_key, shifted=True)])
+        if notify:
+            await queue_new_post_notifications(db, [(row.title, row.excerpt, row.slug)])
+    logger.info("定时发布文章 %s（%s）", row.id, row.slug)
+    return True
+
+
+async def _publish_due(r) -> None:
+    """认领并发布全部已到期的文章"""
+    while True:
+        members = await r.zrangebyscore(
+            SCHEDULED_POSTS_KEY, "-inf", datetime.now(timezone.utc).timestamp(), start=0, num=_CLAIM_BATCH
+        )
+        if not members:
+            return
+        for member in members:
+            notify = await r.hget(SCHEDULED_NOTIFY_KEY, member)
+            if not await r.zrem(SCHEDULED_POSTS_KEY, member):
+                continue  # 已被其它 worker 认领
+            try:
+                if await publish_scheduled_post(int(member), notify=notify != "0"):
+                    await r.hdel(SCHEDULED_NOTIFY_KEY, member)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("定时发布文章 %s 失败，%s 秒后重试: %s", member, _RETRY_DELAY_SECONDS, e)
+                retry_at = datetime.now(timezone.utc).timestamp() + _RETRY_DELAY_SECONDS
+                await r.zadd(SCHEDULED_POSTS_KEY, {member: retry_at})
+
+
+async def _seconds_until_next(r) -> float:
+    head = await r.zrange(SCHEDULED_POSTS_KEY, 0, 0, withscores=True)
+    if not head:
+        return _MAX_SLEEP_SECONDS
+    delay = head[0][1] - datetime.now(timezone.utc).timestamp()
+    return min(max(delay, 0.0), _MAX_SLEEP_SECONDS)
+
+
+async def scheduled_publish_loop() -> None:
+    """后台任务：每个 worker 各运行一个，睡眠到下一篇定时文章到期"""
+    logger.info("定时发布任务启动")
+    try:
+        try:
+            count = await sync_scheduled_posts()
+            if count:
+                logger.info("待定时发布文章 %d 篇", count)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("同步定时发布文章失败: %s", e)
+        while True:
+            pubsub = None
+            try:
+                r = await get_redis()
+                pubsub = r.pubsub()
+                await pubsub.subscribe(SCHEDULE_CHANNEL)
+                while True:
+                    await _publish_due(r)
+                    timeout = await _seconds_until_next(r)
+                    if timeout > 0:
+                        # 有广播（定时变化）时提前醒来重新计算
+                        await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("定时发布任务中断，%s 秒后重试: %s", _RECONNECT_DELAY_SECONDS, e)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.reset()
+                    except Exception:
+                        pass
+            await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+    except asyncio.CancelledError:
+        logger.info("定时发布任务已停止")
+        raise
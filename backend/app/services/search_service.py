@@ -0,0 +1,179 @@
+"""
+文章全文检索服务。
+
+PostgreSQL 内置分词器无法切分中文，因此分词在应用层完成：
+- 连续的中日韩字符按二元组（bigram）切分，单个字保留为单字；
+- 其它字母数字按单词切分并转小写。
+分词结果以空格拼接后交给 to_tsvector('simple', ...)，标题权重 A、正文权重 B，
+写入 posts.search_vector（GIN 索引）。查询词按同样规则切分，同一段中文内的二元组用 <-> 连接做短语匹配。
+"""
+import asyncio
+import html
+import logging
+import re
+from typing import List, Optional
+
+from sqlalchemy import func, literal_column, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+_MARKDOWN_NOISE_RE = re.compile(r"```[a-zA-Z0-9_+-]*|[#>*`_~|]+|!?\[([^\]]*)\]\([^)]*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 正文参与索引的最大长度，避免超长文章撑爆 tsvector（上限 1MB）
+_MAX_INDEXED_CHARS = 100_000
+_SIMPLE = literal_column("'simple'::regconfig")
+# setweight 的权重参数类型为 "char"，绑定参数会被当作 varchar 导致函数匹配失败
+_WEIGHT_A = literal_column("'A'::\"char\"")
+_WEIGHT_B = literal_column("'B'::\"char\"")
+
+
+def _split_runs(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text or "")
+
+
+def _run_tokens(run: str) -> List[str]:
+    if _CJK_RE.match(run):
+        if len(run) == 1:
+            return [run]
+        return [run[i:i + 2] for i in range(len(run) - 1)]
+    return [run.lower()]
+
+
+def tokenize(text: str) -> List[str]:
+    """将文本切分为检索词元（中文二元组 + 小写单词）"""
+    tokens: List[str] = []
+    for run in _split_runs(text):
+        tokens.extend(_run_tokens(run))
+    return tokens
+
+
+def prefix_starts(text: str) -> List[int]:
+    """输入联想可从哪些位置开始前缀匹配：每个单词的开头，以及中日韩文本中的每个字"""
+    starts: List[int] = []
+    for match in _TOKEN_RE.finditer(text or ""):
+        if _CJK_RE.match(match.group()):
+            starts.extend(range(match.start(), match.end()))
+        else:
+            starts.append(match.start())
+    return starts
+
+
+def build_tsquery(query: str) -> Optional[str]:
+    """将用户输入转换为 to_tsquery 语法，无有效词元时返回 None"""
+    parts: List[str] = []
+    for run in _split_runs(query):
+        tokens = _run_tokens(run)
+        if len(tokens) == 1 and _CJK_RE.match(run):
+            # 单个汉字只能前缀匹配二元组
+            parts.append(f"'{tokens[0]}':*")
+        else:
+            parts.append("(" + " <-> ".join(f"'{t}'" for t in tokens) + ")")
+    if not parts:
+        return None
+    return " & ".join(parts)
+
+
+def search_vector_expression(title: str, content: str):
+    """构造 posts.search_vector 的 SQL 表达式：标题权重 A，正文权重 B"""
+    title_doc = " ".join(tokenize(title))
+    body_doc = " ".join(tokenize((content or "")[:_MAX_INDEXED_CHARS]))
+    return func.setweight(func.to_tsvector(_SIMPLE, title_doc), _WEIGHT_A).op("||")(
+        func.setweight(func.to_tsvector(_SIMPLE, body_doc), _WEIGHT_B)
+    )
+
+
+def tsquery_expression(tsquery: str):
+    return func.to_tsquery(_SIMPLE, tsquery)
+
+
+def rank_expression(tsquery: str):
+    """ts_rank 默认权重 {D:0.1, C:0.2, B:0.4, A:1.0}，标题命中排在正文命中之前"""
+    return func.ts_rank(Post.search_vector, tsquery_expression(tsquery))
+
+
+async def index_post(db: AsyncSession, post_id: int, title: str, content: str) -> None:
+    """增量更新单篇文章的检索向量（由调用方提交事务）"""
+    await db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        # 索引维护不属于内容修改，保持 updated_at 不变
+        .values(search_vector=search_vector_expression(title, content), updated_at=Post.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def reindex_missing_posts(batch_size: int = 200) -> int:
+    """为尚未建立检索向量的文章补建索引（启动时后台执行），返回处理数量"""
+    total = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            while True:
+                result = await db.execute(
+                    select(Post.id, Post.title, Post.content)
+                    .where(Post.search_vector.is_(None))
+                    .order_by(Post.id)
+                    .limit(batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+                for row in rows:
+                    await index_post(db, row.id, row.title, row.content)
+                await db.commit()
+                total += len(rows)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception("补建全文检索索引失败: %s", e)
+    if total:
+        logger.info("已为 %d 篇文章补建全文检索索引", total)
+    return total
+
+
+def _plain_text(content: str) -> str:
+    text = _MARKDOWN_NOISE_RE.sub(lambda m: m.group(1) or " ", content or "")
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def build_snippet(content: str, query: str, width: int = 120) -> Optional[str]:
+    """
+    生成命中片段：以第一个命中的查询词为中心截取正文，HTML 转义后用 <mark> 标记命中词。
+    未命中时返回 None。
+    """
+    terms = sorted({run.lower() for run in _split_runs(query)}, key=len, reverse=True)
+    if not terms:
+        return None
+    text = _plain_text(content)
+    lowered = text.lower()
+    positions = [pos for pos in (lowered.find(t) for t in terms) if pos >= 0]
+    if not positions:
+        return None
+
+    first = min(positions)
+    start = max(0, first - width // 3)
+    end = min(len(text), start + width)
+    window = text[start:end]
+
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    pieces: List[str] = []
+    last = 0
+    for m in pattern.finditer(window):
+        pieces.append(html.escape(window[last:m.start()]))
+        pieces.append(f"<mark>{html.escape(m.group(0))}</mark>")
+        last = m.end()
+    pieces.append(html.escape(window[last:]))
+
+    snippet = "".join(pieces)
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(text):
+        snippet += "…"
+    return snippet
@@ -0,0 +1,496 @@
+"""
+公开站点的静态 JSON 快照导出（供 CDN 直接提供，匿名读请求不再经过 FastAPI / Redis / PostgreSQL）。
+
+导出内容与对应公开接口的响应完全一致（直接调用接口的加载函数）：
+    posts/published/page-{n}.json   GET /posts/published?page={n}&size=SNAPSHOT_POST_PAGE_SIZE
+    posts/{slug}.json               GET /posts/{slug}
+    posts/{slug}.rendered.json      GET /posts/{slug}?render=true
+    config/structured/all.json      GET /config/structured/all
+    categories/page-{n}.json        GET /categories/?page={n}&size=SNAPSHOT_LIST_PAGE_SIZE
+    categories/tree.json            GET /categories/tree
+    tags/page-{n}.json              GET /tags/?page={n}&size=SNAPSHOT_LIST_PAGE_SIZE
+
+版本化：每次导出版本号加一，内容有变化的文件写入 v{版本}/{路径}，写入后不再修改（可长期缓存）；
+根目录的 manifest.json 记录每个路径当前对应的对象与内容哈希，客户端先读 manifest 再取文件。
+内容哈希与 manifest 一致的文件不重写，文章变化时只重新生成受影响的文件（见 schedule_post_snapshot）。
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import boto3
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import dump_json
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.slug import is_valid_slug
+from app.models.post import Post, PostStatus
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_POST_PAGE_SIZE = 10  # 与前端文章列表页一致
+SNAPSHOT_LIST_PAGE_SIZE = 100  # 与前端分类 / 标签筛选一致
+MANIFEST_PATH = "manifest.json"
+
+_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_MANIFEST_CACHE_CONTROL = "public, max-age=60"
+_VERSION_DIR_RE = re.compile(r"^v(\d+)/")
+# 串行化各 worker 的导出（pg_advisory_xact_lock），manifest 的读改写不会相互覆盖
+_ADVISORY_LOCK_KEY = 0x736E6170
+
+
+class SnapshotError(Exception):
+    """快照目标未配置或不可用"""
+
+
+# ---------- 存储目标（同步实现，在线程池中调用） ----------
+
+class LocalSnapshotTarget:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def __str__(self) -> str:
+        return str(self.root)
+
+    def _path(self, key: str) -> Path:
+        """对象路径，拒绝解析后落在快照目录之外的 key（如包含 .. 的 slug）"""
+        root = self.root.resolve()
+        path = (root / key).resolve()
+        if not path.is_relative_to(root) or path == root:
+            raise SnapshotError(f"快照路径越界: {key}")
+        return path
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        return path.read_bytes() if path.exists() else None
+
+    def write(self, key: str, body: bytes, cache_control: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再替换，读取方不会看到写了一半的文件
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+
+    def list_keys(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return [p.relative_to(self.root).as_posix() for p in self.root.rglob("*") if p.is_file()]
+
+    def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._path(key).unlink(missing_ok=True)
+
+
+class OssSnapshotTarget:
+    def __init__(self, client, bucket: str, prefix: str):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def __str__(self) -> str:
+        return f"oss://{self.bucket}/{self.prefix}"
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def read(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def write(self, key: str, body: bytes, cache_control: str) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            Body=body,
+            ContentType="application/json",
+            CacheControl=cache_control,
+        )
+
+    def list_keys(self) -> List[str]:
+        keys: List[str] = []
+        start = len(self.prefix) + 1 if self.prefix else 0
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key("")):
+            keys.extend(obj["Key"][start:] for obj in page.get("Contents", []))
+        return keys
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        for i in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": self._key(k)} for k in keys[i:i + 1000]], "Quiet": True},
+            )
+
+
+def _default_snapshot_dir() -> Path:
+    return Path(settings.SNAPSHOT_DIR) if settings.SNAPSHOT_DIR else Path(__file__).resolve().parent.parent / "snapshots"
+
+
+def get_snapshot_target(target: Optional[str] = None, directory: Optional[str] = None):
+    """按名称（local / oss，默认 SNAPSHOT_TARGET）创建存储目标"""
+    target = (target or settings.SNAPSHOT_TARGET or "").lower()
+    if target == "local":
+        return LocalSnapshotTarget(Path(directory) if directory else _default_snapshot_dir())
+    if target == "oss":
+        if not settings.AWS_ACCESS_KEY_ID or not settings.AWS_SECRET_ACCESS_KEY or not settings.S3_BUCKET_NAME:
+            raise SnapshotError("OSS 未配置访问密钥或 Bucket")
+        session = boto3.session.Session(
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION,
+        )
+        client = session.client("s3", endpoint_url=settings.OSS_ENDPOINT or None)
+        return OssSnapshotTarget(client, settings.S3_BUCKET_NAME, settings.SNAPSHOT_OSS_PREFIX)
+    raise SnapshotError(f"不支持的快照目标: {target or '（未配置）'}")
+
+
+def snapshot_enabled() -> bool:
+    return bool(settings.SNAPSHOT_TARGET)
+
+
+# ---------- 一次导出 ----------
+
+@dataclass
+class _Build:
+    target: Any
+    version: int
+    files: Dict[str, Dict[str, Any]]
+    written: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.written or self.removed)
+
+    async def put(self, path: str, body: bytes) -> None:
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        if self.files.get(path, {}).get("hash") == digest:
+            return
+        key = f"v{self.version}/{path}"
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.target.write, key, body, _IMMUTABLE_CACHE_CONTROL
+        )
+        self.files[path] = {"key": key, "hash": digest, "size": len(body)}
+        self.written.append(path)
+
+    def remove(self, path: str) -> None:
+        # 只从 manifest 中移除，对象由 prune 清理
+        if self.files.pop(path, None) is not None:
+            self.removed.append(path)
+
+    def remove_prefix_pages(self, prefix: str, pages: int) -> None:
+        """移除 {prefix}page-{n}.json 中 n > pages 的文件"""
+        for path in [p for p in self.files if p.startswith(prefix)]:
+            match = re.fullmatch(re.escape(prefix) + r"page-(\d+)\.json", path)
+            if match and int(match.group(1)) > pages:
+                self.remove(path)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "target": str(self.target),
+            "version": self.version,
+            "files": len(self.files),
+            "written": len(self.written),
+            "removed": len(self.removed),
+        }
+
+
+async def _read_manifest(target) -> Dict[str, Any]:
+    data = await asyncio.get_running_loop().run_in_executor(None, target.read, MANIFEST_PATH)
+    if not data:
+        return {"format": SNAPSHOT_FORMAT, "version": 0, "files": {}}
+    return orjson.loads(data)
+
+
+async def _start_build(target) -> _Build:
+    manifest = await _read_manifest(target)
+    files = manifest.get("files", {}) if manifest.get("format") == SNAPSHOT_FORMAT else {}
+    return _Build(target=target, version=int(manifest.get("version", 0)) + 1, files=dict(files))
+
+
+async def _finish_build(build: _Build) -> None:
+    if not build.changed:
+        return
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": build.version,
+        "generated_at": datetime.utcnow().isoformat(),
+        "files": build.files,
+    }
+    await asyncio.get_running_loop().run_in_executor(
+        None, build.target.write, MANIFEST_PATH, orjson.dumps(manifest), _MANIFEST_CACHE_CONTROL
+    )
+
+
+def _loaders():
+    # 接口模块会导入本模块（保存文章后触发增量导出），延迟导入避免循环依赖；
+    # 取 __wrapped__ 跳过 @cached_endpoint，直接得到接口整理好的数据
+    from app.api.v1 import categories, config, posts, tags
+
+    return {
+        "published": posts.get_published_posts.__wrapped__,
+        "detail": posts._get_post_detail.__wrapped__,
+        "config": config.get_structured_configs.__wrapped__,
+        "categories": categories.get_categories.__wrapped__,
+        "category_tree": categories.get_category_tree.__wrapped__,
+        "tags": tags.get_tags.__wrapped__,
+    }
+
+
+async def _export_published_pages(build: _Build, db: AsyncSession, from_page: int = 1, to_page: Optional[int] = None) -> None:
+    load = _loaders()["published"]
+    page = from_page
+    while True:
+        data = await load(
+            page=page, size=SNAPSHOT_POST_PAGE_SIZE, category_id=None, include_descendants=False, tag_id=None,
+            search=None, cursor=None, with_total=False, db=db,
+        )
+        await build.put(f"posts/published/page-{page}.json", dump_json(data))
+        if page >= data["pages"] or (to_page is not None and page >= to_page):
+            break
+        page += 1
+    build.remove_prefix_pages("posts/published/", data["pages"])
+
+
+async def _export_post(build: _Build, db: AsyncSession, slug: str) -> None:
+    if not is_valid_slug(slug):
+        # 历史数据中的非法 slug 无法安全映射为文件路径，跳过（公开接口同样无法路由到这类文章）
+        logger.warning("跳过 slug 非法的文章快照: %r", slug)
+        return
+    load = _loaders()["detail"]
+    for render, path in ((False, f"posts/{slug}.json"), (True, f"posts/{slug}.rendered.json")):
+        try:
+            data = await load(slug=slug, render=render, db=db)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+            data = None
+        if data is None or data["status"] != PostStatus.PUBLISHED.value:
+            build.remove(path)
+        else:
+            await build.put(path, dump_json(data))
+
+
+async def _export_paginated(build: _Build, db: AsyncSession, name: str) -> None:
+    load = _loaders()[name]
+    page = 1
+    while True:
+        data = await load(page=page, size=SNAPSHOT_LIST_PAGE_SIZE, db=db)
+        await build.put(f"{name}/page-{page}.json", dump_json(data))
+        if page >= data["pages"]:
+            break
+        page += 1
+    build.remove_prefix_pages(f"{name}/", data["pages"])
+
+
+async def _export_category_tree(build: _Build, db: AsyncSession) -> None:
+    data = await _loaders()["category_tree"](db=db)
+    await build.put("categories/tree.json", dump_json(data))
+
+
+async def _export_config(build: _Build, db: AsyncSession) -> None:
+    data = await _loaders()["config"](db=db)
+    await build.put("config/structured/all.json", dump_json(data))
+
+
+def _post_slug_from_path(path: str) -> Optional[str]:
+    if not path.startswith("posts/") or path.startswith("posts/published/"):
+        return None
+    name = path[len("posts/"):]
+    return name.removesuffix(".json").removesuffix(".rendered")
+
+
+async def _lock(db: AsyncSession) -> None:
+    await db.execute(select(func.pg_advisory_xact_lock(_ADVISORY_LOCK_KEY)))
+
+
+def _prune(build: _Build) -> int:
+    """删除不再被 manifest 引用、且早于最近 SNAPSHOT_KEEP_VERSIONS 个版本的对象"""
+    referenced = {entry["key"] for entry in build.files.values()}
+    oldest_kept = build.version - settings.SNAPSHOT_KEEP_VERSIONS
+    stale = []
+    for key in build.target.list_keys():
+        match = _VERSION_DIR_RE.match(key)
+        if match and key not in referenced and int(match.group(1)) <= oldest_kept:
+            stale.append(key)
+    build.target.delete(stale)
+    return len(stale)
+
+
+async def export_snapshot(target: Optional[str] = None, directory: Optional[str] = None, prune: bool = True) -> Dict[str, Any]:
+    """全量导出公开接口快照（内容未变化的文件不重写），返回导出摘要"""
+    snapshot_target = get_snapshot_target(target, directory)
+    async with AsyncSessionLocal() as db:
+        await _lock(db)
+        build = await _start_build(snapshot_target)
+
+        result = await db.execute(select(Post.slug).where(Post.status == PostStatus.PUBLISHED.value).order_by(Post.id))
+        slugs: Set[str] = set(result.scalars().all())
+        for slug in sorted(slugs):
+            await _export_post(build, db, slug)
+            # 逐篇导出时释放已加载的对象，避免会话中堆积全部文章
+            db.expunge_all()
+        for path in list(build.files):
+            slug = _post_slug_from_path(path)
+            if slug is not None and slug not in slugs:
+                build.remove(path)
+
+        await _export_published_pages(build, db)
+        await _export_paginated(build, db, "categories")
+        await _export_category_tree(build, db)
+        await _export_paginated(build, db, "tags")
+        await _export_config(build, db)
+        await _finish_build(build)
+
+        summary = build.summary()
+        if prune:
+            summary["pruned"] = await asyncio.get_running_loop().run_in_executor(None, _prune, build)
+    logger.info("静态快照导出完成: %s", summary)
+    return summary
+
+
+async def read_snapshot_manifest(target: Optional[str] = None) -> Dict[str, Any]:
+    """当前 manifest 的摘要（不含文件列表）"""
+    snapshot_target = get_snapshot_target(target)
+    manifest = await _read_manifest(snapshot_target)
+    return {
+        "target": str(snapshot_target),
+        "version": manifest.get("version", 0),
+        "generated_at": manifest.get("generated_at"),
+        "files": len(manifest.get("files", {})),
+    }
+
+
+# ---------- 增量导出 ----------
+
+async def _published_page_of(db: AsyncSession, sort_key: Tuple[Optional[datetime], datetime, int]) -> int:
+    """排序键为 sort_key 的文章在已发布列表中所在（或删除前所在）的页码"""
+    published_at, created_at, post_id = sort_key
+    if published_at is None:
+        return 1
+    # 列表按 published_at DESC NULLS FIRST, created_at DESC, id DESC 排序
+    before = await db.scalar(
+        select(func.count()).select_from(Post).where(
+            Post.status == PostStatus.PUBLISHED.value,
+            or_(
+                Post.published_at.is_(None),
+                tuple_(Post.published_at, Post.created_at, Post.id) > tuple_(published_at, created_at, post_id),
+            ),
+        )
+    )
+    return (before or 0) // SNAPSHOT_POST_PAGE_SIZE + 1
+
+
+@dataclass
+class PostSnapshotChange:
+    """
+    一篇文章的变化：slugs 为需要重新生成的详情文件（改名时包含旧 slug，以及上一篇 / 下一篇链接随之变化的文章），
+    sort_key 为列表排序键；
+    shifted 表示文章进入或离开了已发布列表（发布 / 撤回 / 删除），此时其所在页之后的页都会移动，否则只有其所在的一页变化。
+    """
+    slugs: List[str]
+    sort_key: Tuple[Optional[datetime], datetime, int]
+    shifted: bool
+
+
+def _list_position(sort_key: Tuple[Optional[datetime], datetime, int]) -> Tuple:
+    # 越靠前越大，与 published_at DESC NULLS FIRST, created_at DESC, id DESC 一致
+    published_at, created_at, post_id = sort_key
+    return (published_at is None, published_at or datetime.min, created_at, post_id)
+
+
+async def refresh_post_snapshot(changes: Iterable[PostSnapshotChange]) -> None:
+    """文章变化后增量导出（后台任务）：重新生成变化文章的详情文件，以及已发布列表中受影响的页，一批变化只导出一次"""
+    changes = list(changes)
+    try:
+        target = get_snapshot_target()
+        async with AsyncSessionLocal() as db:
+            await _lock(db)
+            build = await _start_build(target)
+            for slug in dict.fromkeys(slug for change in changes for slug in change.slugs):
+                await _export_post(build, db, slug)
+
+            # 最靠前的移动文章所在页之后全部重新导出，其余只导出各自所在的页
+            shifted = [change.sort_key for change in changes if change.shifted]
+            from_page = await _published_page_of(db, max(shifted, key=_list_position)) if shifted else None
+            pages: Set[int] = set()
+            for sort_key in dict.fromkeys(change.sort_key for change in changes if not change.shifted):
+                page = await _published_page_of(db, sort_key)
+                if from_page is None or page < from_page:
+                    pages.add(page)
+            for page in sorted(pages):
+                await _export_published_pages(build, db, from_page=page, to_page=page)
+            if from_page is not None:
+                await _export_published_pages(build, db, from_page=from_page)
+            await _finish_build(build)
+        if build.changed:
+            logger.info("静态快照增量导出: %s", build.summary())
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception("静态快照增量导出失败: %s", e)
+
+
+def schedule_posts_snapshot(changes: Iterable[PostSnapshotChange]) -> None:
+    """一批文章变化提交后调用：开启快照导出时在后台增量导出"""
+    changes = list(changes)
+    if changes and snapshot_enabled():
+        asyncio.create_task(refresh_post_snapshot(changes))
+
+
+def schedule_post_snapshot(
+    post: Post,
+    old_slug: Optional[str] = None,
+    was_published: bool = False,
+    deleted: bool = False,
+    neighbors: Iterable[str] = (),
+) -> None:
+    """文章新增 / 修改 / 删除提交后调用；neighbors 为上一篇 / 下一篇链接随之变化的文章 slug"""
+    is_published = not deleted and post.status == PostStatus.PUBLISHED.value
+    if not was_published and not is_published:
+        return  # 草稿的修改不影响公开数据
+    slugs = [post.slug] + ([old_slug] if old_slug and old_slug != post.slug else []) + list(neighbors)
+    schedule_posts_snapshot([
+        PostSnapshotChange(slugs, (post.published_at, post.created_at, post.id), shifted=was_published != is_published)
+    ])
+
+
+async def refresh_snapshot_section(name: str) -> None:
+    """分类 / 标签 / 公开配置变化后调用（后台任务）：重新导出对应部分"""
+    try:
+        target = get_snapshot_target()
+        async with AsyncSessionLocal() as db:
+            await _lock(db)
+            build = await _start_build(target)
+            if name == "config":
+                await _export_config(build, db)
+            else:
+                await _export_paginated(build, db, name)
+                if name == "categories":
+                    await _export_category_tree(build, db)
+            await _finish_build(build)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception("静态快照导出失败 section=%s: %s", name, e)
+
+
+def schedule_snapshot_section(name: str) -> None:
+    """name 为 config / categories / tags"""
+    if snapshot_enabled():
+        asyncio.create_task(refresh_snapshot_section(name))
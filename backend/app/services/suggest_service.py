@@ -0,0 +1,197 @@
+"""
+搜索框输入联想（/search/suggest）：已发布文章的标题与标签名。
+
+索引是 Redis 中所有 score 均为 0 的有序集合 SUGGEST_INDEX_KEY，按字典序排列，
+member 为「规范化文本从某个起始位置开始的片段 \\0 引用」，引用形如 p:{文章 ID} / t:{标签 ID}；
+起始位置为每个单词的开头与中文中的每个字（见 search_service.prefix_starts），因此输入可匹配标题中间的词。
+查询是一次 ZRANGEBYLEX 前缀区间读取加一次 HMGET，不访问数据库。
+
+哈希 SUGGEST_DATA_KEY 保存每个引用的展示数据、排序权重（文章为阅读量、标签为已发布文章数）及其 member 列表，
+文章 / 标签增删改后按引用增量更新（先删旧 member 再写新 member）；启动时从数据库全量重建一次（多 worker 只执行一次）。
+"""
+import asyncio
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import acquire_lock, get_raw_redis, release_lock
+from app.models.post import Post, PostStatus
+from app.models.tag import Tag
+from app.services.search_service import prefix_starts
+from app.services.taxonomy_count_service import tag_post_counts
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_INDEX_KEY = "search:suggest"
+SUGGEST_DATA_KEY = "search:suggest:data"
+SUGGEST_REBUILD_LOCK_KEY = "lock:search:suggest:rebuild"
+_REBUILD_LOCK_TTL = 600
+_REBUILD_BATCH_SIZE = 500
+_SEPARATOR = "\x00"
+# 每个标题 / 标签最多的起始位置数，以及每个片段保留的字符数（也是查询前缀的最大长度）
+_MAX_ANCHORS = 32
+_ANCHOR_CHARS = 48
+# 前缀区间内最多读取的 member 数，再按权重取前 N 条
+_CANDIDATES = 200
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """全半角统一、转小写并合并空白，索引与查询使用同一规则"""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text or "").lower()).strip()
+
+
+def _members(text: str, ref: str) -> List[str]:
+    normalized = normalize(text)
+    anchors = dict.fromkeys(
+        normalized[start:start + _ANCHOR_CHARS] for start in prefix_starts(normalized)[:_MAX_ANCHORS]
+    )
+    return [f"{anchor}{_SEPARATOR}{ref}" for anchor in anchors]
+
+
+def _post_entry(post: Any) -> Dict[str, Any]:
+    return {"type": "post", "text": post.title, "slug": post.slug, "weight": post.view_count or 0}
+
+
+def _tag_entry(tag: Any, post_count: int) -> Dict[str, Any]:
+    return {"type": "tag", "text": tag.name, "slug": tag.slug, "weight": post_count}
+
+
+async def _apply(upserts: Dict[str, Dict[str, Any]], removals: Iterable[str] = ()) -> None:
+    """按引用替换（或删除）索引项"""
+    refs = list(dict.fromkeys([*upserts, *removals]))
+    if not refs:
+        return
+    raw = await get_raw_redis()
+    previous = await raw.hmget(SUGGEST_DATA_KEY, refs)
+    new_members: Dict[str, int] = {}
+    payloads: Dict[str, bytes] = {}
+    for ref, entry in upserts.items():
+        members = _members(entry["text"], ref)
+        new_members.update(dict.fromkeys(members, 0))
+        payloads[ref] = orjson.dumps(entry | {"members": members})
+    stale = [
+        member
+        for data in previous if data
+        for member in orjson.loads(data)["members"] if member not in new_members
+    ]
+    removed = [ref for ref in refs if ref not in upserts]
+
+    pipe = raw.pipeline(transaction=True)
+    if stale:
+        pipe.zrem(SUGGEST_INDEX_KEY, *stale)
+    if new_members:
+        pipe.zadd(SUGGEST_INDEX_KEY, new_members)
+    if payloads:
+        pipe.hset(SUGGEST_DATA_KEY, mapping=payloads)
+    if removed:
+        pipe.hdel(SUGGEST_DATA_KEY, *removed)
+    await pipe.execute()
+
+
+async def index_post_suggestions(posts: Iterable[Any]) -> None:
+    """已发布文章新增 / 修改后调用（posts 需有 id、title、slug、view_count）"""
+    await _apply({f"p:{post.id}": _post_entry(post) for post in posts})
+
+
+async def remove_post_suggestions(*post_ids: int) -> None:
+    """文章撤回 / 删除后调用"""
+    await _apply({}, [f"p:{post_id}" for post_id in post_ids])
+
+
+async def index_tag_suggestions(db: AsyncSession, tags: Iterable[Any]) -> None:
+    """标签新增 / 修改后调用"""
+    tags = list(tags)
+    counts = await tag_post_counts(db, [tag.id for tag in tags])
+    await _apply({f"t:{tag.id}": _tag_entry(tag, counts.get(tag.id, 0)) for tag in tags})
+
+
+async def remove_tag_suggestions(*tag_ids: int) -> None:
+    """标签删除后调用"""
+    await _apply({}, [f"t:{tag_id}" for tag_id in tag_ids])
+
+
+async def suggest(query: str, limit: int) -> List[Dict[str, Any]]:
+    """前缀匹配的文章标题 / 标签名，标题或标签名本身以输入开头的优先，其次按权重排序"""
+    prefix = normalize(query)[:_ANCHOR_CHARS]
+    if not prefix:
+        return []
+    encoded = prefix.encode()
+    raw = await get_raw_redis()
+    members = await raw.zrangebylex(
+        SUGGEST_INDEX_KEY, b"[" + encoded, b"[" + encoded + b"\xff", start=0, num=_CANDIDATES
+    )
+    refs = list(dict.fromkeys(member.rsplit(_SEPARATOR.encode(), 1)[1] for member in members))
+    if not refs:
+        return []
+    entries = [orjson.loads(data) for data in await raw.hmget(SUGGEST_DATA_KEY, refs) if data]
+    entries.sort(key=lambda entry: (not normalize(entry["text"]).startswith(prefix), -entry["weight"]))
+    return [{"type": e["type"], "text": e["text"], "slug": e["slug"]} for e in entries[:limit]]
+
+
+async def _rebuild_entries(db: AsyncSession) -> Dict[str, Dict[str, Any]]:
+    entries: Dict[str, Dict[str, Any]] = {}
+    result = await db.execute(
+        select(Post.id, Post.title, Post.slug, Post.view_count).where(Post.status == PostStatus.PUBLISHED.value)
+    )
+    for post in result.all():
+        entries[f"p:{post.id}"] = _post_entry(post)
+    counts = await tag_post_counts(db)
+    result = await db.execute(select(Tag.id, Tag.name, Tag.slug))
+    for tag in result.all():
+        entries[f"t:{tag.id}"] = _tag_entry(tag, counts.get(tag.id, 0))
+    return entries
+
+
+async def rebuild_suggest_index() -> Optional[int]:
+    """从数据库全量重建索引：写入临时 key 后原子地 RENAME 替换，返回索引项数；其它 worker 正在重建时返回 None"""
+    token = await acquire_lock(SUGGEST_REBUILD_LOCK_KEY, _REBUILD_LOCK_TTL)
+    if token is None:
+        return None
+    try:
+        async with AsyncSessionLocal() as db:
+            entries = await _rebuild_entries(db)
+
+        raw = await get_raw_redis()
+        index_tmp, data_tmp = f"{SUGGEST_INDEX_KEY}:rebuild", f"{SUGGEST_DATA_KEY}:rebuild"
+        await raw.delete(index_tmp, data_tmp)
+        items = list(entries.items())
+        indexed = False
+        for i in range(0, len(items), _REBUILD_BATCH_SIZE):
+            pipe = raw.pipeline(transaction=False)
+            for ref, entry in items[i:i + _REBUILD_BATCH_SIZE]:
+                members = _members(entry["text"], ref)
+                if members:
+                    pipe.zadd(index_tmp, dict.fromkeys(members, 0))
+                    indexed = True
+                pipe.hset(data_tmp, ref, orjson.dumps(entry | {"members": members}))
+            await pipe.execute()
+
+        pipe = raw.pipeline(transaction=True)
+        pipe.delete(SUGGEST_INDEX_KEY, SUGGEST_DATA_KEY)
+        if indexed:
+            pipe.rename(index_tmp, SUGGEST_INDEX_KEY)
+        if items:
+            pipe.rename(data_tmp, SUGGEST_DATA_KEY)
+        await pipe.execute()
+        return len(items)
+    finally:
+        await release_lock(SUGGEST_REBUILD_LOCK_KEY, token)
+
+
+async def rebuild_suggest_index_on_startup() -> None:
+    """启动时后台执行的全量重建"""
+    try:
+        count = await rebuild_suggest_index()
+        if count is not None:
+            logger.info("输入联想索引已重建，共 %d 项", count)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception("重建输入联想索引失败: %s", e)
@@ -0,0 +1,93 @@
+"""
+分类 / 标签的已发布文章数。
+
+列表接口对当前页的分类 / 标签做一次聚合查询（GROUP BY），结果随列表响应一起缓存在各自带版本的命名空间中；
+已发布文章集合或已发布文章的分类 / 标签变化后调用 invalidate_post_counts()，使两个列表（及其静态快照）失效。
+分类 / 标签改名或删除时，其下已发布文章的详情与列表项（含分类 / 标签名称）由 refresh_term_posts() 更新。
+"""
+import math
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis_client import (
+    CATEGORY_LIST_NAMESPACE, TAG_LIST_NAMESPACE, bump_namespace, delete_cache, post_detail_cache_keys,
+)
+from app.models.category import post_categories
+from app.models.post import Post, PostStatus
+from app.models.tag import post_tags
+from app.services.snapshot_service import PostSnapshotChange, schedule_posts_snapshot, schedule_snapshot_section
+
+# 标签云权重分级数（1 ~ CLOUD_LEVELS）
+CLOUD_LEVELS = 5
+
+
+async def _published_counts(db: AsyncSession, table, column, ids: Optional[Iterable[int]]) -> Dict[int, int]:
+    query = (
+        select(column, func.count())
+        .join(Post, Post.id == table.c.post_id)
+        .where(Post.status == PostStatus.PUBLISHED.value)
+        .group_by(column)
+    )
+    if ids is not None:
+        query = query.where(column.in_(list(ids)))
+    result = await db.execute(query)
+    return {row[0]: row[1] for row in result.all()}
+
+
+async def category_post_counts(db: AsyncSession, category_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """{category_id: 已发布文章数}，category_ids 为 None 时统计全部分类；没有文章的分类不在结果中"""
+    return await _published_counts(db, post_categories, post_categories.c.category_id, category_ids)
+
+
+async def tag_post_counts(db: AsyncSession, tag_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """{tag_id: 已发布文章数}，tag_ids 为 None 时统计全部标签；没有文章的标签不在结果中"""
+    return await _published_counts(db, post_tags, post_tags.c.tag_id, tag_ids)
+
+
+async def invalidate_post_counts() -> None:
+    """已发布文章新增 / 撤回 / 删除，或已发布文章的分类 / 标签变化后调用"""
+    await bump_namespace(CATEGORY_LIST_NAMESPACE, TAG_LIST_NAMESPACE)
+    schedule_snapshot_section("categories")
+    schedule_snapshot_section("tags")
+
+
+async def _term_post_changes(db: AsyncSession, table, column, term_id: int) -> List[PostSnapshotChange]:
+    result = await db.execute(
+        select(Post.slug, Post.published_at, Post.created_at, Post.id)
+        .join(table, table.c.post_id == Post.id)
+        .where(column == term_id, Post.status == PostStatus.PUBLISHED.value)
+    )
+    return [
+        PostSnapshotChange([row.slug], (row.published_at, row.created_at, row.id), shifted=False)
+        for row in result.all()
+    ]
+
+
+async def category_post_changes(db: AsyncSession, category_id: int) -> List[PostSnapshotChange]:
+    """分类下的已发布文章（删除分类时须在删除前查询，关联行会被级联删除）"""
+    return await _term_post_changes(db, post_categories, post_categories.c.category_id, category_id)
+
+
+async def tag_post_changes(db: AsyncSession, tag_id: int) -> List[PostSnapshotChange]:
+    """标签下的已发布文章（删除标签时须在删除前查询，关联行会被级联删除）"""
+    return await _term_post_changes(db, post_tags, post_tags.c.tag_id, tag_id)
+
+
+async def refresh_term_posts(changes: List[PostSnapshotChange]) -> None:
+    """分类 / 标签改名或删除提交后调用：清理其下文章的详情缓存，并增量导出这些文章的详情文件与所在列表页"""
+    if not changes:
+        return
+    await delete_cache(*(key for change in changes for slug in change.slugs for key in post_detail_cache_keys(slug)))
+    schedule_posts_snapshot(changes)
+
+
+def cloud_weights(counts: List[int], levels: int = CLOUD_LEVELS) -> List[int]:
+    """按文章数的对数线性映射到 1 ~ levels"""
+    if not counts:
+        return []
+    low, high = math.log(min(counts)), math.log(max(counts))
+    if high == low:
+        return [1 if levels == 1 else (levels + 1) // 2] * len(counts)
+    return [1 + round((math.log(count) - low) / (high - low) * (levels - 1)) for count in counts]
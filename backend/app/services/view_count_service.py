@@ -0,0 +1,120 @@
+"""
+文章阅读量写后（write-behind）计数。
+
+每次访问只在 Redis 哈希 post:views:pending 上执行 HINCRBY（字段为文章 ID，改 slug 不影响缓冲的增量），不写数据库
+（同一次往返中记入热门文章的小时桶，见 hot_posts_service）；
+后台任务每隔 VIEW_COUNT_FLUSH_INTERVAL_SECONDS 秒把缓冲的增量用一条
+UPDATE posts ... FROM (VALUES ...) 合并进 posts.view_count。
+"""
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+from redis.exceptions import ResponseError
+from sqlalchemy import Integer, column, update, values
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import get_redis, delete_cache, post_detail_cache_keys, acquire_lock, release_lock
+from app.models.post import Post
+from app.services.hot_posts_service import add_hot_view
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "post:views:pending"
+# 正在刷写的增量；刷写中断时保留，下次优先处理
+FLUSHING_KEY = "post:views:flushing"
+FLUSH_LOCK_KEY = "post:views:flush_lock"
+FLUSH_LOCK_TTL = 60
+FLUSH_BATCH_SIZE = 1000
+
+
+async def record_view(post_id: int) -> int:
+    """记录一次阅读，返回该文章尚未写回数据库的阅读增量"""
+    r = await get_redis()
+    pipe = r.pipeline(transaction=False)
+    pipe.hincrby(PENDING_KEY, post_id, 1)
+    add_hot_view(pipe, post_id)
+    pending, *_ = await pipe.execute()
+    return int(pending)
+
+
+async def get_total_pending_views() -> int:
+    """所有文章尚未写回数据库的阅读增量之和（含正在刷写的部分）"""
+    r = await get_redis()
+    pipe = r.pipeline(transaction=False)
+    pipe.hvals(PENDING_KEY)
+    pipe.hvals(FLUSHING_KEY)
+    pending, flushing = await pipe.execute()
+    return sum(int(v) for v in pending) + sum(int(v) for v in flushing)
+
+
+async def _apply_deltas(rows: List[Tuple[int, int]]) -> List[str]:
+    """批量把阅读增量写入 posts.view_count，返回实际更新的文章 slug"""
+    updated: List[str] = []
+    async with AsyncSessionLocal() as db:
+        for i in range(0, len(rows), FLUSH_BATCH_SIZE):
+            deltas = values(
+                column("id", Integer), column("delta", Integer), name="view_deltas"
+            ).data(rows[i:i + FLUSH_BATCH_SIZE])
+            result = await db.execute(
+                update(Post)
+                .where(Post.id == deltas.c.id)
+                # 阅读量不属于内容修改，保持 updated_at 不变
+                .values(view_count=Post.view_count + deltas.c.delta, updated_at=Post.updated_at)
+                .returning(Post.slug)
+                .execution_options(synchronize_session=False)
+            )
+            updated.extend(result.scalars().all())
+        await db.commit()
+    return updated
+
+
+async def flush_pending_views() -> int:
+    """
+    把 Redis 中缓冲的阅读增量写回数据库，返回写回的文章数。
+    通过 Redis 锁保证多个 worker 同一时刻只有一个在刷写；RENAME 保证刷写期间的新增访问进入新的 pending 哈希。
+    """
+    r = await get_redis()
+    token = await acquire_lock(FLUSH_LOCK_KEY, FLUSH_LOCK_TTL)
+    if token is None:
+        return 0
+    try:
+        if not await r.exists(FLUSHING_KEY):
+            try:
+                await r.rename(PENDING_KEY, FLUSHING_KEY)
+            except ResponseError:
+                # pending 哈希不存在，没有需要刷写的增量
+                return 0
+
+        raw: Dict[str, str] = await r.hgetall(FLUSHING_KEY)
+        rows = [(int(post_id), int(delta)) for post_id, delta in raw.items() if int(delta) > 0]
+        updated_slugs = await _apply_deltas(rows) if rows else []
+        await r.delete(FLUSHING_KEY)
+
+        # 详情缓存中的 view_count 是缓存时的数据库值，刷写后使其失效
+        if updated_slugs:
+            await delete_cache(*(key for slug in updated_slugs for key in post_detail_cache_keys(slug)))
+        return len(updated_slugs)
+    finally:
+        await release_lock(FLUSH_LOCK_KEY, token)
+
+
+async def view_count_flush_loop() -> None:
+    """后台任务：定期把缓冲的阅读增量写回数据库，退出前再刷写一次"""
+    logger.info("阅读量刷写任务启动")
+    try:
+        while True:
+            try:
+                await asyncio.sleep(settings.VIEW_COUNT_FLUSH_INTERVAL_SECONDS)
+                await flush_pending_views()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("阅读量刷写任务发生异常: %s", e)
+    except asyncio.CancelledError:
+        try:
+            await flush_pending_views()
+        except Exception as e:
+            logger.exception("退出前刷写阅读量失败: %s", e)
+        logger.info("阅读量刷写任务已取消")
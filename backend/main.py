@@ -5,10 +5,22 @@ import asyncio
 import logging
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, Base, dispose_engines, replica_lag_monitor_loop, ReadAfterWriteMiddleware
 from app.api.v1 import api_router
+from app.api import feeds
+from app.core.redis_client import cache_invalidation_listener
+from app.core.cache import ConditionalRequestMiddleware
+from app.core.db_instrumentation import QueryStatsMiddleware
 from app.services.backup_service import backup_scheduler_loop
 from app.services.github_trending_service import github_trending_scheduler_loop
+from app.services.search_service import reindex_missing_posts
+from app.services.suggest_service import rebuild_suggest_index_on_startup
+from app.services.markdown_service import render_missing_posts
+from app.services.view_count_service import view_count_flush_loop
+from app.services.comment_count_service import comment_count_reconcile_loop
+from app.services.related_service import related_posts_rebuild_loop
+from app.services.scheduled_publish_service import scheduled_publish_loop
+from app.services.hot_posts_service import hot_posts_refresh_loop
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +46,26 @@ async def lifespan(app: FastAPI):
                 logger.error(f"数据库连接失败，已达到最大重试次数: {e}")
                 raise
 
+    # 订阅缓存失效广播（订阅成功后才启用进程内本地缓存）
+    cache_invalidation_task = asyncio.create_task(cache_invalidation_listener())
+    # 检查只读副本的复制延迟（未配置副本时直接结束）
+    replica_monitor_task = asyncio.create_task(replica_lag_monitor_loop())
+    # 为尚未建立全文检索索引的文章补建索引
+    search_reindex_task = asyncio.create_task(reindex_missing_posts())
+    # 重建搜索框输入联想索引
+    suggest_rebuild_task = asyncio.create_task(rebuild_suggest_index_on_startup())
+    # 为尚未渲染的文章补充服务端渲染结果
+    render_backfill_task = asyncio.create_task(render_missing_posts())
+    # 启动阅读量批量写回任务
+    view_count_task = asyncio.create_task(view_count_flush_loop())
+    # 启动评论数对账任务
+    comment_count_task = asyncio.create_task(comment_count_reconcile_loop())
+    # 启动相关文章每日全量重算任务
+    related_posts_task = asyncio.create_task(related_posts_rebuild_loop())
+    # 启动定时发布任务（每个 worker 一个，睡眠到下一篇定时文章到期）
+    scheduled_publish_task = asyncio.create_task(scheduled_publish_loop())
+    # 启动热门文章定期计算任务
+    hot_posts_task = asyncio.create_task(hot_posts_refresh_loop())
     # 启动备份调度后台任务
     backup_task = asyncio.create_task(backup_scheduler_loop())
     # 启动 Github 热门仓库每日 9 点调度任务
@@ -42,6 +74,54 @@ async def lifespan(app: FastAPI):
     try:
         yield
     finally:
+        # 关闭检索索引补建任务
+        search_reindex_task.cancel()
+        try:
+            await search_reindex_task
+        except asyncio.CancelledError:
+            pass
+        # 关闭输入联想索引重建任务
+        suggest_rebuild_task.cancel()
+        try:
+            await suggest_rebuild_task
+        except asyncio.CancelledError:
+            pass
+        # 关闭渲染补充任务
+        render_backfill_task.cancel()
+        try:
+            await render_backfill_task
+        except asyncio.CancelledError:
+            pass
+        # 关闭阅读量写回任务（退出前会再刷写一次）
+        view_count_task.cancel()
+        try:
+            await view_count_task
+        except asyncio.CancelledError:
+            pass
+        # 关闭评论数对账任务
+        comment_count_task.cancel()
+        try:
+            await comment_count_task
+        except asyncio.CancelledError:
+            pass
+        # 关闭相关文章重算任务
+        related_posts_task.cancel()
+        try:
+            await related_posts_task
+        except asyncio.CancelledError:
+            pass
+        # 关闭定时发布任务
+        scheduled_publish_task.cancel()
+        try:
+            await scheduled_publish_task
+        except asyncio.CancelledError:
+            pass
+        # 关闭热门文章计算任务
+        hot_posts_task.cancel()
+        try:
+            await hot_posts_task
+        except asyncio.CancelledError:
+            pass
         # 关闭备份调度任务
         backup_task.cancel()
         try:
@@ -55,8 +135,21 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
 
+        # 关闭缓存失效订阅任务
+        cache_invalidation_task.cancel()
+        try:
+            await cache_invalidation_task
+        except asyncio.CancelledError:
+            pass
+        # 关闭副本延迟检查任务
+        replica_monitor_task.cancel()
+        try:
+            await replica_monitor_task
+        except asyncio.CancelledError:
+            pass
+
         # Shutdown
-        await engine.dispose()
+        await dispose_engines()
         logger.info("数据库连接已关闭")
 
 
@@ -68,6 +161,9 @@ app = FastAPI(
 )
 
 # CORS
+# 条件请求（ETag / Last-Modified → 304）；需在 CORS 之前注册，使 304 响应也带上 CORS 头
+app.add_middleware(ConditionalRequestMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
@@ -75,9 +171,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 写请求后的短时间内该客户端读主库（仅配置了只读副本时生效）
+app.add_middleware(ReadAfterWriteMiddleware)
+# 按请求统计数据库查询次数 / 耗时并检查 N+1；最后注册即最外层，覆盖整个请求
+app.add_middleware(QueryStatsMiddleware)
 
 # Include routers
 app.include_router(api_router, prefix="/api/v1")
+# 订阅源与站点地图挂载在根路径
+app.include_router(feeds.router, tags=["订阅源与站点地图"])
 
 
 @app.get("/")
@@ -0,0 +1,87 @@
+"""
+文章列表查询基准：对比「加载整行 Post」与「列表投影 post_list_query()」每页读取的数据量与耗时。
+
+用法（在 backend 目录下，使用 .env / 环境变量中的 DATABASE_URL）：
+    python scripts/benchmark_post_list.py --size 10 --pages 5 --iterations 20
+
+每页读取字节数按 PostgreSQL 行的文本表示长度（octet_length(row::text)）统计，近似于传输给客户端的数据量。
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, literal_column, select  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+
+from app.core.database import AsyncSessionLocal, engine  # noqa: E402
+from app.models.post import Post, PostStatus  # noqa: E402
+from app.services.post_query_service import LIST_COLUMNS, post_list_query  # noqa: E402
+
+_ORDER = (Post.published_at.desc().nulls_first(), Post.created_at.desc(), Post.id.desc())
+
+
+def _full_query():
+    # 优化前的列表查询：select(Post) 加载除延迟列外的全部列（含 content）
+    return select(Post).options(
+        selectinload(Post.author),
+        selectinload(Post.categories),
+        selectinload(Post.tags),
+    )
+
+
+async def _page_bytes(db, columns, page: int, size: int) -> int:
+    page_rows = (
+        select(*columns)
+        .where(Post.status == PostStatus.PUBLISHED.value)
+        .order_by(*_ORDER)
+        .offset((page - 1) * size)
+        .limit(size)
+        .subquery("page_rows")
+    )
+    total = await db.scalar(
+        select(func.coalesce(func.sum(func.octet_length(literal_column("page_rows::text"))), 0)).select_from(page_rows)
+    )
+    return int(total or 0)
+
+
+async def _page_seconds(db, query, page: int, size: int, iterations: int) -> float:
+    query = query.where(Post.status == PostStatus.PUBLISHED.value).order_by(*_ORDER).offset((page - 1) * size).limit(size)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        (await db.execute(query)).scalars().all()
+        db.expunge_all()
+    return (time.perf_counter() - started) / iterations
+
+
+async def main(size: int, pages: int, iterations: int) -> None:
+    # 关闭 SQL 回显，避免干扰输出
+    engine.echo = False
+    full_columns = [c for c in Post.__table__.columns if c.key not in ("search_vector", "content_html", "content_toc")]
+    print(f"{'page':>4} | {'full bytes':>12} | {'list bytes':>12} | {'ratio':>7} | {'full ms':>8} | {'list ms':>8}")
+    print("-" * 68)
+    async with AsyncSessionLocal() as db:
+        for page in range(1, pages + 1):
+            full_bytes = await _page_bytes(db, full_columns, page, size)
+            list_bytes = await _page_bytes(db, LIST_COLUMNS, page, size)
+            if full_bytes == 0:
+                break
+            full_ms = await _page_seconds(db, _full_query(), page, size, iterations) * 1000
+            list_ms = await _page_seconds(db, post_list_query(), page, size, iterations) * 1000
+            ratio = full_bytes / list_bytes if list_bytes else float("inf")
+            print(
+                f"{page:>4} | {full_bytes:>12,} | {list_bytes:>12,} | {ratio:>6.1f}x | {full_ms:>8.2f} | {list_ms:>8.2f}"
+            )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="文章列表查询基准")
+    parser.add_argument("--size", type=int, default=10, help="每页条数")
+    parser.add_argument("--pages", type=int, default=5, help="测试的页数")
+    parser.add_argument("--iterations", type=int, default=20, help="每页查询重复次数")
+    args = parser.parse_args()
+    asyncio.run(main(args.size, args.pages, args.iterations))